@@ -1,62 +1,77 @@
 from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
-from ..bilibili.auth import BilibiliAuth
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
+import json
+from ..bilibili.account_pool import account_pool
 from ..bilibili.client import BilibiliClient
+from ..bilibili.qr_login import FINAL_STATUSES, qr_login_manager
+from ..bilibili.session_keeper import SessionCheckError, session_keeper
 from ..utils.cookie_manager import cookie_manager
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 
-# 全局认证实例
-auth_instance = None
+# 全局客户端实例
 client_instance = None
 
 
+def apply_login(status: Dict[str, Any]):
+    """扫码登录成功后让全局客户端使用新的cookies（cookies已由扫码登录管理器保存）"""
+    global client_instance
+
+    if status['status'] == 'success' and 'cookies' in status:
+        if not client_instance:
+            client_instance = BilibiliClient()
+        client_instance.set_cookies(status['cookies'])
+
+
 @router.get("/qr-login")
 async def get_qr_login() -> Dict[str, Any]:
-    """获取二维码登录"""
-    global auth_instance
-    
+    """获取二维码登录，可以同时进行多个扫码登录"""
     try:
-        auth_instance = BilibiliAuth()
-        result = await auth_instance.login_with_qr()
-        return result
+        session = await qr_login_manager.create()
+        qr_login_manager.subscribe(session.qrcode_key, apply_login)
+        return {
+            'status': 'qr_ready',
+            'qr_image': session.qr_image,
+            'qrcode_key': session.qrcode_key,
+            'message': '请使用Bilibili APP扫描二维码'
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/qr-status/{qrcode_key}")
-async def check_qr_status(qrcode_key: str) -> Dict[str, Any]:
-    """检查二维码扫描状态"""
-    global auth_instance, client_instance
-    
-    if not auth_instance:
+async def check_qr_status(qrcode_key: str, last_status: Optional[str] = None, wait: float = 0) -> Dict[str, Any]:
+    """检查二维码扫描状态
+
+    状态由后台任务轮询，这里只读取缓存的结果。wait大于0时为长轮询：
+    等待状态不同于 last_status 后再返回，最多等待 wait 秒。
+    """
+    if qr_login_manager.get(qrcode_key) is None:
         raise HTTPException(status_code=400, detail="请先获取二维码")
-    
-    try:
-        result = await auth_instance.check_qr_status(qrcode_key)
-        
-        # 如果登录成功，设置客户端cookies并保存
-        if result['status'] == 'success' and 'cookies' in result:
-            if not client_instance:
-                client_instance = BilibiliClient()
-            client_instance.set_cookies(result['cookies'])
 
-            # 获取用户信息并保存cookies
-            try:
-                user_info_response = await client_instance.get_user_info()
-                if user_info_response.get('code') == 0:
-                    user_data = user_info_response.get('data', {})
-                    user_id = str(user_data.get('mid', 'unknown'))
+    return await qr_login_manager.wait_for_change(qrcode_key, last_status, timeout=min(wait, 60))
 
-                    # 保存cookies和用户信息
-                    cookie_manager.save_cookies(user_id, result['cookies'], user_data)
-                    print(f"已保存用户 {user_data.get('uname', user_id)} 的登录信息")
-            except Exception as e:
-                print(f"保存用户信息失败: {e}")
 
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/qr-events/{qrcode_key}")
+async def qr_events(qrcode_key: str) -> StreamingResponse:
+    """通过SSE推送扫码状态变化，登录结束后关闭连接"""
+    if qr_login_manager.get(qrcode_key) is None:
+        raise HTTPException(status_code=400, detail="请先获取二维码")
+
+    async def event_stream():
+        last_status = None
+        while True:
+            status = await qr_login_manager.wait_for_change(qrcode_key, last_status)
+            if status is None:
+                break
+            if status['status'] != last_status:
+                yield f"data: {json.dumps(status, ensure_ascii=False)}\n\n"
+            last_status = status['status']
+            if last_status in FINAL_STATUSES:
+                break
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 @router.get("/user-info")
@@ -77,13 +92,9 @@ async def get_user_info() -> Dict[str, Any]:
 @router.post("/logout")
 async def logout() -> Dict[str, Any]:
     """登出"""
-    global auth_instance, client_instance
+    global client_instance
     
     try:
-        if auth_instance:
-            await auth_instance.__aexit__(None, None, None)
-            auth_instance = None
-        
         if client_instance:
             await client_instance.__aexit__(None, None, None)
             client_instance = None
@@ -103,6 +114,15 @@ async def get_saved_users() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/accounts")
+async def get_account_pool() -> Dict[str, Any]:
+    """获取账号池中各账号的配额、风控和大会员状态"""
+    try:
+        return {"code": 0, "data": account_pool.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/load-user/{user_id}")
 async def load_saved_user(user_id: str) -> Dict[str, Any]:
     """加载已保存的用户"""
@@ -115,23 +135,27 @@ async def load_saved_user(user_id: str) -> Dict[str, Any]:
         if not cookies:
             raise HTTPException(status_code=404, detail="用户不存在或cookies已过期")
 
-        # 创建客户端并设置cookies
-        if not client_instance:
-            client_instance = BilibiliClient()
-        client_instance.set_cookies(cookies)
-
-        # 验证cookies是否仍然有效
-        user_info_response = await client_instance.get_user_info()
-        if user_info_response.get('code') != 0 or not user_info_response.get('data', {}).get('isLogin'):
+        # 验证cookies是否仍然有效（检查结果有缓存，短时间内重复加载不会再请求）
+        try:
+            user_data = await session_keeper.validate(cookies)
+        except SessionCheckError as e:
+            # 无法确认登录状态时保留cookies，稍后可以重试
+            raise HTTPException(status_code=503, detail=str(e))
+        if user_data is None:
             # cookies无效，删除保存的数据
             cookie_manager.remove_cookies(user_id)
             client_instance = None
             raise HTTPException(status_code=401, detail="用户登录已过期")
 
+        # 创建客户端并设置cookies
+        if not client_instance:
+            client_instance = BilibiliClient()
+        client_instance.set_cookies(cookies)
+
         return {
             "code": 0,
             "message": "用户加载成功",
-            "data": user_info_response.get('data', {})
+            "data": user_data
         }
     except HTTPException:
         raise
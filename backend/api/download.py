@@ -0,0 +1,228 @@
+from fastapi import APIRouter, HTTPException, Form
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
+import asyncio
+import json
+import time
+import uuid
+from video_downloader import VideoDownloader
+from ..bilibili.account_pool import account_pool
+from ..utils.metrics import DOWNLOAD_JOBS
+from ..utils.progress import progress_aggregator
+from ..utils.stream_selector import POLICIES, get_policy
+from ..utils.tracing import tracer
+
+router = APIRouter(prefix="/download", tags=["下载"])
+
+# 全局下载器实例与任务记录
+downloader_instance: Optional[VideoDownloader] = None
+jobs: Dict[str, Dict[str, Any]] = {}
+# 保存运行中的任务引用，避免被垃圾回收
+running_tasks = set()
+
+
+def update_job_metrics():
+    """按状态统计任务数，写入指标"""
+    counts = {'pending': 0, 'running': 0, 'success': 0, 'failed': 0}
+    for job in jobs.values():
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+    for status, count in counts.items():
+        DOWNLOAD_JOBS.set(count, status=status)
+
+
+async def get_downloader() -> VideoDownloader:
+    """获取已初始化的下载器实例"""
+    global downloader_instance
+
+    if not downloader_instance:
+        downloader = VideoDownloader(account_pool=account_pool)
+        if not await downloader.init_client():
+            await downloader.close()
+            raise HTTPException(status_code=401, detail="用户未登录")
+        downloader_instance = downloader
+    return downloader_instance
+
+
+async def run_job(job: Dict[str, Any]):
+    """执行下载任务并更新任务记录"""
+    job_progress = progress_aggregator.create_job(job['id'], job['bvid'])
+    trace = tracer.start_job(job['id'], job['bvid'])
+    success = False
+    report: Dict[str, Any] = {}
+
+    job['status'] = 'running'
+    job['started_time'] = int(time.time())
+    update_job_metrics()
+    try:
+        downloader = await get_downloader()
+        success = await downloader.download_video(
+            job['bvid'], job['quality'], job['output_dir'],
+            progress_callback=job_progress,
+            audio_only=job['audio_only'],
+            audio_format=job['audio_format'],
+            policy=get_policy(job['policy']),
+            fsync=job['fsync'],
+            report=report,
+            trace=trace
+        )
+        job_progress.finish(success)
+    except Exception as e:
+        job_progress.finish(False, str(e))
+    finally:
+        trace.finish(success)
+        job['status'] = 'success' if success else 'failed'
+        job['message'] = job_progress.status
+        job['progress'] = job_progress.percent
+        job['bytes_done'] = job_progress.bytes_done
+        job['finished_time'] = int(time.time())
+        # 下载时计算的校验结果，去重和同步可直接使用而无需重读文件
+        job['output_file'] = report.get('output_file')
+        job['integrity'] = report.get('streams')
+        # 开启追踪时记录各阶段耗时（秒）
+        if trace.enabled:
+            job['timings'] = trace.summary()
+        progress_aggregator.remove_job(job['id'])
+        update_job_metrics()
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """合并进度聚合器中的实时进度"""
+    job_progress = progress_aggregator.get_job(job['id'])
+    if not job_progress:
+        return job
+
+    view = {
+        **job,
+        'message': job_progress.status,
+        'progress': job_progress.percent,
+        'bytes_done': job_progress.bytes_done,
+        'speed': job_progress.speed,
+        'eta': job_progress.eta
+    }
+    trace = tracer.get(job['id'])
+    if trace:
+        view['timings'] = trace.summary()
+    return view
+
+
+@router.post("/jobs")
+async def create_job(
+    bvid: str = Form(...),
+    quality: int = Form(80),
+    output_dir: str = Form("./downloads"),
+    audio_only: bool = Form(False),
+    audio_format: str = Form("m4a"),
+    policy: str = Form("default"),
+    fsync: bool = Form(False)
+) -> Dict[str, Any]:
+    """创建下载任务"""
+    if audio_format not in ("m4a", "flac"):
+        raise HTTPException(status_code=400, detail="audio_format 仅支持 m4a 或 flac")
+    if policy not in POLICIES:
+        raise HTTPException(status_code=400, detail=f"policy 仅支持 {', '.join(POLICIES)}")
+
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        'id': job_id,
+        'bvid': bvid,
+        'quality': quality,
+        'output_dir': output_dir,
+        'audio_only': audio_only,
+        'audio_format': audio_format,
+        'policy': policy,
+        'fsync': fsync,
+        'status': 'pending',
+        'progress': 0.0,
+        'message': '',
+        'created_time': int(time.time())
+    }
+    jobs[job_id] = job
+    update_job_metrics()
+    task = asyncio.create_task(run_job(job))
+    running_tasks.add(task)
+    task.add_done_callback(running_tasks.discard)
+
+    return {"code": 0, "data": job}
+
+
+@router.get("/jobs")
+async def list_jobs() -> Dict[str, Any]:
+    """获取所有下载任务"""
+    return {"code": 0, "data": [job_view(job) for job in jobs.values()]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """获取下载任务状态"""
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return {"code": 0, "data": job_view(job)}
+
+
+@router.get("/events")
+async def job_events() -> StreamingResponse:
+    """通过SSE推送所有运行中任务的进度快照"""
+    loop = asyncio.get_running_loop()
+    # 只保留最新的快照，客户端读取较慢时丢弃旧快照
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    def offer(snapshot):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(snapshot)
+
+    def on_progress(snapshot):
+        try:
+            loop.call_soon_threadsafe(offer, snapshot)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    async def event_stream():
+        progress_aggregator.subscribe(on_progress)
+        last_empty = False
+        try:
+            while True:
+                snapshot = await queue.get()
+                # 没有任务时只推送一次空快照
+                if not snapshot and last_empty:
+                    continue
+                last_empty = not snapshot
+                yield f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+        finally:
+            progress_aggregator.unsubscribe(on_progress)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.get("/jobs/{job_id}/trace")
+async def get_job_trace(job_id: str, format: str = "json") -> Dict[str, Any]:
+    """导出任务的阶段追踪，format为 json 或 chrome（可在 Perfetto / chrome://tracing 中打开）"""
+    if format not in ("json", "chrome"):
+        raise HTTPException(status_code=400, detail="format 仅支持 json 或 chrome")
+    trace = tracer.get(job_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="没有该任务的追踪记录（追踪未开启或记录已过期）")
+    if format == "chrome":
+        return tracer.export_chrome([trace])
+    return {"code": 0, "data": tracer.export_json([trace])}
+
+
+@router.get("/trace")
+async def get_trace(format: str = "json") -> Dict[str, Any]:
+    """导出所有已记录任务的阶段追踪和按阶段的汇总"""
+    if format not in ("json", "chrome"):
+        raise HTTPException(status_code=400, detail="format 仅支持 json 或 chrome")
+    if format == "chrome":
+        return tracer.export_chrome()
+    return {"code": 0, "data": {"enabled": tracer.enabled, **tracer.export_json()}}
+
+
+@router.post("/trace")
+async def set_trace(enabled: bool = Form(...), clear: bool = Form(False)) -> Dict[str, Any]:
+    """开启或关闭任务追踪，只影响之后创建的任务"""
+    tracer.enable(enabled)
+    if clear:
+        tracer.clear()
+    return {"code": 0, "data": {"enabled": tracer.enabled}}
@@ -5,8 +5,11 @@ import httpx
 import base64
 from urllib.parse import quote, unquote
 from ..bilibili.client import BilibiliClient
+from ..utils.log import get_logger
 from .auth import get_client
 
+logger = get_logger('api.video')
+
 router = APIRouter(prefix="/video", tags=["视频"])
 
 
@@ -63,7 +66,7 @@ async def get_random_videos(
                         videos = result['data']['list']
                         all_videos.extend(videos)
                 except Exception as e:
-                    print(f"获取第{page}页热门视频失败: {e}")
+                    logger.warning("获取第%s页热门视频失败: %s", page, e)
                     continue
 
             # 如果没有获取到足够的视频，尝试获取更多
@@ -74,7 +77,7 @@ async def get_random_videos(
                     if result.get('code') == 0 and result.get('data', {}).get('list'):
                         all_videos.extend(result['data']['list'])
                 except Exception as e:
-                    print(f"获取推荐视频失败: {e}")
+                    logger.warning("获取推荐视频失败: %s", e)
 
             # 随机打乱并选择指定数量
             if all_videos:
@@ -83,7 +86,7 @@ async def get_random_videos(
             else:
                 final_videos = []
 
-            print(f"随机视频API: 获取到 {len(final_videos)} 个视频")
+            logger.debug("随机视频API: 获取到 %s 个视频", len(final_videos))
 
             return {
                 'code': 0,
@@ -94,7 +97,7 @@ async def get_random_videos(
                 }
             }
     except Exception as e:
-        print(f"随机视频API错误: {e}")
+        logger.warning("随机视频API错误: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -141,11 +144,11 @@ async def image_proxy(url: str = Query(..., description="图片URL")) -> Respons
     try:
         # 解码URL
         image_url = unquote(url)
-        print(f"代理图片请求: {image_url}")  # 调试日志
+        logger.debug("代理图片请求: %s", image_url)
 
         # 验证URL是否来自Bilibili
         if not any(domain in image_url for domain in ['hdslb.com', 'bilibili.com']):
-            print(f"非Bilibili图片URL: {image_url}")
+            logger.info("拒绝代理非Bilibili图片URL: %s", image_url)
             raise HTTPException(status_code=400, detail="只允许代理Bilibili图片")
 
         # 创建HTTP客户端，设置正确的headers
@@ -165,14 +168,12 @@ async def image_proxy(url: str = Query(..., description="图片URL")) -> Respons
                 'Sec-Fetch-Site': 'cross-site'
             }
 
-            print(f"发送请求到: {image_url}")
             response = await client.get(image_url, headers=headers, timeout=15.0)
-            print(f"响应状态码: {response.status_code}")
 
             if response.status_code == 200:
                 # 获取内容类型
                 content_type = response.headers.get('content-type', 'image/jpeg')
-                print(f"图片类型: {content_type}, 大小: {len(response.content)} bytes")
+                logger.debug("图片类型: %s, 大小: %s bytes", content_type, len(response.content))
 
                 # 返回图片内容
                 return Response(
@@ -187,7 +188,7 @@ async def image_proxy(url: str = Query(..., description="图片URL")) -> Respons
                     }
                 )
             else:
-                print(f"获取图片失败: {response.status_code} - {response.text}")
+                logger.warning("获取图片失败: %s %s", response.status_code, image_url)
                 # 如果是403错误，尝试不同的User-Agent
                 if response.status_code == 403:
                     headers['User-Agent'] = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
@@ -208,10 +209,10 @@ async def image_proxy(url: str = Query(..., description="图片URL")) -> Respons
                 raise HTTPException(status_code=response.status_code, detail=f"获取图片失败: {response.status_code}")
 
     except httpx.TimeoutException:
-        print("图片请求超时")
+        logger.warning("图片请求超时: %s", url)
         raise HTTPException(status_code=408, detail="请求超时")
     except Exception as e:
-        print(f"代理图片异常: {str(e)}")
+        logger.warning("代理图片异常: %s", e)
         raise HTTPException(status_code=500, detail=f"代理图片失败: {str(e)}")
 
 
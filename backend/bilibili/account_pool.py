@@ -0,0 +1,231 @@
+"""
+账号池 - 把接口请求和播放地址解析分摊到多个已登录账号上
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .client import BilibiliClient
+from ..utils.cookie_manager import CookieManager, cookie_manager
+from ..utils.log import get_logger
+from ..utils.metrics import RISK_CONTROL
+
+logger = get_logger('account_pool')
+
+
+# 触发风控的返回码：-412 请求被拦截，-352 风控校验失败，-509 请求过于频繁，-799 请求过于频繁
+RISK_CONTROL_CODES = {-412, -352, -509, -799}
+
+# 需要大会员的画质：4K、1080P60、1080P+、杜比视界、HDR、8K
+VIP_QUALITIES = {112, 116, 120, 125, 126, 127}
+
+
+def is_risk_control(result: Dict[str, Any]) -> bool:
+    """判断接口结果是否为风控拦截（HTTP 412 时返回的是HTML，解析失败的消息中带有412）"""
+    code = result.get('code')
+    if code in RISK_CONTROL_CODES:
+        return True
+    return code == -1 and '412' in str(result.get('message', ''))
+
+
+class Account:
+    """账号池中的一个账号"""
+
+    def __init__(self, user_id: str, cookies: Dict[str, str], user_info: Dict[str, Any]):
+        self.user_id = user_id
+        self.name = user_info.get('uname', user_id)
+        # nav接口的 vipStatus 为1表示大会员有效
+        self.is_vip = user_info.get('vipStatus') == 1
+        self.cookies = cookies
+        self.client: Optional[BilibiliClient] = None
+        # 最近一个统计窗口内的请求时间
+        self.request_times: Deque[float] = deque()
+        # 风控冷却截止时间和连续被风控次数
+        self.cooldown_until = 0.0
+        self.risk_hits = 0
+        self.total_requests = 0
+
+    def get_client(self) -> BilibiliClient:
+        if self.client is None:
+            self.client = BilibiliClient()
+            self.client.set_cookies(self.cookies)
+        return self.client
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'user_id': self.user_id,
+            'name': self.name,
+            'is_vip': self.is_vip,
+            'recent_requests': len(self.request_times),
+            'total_requests': self.total_requests,
+            'risk_hits': self.risk_hits,
+            'cooldown': max(0.0, self.cooldown_until - time.time())
+        }
+
+
+class AccountPool:
+    """多账号池
+
+    - 轮询: 请求按顺序分配给可用账号
+    - 配额: 每个账号在 window 秒内最多 quota 次请求，所有账号都用完时等待最早的名额释放
+    - 风控: 返回风控码的账号进入冷却，连续被风控时冷却时间加倍（最长 max_cooldown 秒），请求换下一个账号重试
+    - 大会员: 需要大会员画质的请求只分配给大会员账号（没有可用的大会员账号时退回普通账号），
+      其他请求优先分配给普通账号，把大会员账号的配额留给高画质任务
+
+    账号来自 CookieManager，cookie文件变化时（包括其他进程登录、删除账号）自动更新。
+    """
+
+    def __init__(self, manager: Optional[CookieManager] = None, quota: int = 60, window: float = 60.0,
+                 cooldown: float = 60.0, max_cooldown: float = 1800.0):
+        self.manager = manager or cookie_manager
+        self.quota = quota
+        self.window = window
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.accounts: Dict[str, Account] = {}
+        self._order: List[str] = []
+        self._cursor = 0
+        self._loaded = False
+        self._stale = False
+        self.manager.subscribe(self._on_cookies_changed)
+
+    def _on_cookies_changed(self, user_ids: List[str]):
+        # 可能在其他线程中调用，只做标记，下次分配账号时重新加载
+        self._stale = True
+
+    def reload(self):
+        """从 CookieManager 重新加载账号，保留已有账号的客户端和统计"""
+        self._loaded = True
+        self._stale = False
+        accounts = {}
+        for user_id, data in self.manager.get_all_users().items():
+            cookies = self.manager.get_cookies(user_id)
+            if not cookies:
+                continue
+            account = self.accounts.get(user_id)
+            if account is None or account.cookies != cookies:
+                account = Account(user_id, cookies, data.get('user_info') or {})
+            accounts[user_id] = account
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        for user_id, account in self.accounts.items():
+            if user_id not in accounts and account.client is not None and loop:
+                loop.create_task(account.client.session.aclose())
+        self.accounts = accounts
+        self._order = list(accounts)
+
+    def __len__(self) -> int:
+        if not self._loaded or self._stale:
+            self.reload()
+        return len(self.accounts)
+
+    def _has_quota(self, account: Account, now: float) -> bool:
+        while account.request_times and now - account.request_times[0] >= self.window:
+            account.request_times.popleft()
+        return len(account.request_times) < self.quota
+
+    def _pick(self, need_vip: bool, exclude: set) -> Optional[Account]:
+        """按轮询顺序选择账号，没有可用账号时返回None"""
+        now = time.time()
+        available = [
+            self.accounts[user_id] for user_id in self._order[self._cursor:] + self._order[:self._cursor]
+            if user_id not in exclude
+            and self.accounts[user_id].cooldown_until <= now
+            and self._has_quota(self.accounts[user_id], now)
+        ]
+        if not available:
+            return None
+
+        vip = [account for account in available if account.is_vip]
+        normal = [account for account in available if not account.is_vip]
+        if need_vip:
+            candidates = vip or normal
+        else:
+            candidates = normal or vip
+        account = candidates[0]
+        self._cursor = (self._order.index(account.user_id) + 1) % len(self._order)
+        return account
+
+    def _next_available_time(self, exclude: set) -> Optional[float]:
+        """最早有账号恢复可用的时间"""
+        times = []
+        for user_id, account in self.accounts.items():
+            if user_id in exclude:
+                continue
+            ready = account.cooldown_until
+            if len(account.request_times) >= self.quota:
+                ready = max(ready, account.request_times[0] + self.window)
+            times.append(ready)
+        return min(times) if times else None
+
+    async def acquire(self, need_vip: bool = False, exclude: Optional[set] = None) -> Optional[Account]:
+        """分配一个账号并计入配额，所有账号都不可用时等待，没有账号时返回None"""
+        exclude = exclude or set()
+        while True:
+            if not self._loaded or self._stale:
+                self.reload()
+            account = self._pick(need_vip, exclude)
+            if account:
+                account.request_times.append(time.time())
+                account.total_requests += 1
+                return account
+
+            ready = self._next_available_time(exclude)
+            if ready is None:
+                return None
+            await asyncio.sleep(max(0.1, ready - time.time()))
+
+    def report(self, account: Account, result: Dict[str, Any]):
+        """根据接口结果更新账号状态"""
+        if is_risk_control(result):
+            account.risk_hits += 1
+            delay = min(self.cooldown * (2 ** (account.risk_hits - 1)), self.max_cooldown)
+            account.cooldown_until = time.time() + delay
+            RISK_CONTROL.inc(account=account.user_id)
+            logger.warning("账号 %s 触发风控 (%s)，暂停使用 %.0f 秒", account.name, result.get('code'), delay)
+        elif result.get('code') == 0:
+            account.risk_hits = 0
+
+    async def call(self, method: str, *args, need_vip: bool = False, **kwargs) -> Dict[str, Any]:
+        """用池中的账号调用 BilibiliClient 的接口方法，被风控时换账号重试"""
+        tried = set()
+        result: Dict[str, Any] = {'code': -101, 'message': '没有可用的账号'}
+        while len(tried) < max(len(self), 1):
+            account = await self.acquire(need_vip, tried)
+            if account is None:
+                break
+            result = await getattr(account.get_client(), method)(*args, **kwargs)
+            self.report(account, result)
+            if not is_risk_control(result):
+                return result
+            tried.add(account.user_id)
+        return result
+
+    async def get_video_info(self, bvid: str) -> Dict[str, Any]:
+        return await self.call('get_video_info', bvid=bvid)
+
+    async def get_video_stream_url(self, bvid: str, cid: int, qn: int = 80) -> Dict[str, Any]:
+        return await self.call('get_video_stream_url', bvid=bvid, cid=cid, qn=qn, need_vip=qn in VIP_QUALITIES)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各账号的状态"""
+        if not self._loaded or self._stale:
+            self.reload()
+        now = time.time()
+        for account in self.accounts.values():
+            self._has_quota(account, now)
+        return [account.to_dict() for account in self.accounts.values()]
+
+    async def close(self):
+        for account in self.accounts.values():
+            if account.client is not None:
+                await account.client.session.aclose()
+                account.client = None
+
+
+# 全局账号池实例
+account_pool = AccountPool()
@@ -1,10 +1,11 @@
-import qrcode
 import io
 import base64
 import time
 import httpx
 from typing import Dict, Any, Optional, Tuple
 
+from .client import api_event_hooks
+
 
 class BilibiliAuth:
     """Bilibili 登录认证"""
@@ -15,7 +16,8 @@ class BilibiliAuth:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Referer': 'https://passport.bilibili.com/login'
             },
-            timeout=30.0
+            timeout=30.0,
+            event_hooks=api_event_hooks()
         )
     
     async def __aenter__(self):
@@ -37,7 +39,9 @@ class BilibiliAuth:
             qr_url = data['data']['url']
             qrcode_key = data['data']['qrcode_key']
             
-            # 生成二维码图片
+            # 生成二维码图片（qrcode依赖PIL，只在需要二维码时导入）
+            import qrcode
+            
             qr = qrcode.QRCode(
                 version=1,
                 error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -103,6 +107,7 @@ class BilibiliAuth:
                     'status': 'success',
                     'message': '登录成功',
                     'cookies': cookies,
+                    'refresh_token': data['data'].get('refresh_token', ''),
                     'url': data['data'].get('url', '')
                 }
             elif code == 86038:
@@ -129,17 +134,10 @@ class BilibiliAuth:
         }
     
     async def validate_cookies(self, cookies: Dict[str, str]) -> bool:
-        """验证cookies是否有效"""
-        try:
-            # 设置cookies
-            for key, value in cookies.items():
-                self.session.cookies.set(key, value)
-            
-            # 检查登录状态
-            response = await self.session.get('https://api.bilibili.com/x/web-interface/nav')
-            data = response.json()
-            
-            return data['code'] == 0 and data['data'].get('isLogin', False)
-            
-        except Exception:
-            return False
+        """验证cookies是否有效（检查结果有缓存，见 SessionKeeper）
+
+        无法确定时（网络错误等）抛出 SessionCheckError。
+        """
+        from .session_keeper import session_keeper
+        
+        return await session_keeper.validate(cookies) is not None
@@ -1,10 +1,126 @@
 import httpx
 import hashlib
+import os
 import time
 import urllib.parse
 from typing import Optional, Dict, Any, List
-import json
-import re
+
+from ..utils.json_backend import response_json
+from ..utils.log import get_logger
+from ..utils.metrics import API_LATENCY, API_REQUESTS
+
+logger = get_logger('client')
+
+
+# WBI混合密钥的字符重排表
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# 签名前从参数值中删除 "!'()*" 字符
+WBI_FILTER_TABLE = str.maketrans('', '', "!'()*")
+
+# urlencode 不做转义的字符
+URL_SAFE_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~')
+
+
+def get_mixin_key(img_key: str, sub_key: str) -> str:
+    """由 img_key 和 sub_key 计算WBI混合密钥"""
+    raw_wbi_key = img_key + sub_key
+    return ''.join(raw_wbi_key[i] for i in MIXIN_KEY_ENC_TAB[:32])
+
+
+def _quote(value: str) -> str:
+    # 参数大多只含字母数字，跳过 quote_plus 的逐字符处理，结果与 urlencode 相同
+    return value if URL_SAFE_CHARS.issuperset(value) else urllib.parse.quote_plus(value)
+
+
+def wbi_sign(params: Dict[str, Any], mixin_key: str) -> str:
+    """计算WBI签名 w_rid，params 中应已包含 wts"""
+    query_string = '&'.join(
+        f"{_quote(str(key))}={_quote(str(value).translate(WBI_FILTER_TABLE))}"
+        for key, value in sorted(params.items())
+    )
+    return hashlib.md5((query_string + mixin_key).encode()).hexdigest()
+
+
+# 记录指标的接口：(域名, 路径) -> 接口名，其余请求（图片、页面等）统一记为 other，避免标签数量无限增长
+API_ENDPOINTS = {
+    ('api.bilibili.com', '/x/web-interface/nav'): 'nav',
+    ('api.bilibili.com', '/x/web-interface/view'): 'view',
+    ('api.bilibili.com', '/x/player/wbi/playurl'): 'playurl',
+    ('api.bilibili.com', '/x/player/playurl'): 'playurl',
+    ('api.bilibili.com', '/x/web-interface/wbi/search/type'): 'search',
+    ('api.bilibili.com', '/x/web-interface/popular'): 'popular',
+    ('api.bilibili.com', '/x/web-interface/newlist'): 'newlist',
+    ('api.bilibili.com', '/x/web-interface/index/top/rcmd'): 'recommend',
+    ('api.bilibili.com', '/x/web-interface/wbi/index/top/feed/rcmd'): 'recommend',
+    ('api.bilibili.com', '/x/v2/reply'): 'reply',
+    ('api.bilibili.com', '/x/v2/reply/add'): 'reply_add',
+    ('api.bilibili.com', '/x/v2/reply/action'): 'reply_action',
+    ('api.bilibili.com', '/x/web-interface/archive/like'): 'like',
+    ('api.bilibili.com', '/x/web-interface/coin/add'): 'coin',
+    ('api.bilibili.com', '/x/v3/fav/resource/deal'): 'favorite',
+    ('api.bilibili.com', '/x/v3/fav/resource/ids'): 'favorite_list',
+    ('api.bilibili.com', '/x/space/acc/info'): 'space_info',
+    ('api.bilibili.com', '/x/relation/stat'): 'relation_stat',
+    ('api.bilibili.com', '/x/space/arc/search'): 'space_archives',
+    ('api.bilibili.com', '/x/polymer/web-space/seasons_archives_list'): 'season_archives',
+    ('api.bilibili.com', '/x/series/archives'): 'series_archives',
+    ('passport.bilibili.com', '/x/passport-login/web/qrcode/generate'): 'qrcode_generate',
+    ('passport.bilibili.com', '/x/passport-login/web/qrcode/poll'): 'qrcode_poll',
+    ('passport.bilibili.com', '/x/passport-login/web/cookie/info'): 'cookie_info',
+    ('passport.bilibili.com', '/x/passport-login/web/cookie/refresh'): 'cookie_refresh',
+    ('passport.bilibili.com', '/x/passport-login/web/confirm/refresh'): 'confirm_refresh',
+}
+
+
+def api_endpoint(url: httpx.URL) -> str:
+    """请求对应的接口名，不在 API_ENDPOINTS 中的请求返回 other"""
+    return API_ENDPOINTS.get((url.host, url.path), 'other')
+
+
+def api_redirect_hooks() -> Dict[str, list]:
+    """设置了环境变量 BILIBILI_API_BASE 时（如本地模拟服务器 http://127.0.0.1:8765），
+    把发往B站域名的请求改发到该地址，返回 httpx 的 event_hooks"""
+    base = os.environ.get('BILIBILI_API_BASE')
+    if not base:
+        return {}
+    target = httpx.URL(base)
+
+    async def redirect(request: httpx.Request):
+        if request.url.host.endswith('bilibili.com'):
+            request.url = request.url.copy_with(scheme=target.scheme, host=target.host, port=target.port)
+            request.headers['Host'] = target.netloc.decode()
+
+    return {'request': [redirect]}
+
+
+async def _start_timer(request: httpx.Request):
+    # 在改发到模拟服务器之前按原始域名确定接口名
+    request.extensions['bili_endpoint'] = api_endpoint(request.url)
+    request.extensions['bili_start_time'] = time.perf_counter()
+
+
+async def _record_response(response: httpx.Response):
+    request = response.request
+    endpoint = request.extensions.get('bili_endpoint', 'other')
+    start = request.extensions.get('bili_start_time')
+    if start is not None:
+        API_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+    API_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+
+
+def api_event_hooks() -> Dict[str, list]:
+    """接口请求使用的 httpx event_hooks：按接口记录耗时和状态码，并按需改发到模拟服务器"""
+    hooks = api_redirect_hooks()
+    return {
+        'request': [_start_timer] + hooks.get('request', []),
+        'response': [_record_response]
+    }
 
 
 class BilibiliClient:
@@ -16,10 +132,13 @@ class BilibiliClient:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Referer': 'https://www.bilibili.com/'
             },
-            timeout=30.0
+            timeout=30.0,
+            event_hooks=api_event_hooks()
         )
         self.cookies = {}
         self.wbi_keys = {}
+        # 由WBI密钥计算出的混合密钥，获取密钥时计算一次
+        self.mixin_key = ''
     
     async def __aenter__(self):
         return self
@@ -37,7 +156,7 @@ class BilibiliClient:
         """获取WBI签名密钥"""
         try:
             response = await self.session.get('https://api.bilibili.com/x/web-interface/nav')
-            data = response.json()
+            data = response_json(response)
             
             if data['code'] == 0 and 'wbi_img' in data['data']:
                 img_url = data['data']['wbi_img']['img_url']
@@ -47,63 +166,33 @@ class BilibiliClient:
                 sub_key = sub_url.split('/')[-1].split('.')[0]
                 
                 self.wbi_keys = {'img_key': img_key, 'sub_key': sub_key}
+                self.mixin_key = get_mixin_key(img_key, sub_key)
                 return self.wbi_keys
         except Exception as e:
-            print(f"获取WBI密钥失败: {e}")
+            logger.warning("获取WBI密钥失败: %s", e)
         
         return {}
     
     def generate_wbi_signature(self, params: Dict[str, Any]) -> str:
-        """生成WBI签名"""
-        if not self.wbi_keys:
+        """生成WBI签名，会在params中加入wts时间戳"""
+        if not self.mixin_key:
             return ""
-        
-        # 混合密钥
-        mixin_key_enc_tab = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
-        
-        img_key = self.wbi_keys.get('img_key', '')
-        sub_key = self.wbi_keys.get('sub_key', '')
-        raw_wbi_key = img_key + sub_key
-        
-        wbi_key = ''.join([raw_wbi_key[i] for i in mixin_key_enc_tab])[:32]
-        
-        # 添加时间戳
         params['wts'] = int(time.time())
-
-        # 过滤特殊字符并排序参数
-        filtered_params = {}
-        for k, v in params.items():
-            # 过滤 value 中的 "!'()*" 字符
-            str_v = str(v)
-            filtered_v = ''.join(filter(lambda chr: chr not in "!'()*", str_v))
-            filtered_params[k] = filtered_v
-
-        sorted_params = sorted(filtered_params.items())
-        query_string = urllib.parse.urlencode(sorted_params)
-
-        # 生成签名
-        sign_string = query_string + wbi_key
-        sign = hashlib.md5(sign_string.encode()).hexdigest()
-
-        print(f"WBI签名调试:")
-        print(f"  原始参数: {params}")
-        print(f"  过滤后参数: {filtered_params}")
-        print(f"  查询字符串: {query_string}")
-        print(f"  签名字符串长度: {len(sign_string)}")
-        print(f"  w_rid: {sign}")
-
-        return sign
+        return wbi_sign(params, self.mixin_key)
+    
+    def sign_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """返回加上 wts 和 w_rid 的新参数，没有WBI密钥时原样返回"""
+        if not self.mixin_key:
+            return params
+        signed = dict(params, wts=int(time.time()))
+        signed['w_rid'] = wbi_sign(signed, self.mixin_key)
+        return signed
     
     async def get_user_info(self) -> Dict[str, Any]:
         """获取用户信息"""
         try:
             response = await self.session.get('https://api.bilibili.com/x/web-interface/nav')
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
     
@@ -123,14 +212,14 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/web-interface/view',
                 params=params
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
     
     async def search_videos(self, keyword: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
         """搜索视频"""
         try:
-            print(f"搜索关键词: {keyword}, 页码: {page}")
+            logger.debug("搜索关键词: %s, 页码: %s", keyword, page)
 
             # 确保有WBI密钥
             if not self.wbi_keys:
@@ -147,10 +236,7 @@ class BilibiliClient:
             }
 
             # 生成WBI签名
-            params_copy = params.copy()
-            w_sign = self.generate_wbi_signature(params_copy)
-            params['w_rid'] = w_sign
-            params['wts'] = params_copy['wts']  # 添加时间戳
+            params = self.sign_params(params)
 
             # 设置必要的headers
             headers = {
@@ -167,32 +253,21 @@ class BilibiliClient:
                 headers=headers
             )
 
-            print(f"搜索API响应状态: {response.status_code}")
-
-            # 检查响应内容
-            response_text = response.text
-            print(f"搜索API响应内容前100字符: {response_text[:100]}")
-
-            if not response_text.strip():
-                print("搜索API返回空响应")
+            if not response.content.strip():
+                logger.warning("搜索API返回空响应, 状态码: %s", response.status_code)
                 return {'code': -1, 'message': '搜索API返回空响应', 'data': {}}
 
             try:
-                result = response.json()
-                print(f"搜索API解析成功, code: {result.get('code')}")
-
-                # 如果成功，打印结果数量
-                if result.get('code') == 0 and result.get('data', {}).get('result'):
-                    print(f"搜索到 {len(result['data']['result'])} 个结果")
-
+                result = response_json(response)
+                logger.debug("搜索API返回 code: %s, 结果数: %s", result.get('code'),
+                             len((result.get('data') or {}).get('result') or []))
                 return result
             except Exception as json_error:
-                print(f"JSON解析失败: {json_error}")
-                print(f"响应内容: {response_text}")
+                logger.warning("搜索API JSON解析失败: %s, 响应内容前100字符: %s", json_error, response.text[:100])
                 return {'code': -1, 'message': f'JSON解析失败: {json_error}', 'data': {}}
 
         except Exception as e:
-            print(f"搜索视频异常: {e}")
+            logger.warning("搜索视频异常: %s", e)
             return {'code': -1, 'message': str(e), 'data': {}}
     
     async def get_popular_videos(self, pn: int = 1, ps: int = 20) -> Dict[str, Any]:
@@ -202,7 +277,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/web-interface/popular',
                 params={'pn': pn, 'ps': ps}
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
     
@@ -223,20 +298,16 @@ class BilibiliClient:
         }
 
         try:
-            # 生成WBI签名
-            w_sign = self.generate_wbi_signature(params.copy())
-            params['w_rid'] = w_sign
-
-            # 尝试使用WBI签名的新API
+            # 尝试使用WBI签名的新API（w_rid 是对包含 wts 的参数计算的，wts 需要一起发送）
             response = await self.session.get(
                 'https://api.bilibili.com/x/player/wbi/playurl',
-                params=params
+                params=self.sign_params(params)
             )
-            result = response.json()
+            result = response_json(response)
 
             # 如果新API失败，尝试旧API
             if result.get('code') != 0:
-                print(f"WBI API失败: {result.get('message')}, 尝试旧API")
+                logger.info("WBI API失败: %s, 尝试旧API", result.get('message'))
                 # 移除WBI签名参数
                 old_params = {
                     'bvid': bvid,
@@ -251,11 +322,11 @@ class BilibiliClient:
                     'https://api.bilibili.com/x/player/playurl',
                     params=old_params
                 )
-                result = response.json()
+                result = response_json(response)
 
             return result
         except Exception as e:
-            print(f"获取视频流异常: {e}")
+            logger.warning("获取视频流异常: %s", e)
             return {'code': -1, 'message': str(e), 'data': {}}
 
     async def get_comments(self, type: int = 1, oid: int = 0, pn: int = 1, ps: int = 20, sort: int = 0) -> Dict[str, Any]:
@@ -273,7 +344,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/v2/reply',
                 params=params
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -298,7 +369,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/v2/reply/add',
                 data=data
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -319,7 +390,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/v2/reply/action',
                 data=data
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -338,7 +409,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/web-interface/archive/like',
                 data=data
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -358,7 +429,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/web-interface/coin/add',
                 data=data
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -379,7 +450,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/v3/fav/resource/deal',
                 data=data
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -390,7 +461,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/space/acc/info',
                 params={'mid': mid}
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -401,7 +472,7 @@ class BilibiliClient:
                 'https://api.bilibili.com/x/relation/stat',
                 params={'vmid': mid}
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -417,7 +488,7 @@ class BilibiliClient:
                     'order': 'pubdate'
                 }
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -432,7 +503,7 @@ class BilibiliClient:
                     'ps': ps
                 }
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -447,7 +518,7 @@ class BilibiliClient:
                     'ps': 20
                 }
             )
-            return response.json()
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
 
@@ -468,6 +539,49 @@ class BilibiliClient:
                     'ps': 12
                 }
             )
-            return response.json()
+            return response_json(response)
+        except Exception as e:
+            return {'code': -1, 'message': str(e), 'data': {}}
+
+    async def get_favorite_ids(self, media_id: int) -> Dict[str, Any]:
+        """获取收藏夹中全部内容的ID（一次返回整个收藏夹）"""
+        try:
+            response = await self.session.get(
+                'https://api.bilibili.com/x/v3/fav/resource/ids',
+                params={'media_id': media_id, 'platform': 'web'}
+            )
+            return response_json(response)
+        except Exception as e:
+            return {'code': -1, 'message': str(e), 'data': []}
+
+    async def get_season_archives(self, mid: int, season_id: int, pn: int = 1, ps: int = 100) -> Dict[str, Any]:
+        """获取合集中的视频"""
+        try:
+            response = await self.session.get(
+                'https://api.bilibili.com/x/polymer/web-space/seasons_archives_list',
+                params={
+                    'mid': mid,
+                    'season_id': season_id,
+                    'page_num': pn,
+                    'page_size': ps
+                }
+            )
+            return response_json(response)
+        except Exception as e:
+            return {'code': -1, 'message': str(e), 'data': {}}
+
+    async def get_series_archives(self, mid: int, series_id: int, pn: int = 1, ps: int = 100) -> Dict[str, Any]:
+        """获取视频列表（系列）中的视频"""
+        try:
+            response = await self.session.get(
+                'https://api.bilibili.com/x/series/archives',
+                params={
+                    'mid': mid,
+                    'series_id': series_id,
+                    'pn': pn,
+                    'ps': ps
+                }
+            )
+            return response_json(response)
         except Exception as e:
             return {'code': -1, 'message': str(e), 'data': {}}
@@ -0,0 +1,219 @@
+"""
+扫码登录会话管理 - 按 qrcode_key 管理多个同时进行的扫码登录，每个二维码只由一个后台任务轮询
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .auth import BilibiliAuth
+from .session_keeper import SessionCheckError, session_keeper
+from ..utils.cookie_manager import cookie_manager
+
+
+# 轮询结束的状态
+FINAL_STATUSES = {'success', 'expired', 'error'}
+
+
+class QRLoginSession:
+    """一次扫码登录"""
+
+    def __init__(self, qrcode_key: str, qr_image: str):
+        self.qrcode_key = qrcode_key
+        self.qr_image = qr_image
+        self.created_time = time.time()
+        self.finished_time: Optional[float] = None
+        self.status: Dict[str, Any] = {'status': 'waiting', 'message': '未扫码'}
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status['status'] in FINAL_STATUSES
+
+
+class QRLoginManager:
+    """扫码登录会话管理
+
+    - 所有会话共用一个 BilibiliAuth 连接，每个二维码由一个后台任务轮询，调用方只读取缓存的状态，
+      多个调用方查询同一个二维码不会产生额外请求
+    - 轮询间隔自适应：未扫码时从 min_interval 逐渐放宽到 max_interval，已扫码后按 min_interval 轮询，
+      尽快拿到确认结果
+    - 状态变化时通知订阅者（回调或 wait_for_change 长轮询，可用于SSE推送）
+    - 登录成功后统一获取用户信息并保存cookie
+    - 二维码过期（expire_after 秒）或结束 keep_finished 秒后移除会话
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 5.0, backoff: float = 1.5,
+                 expire_after: float = 180.0, keep_finished: float = 60.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.expire_after = expire_after
+        self.keep_finished = keep_finished
+        self.sessions: Dict[str, QRLoginSession] = {}
+        self._auth: Optional[BilibiliAuth] = None
+
+    def _get_auth(self) -> BilibiliAuth:
+        if self._auth is None:
+            self._auth = BilibiliAuth()
+        return self._auth
+
+    def evict(self):
+        """移除已结束或已过期的会话"""
+        now = time.time()
+        for key, session in list(self.sessions.items()):
+            if session.finished:
+                expired = now - session.finished_time > self.keep_finished
+            else:
+                expired = now - session.created_time > self.expire_after + self.keep_finished
+            if expired:
+                if session.task and not session.task.done():
+                    session.task.cancel()
+                del self.sessions[key]
+
+    async def create(self) -> QRLoginSession:
+        """生成二维码并开始轮询，失败时抛出异常"""
+        self.evict()
+        qr_data = await self._get_auth().login_with_qr()
+        if qr_data['status'] != 'qr_ready':
+            raise Exception(qr_data.get('message', '获取二维码失败'))
+
+        session = QRLoginSession(qr_data['qrcode_key'], qr_data['qr_image'])
+        self.sessions[session.qrcode_key] = session
+        session.task = asyncio.get_running_loop().create_task(self._poll(session))
+        return session
+
+    def get(self, qrcode_key: str) -> Optional[QRLoginSession]:
+        self.evict()
+        return self.sessions.get(qrcode_key)
+
+    def subscribe(self, qrcode_key: str, callback: Callable[[Dict[str, Any]], None]) -> Callable:
+        """订阅状态变化，回调在事件循环中调用，参数为新状态"""
+        session = self.sessions.get(qrcode_key)
+        if session:
+            session.listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, qrcode_key: str, callback: Callable):
+        session = self.sessions.get(qrcode_key)
+        if session and callback in session.listeners:
+            session.listeners.remove(callback)
+
+    async def wait_for_change(self, qrcode_key: str, last_status: Optional[str] = None,
+                              timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """长轮询：等待状态不同于 last_status 或超时，返回当前状态；会话不存在时返回None"""
+        session = self.get(qrcode_key)
+        if session is None:
+            return None
+        deadline = time.monotonic() + timeout
+        while session.status['status'] == last_status and not session.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            session.changed.clear()
+            try:
+                await asyncio.wait_for(session.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return session.status
+
+    async def wait(self, qrcode_key: str, on_status: Optional[Callable[[Dict[str, Any]], None]] = None
+                   ) -> Dict[str, Any]:
+        """等待登录结束，返回最终状态；on_status 在每次状态变化时调用"""
+        last_status = None
+        while True:
+            status = await self.wait_for_change(qrcode_key, last_status, timeout=self.expire_after)
+            if status is None:
+                return {'status': 'expired', 'message': '二维码已过期'}
+            if status['status'] != last_status and on_status:
+                on_status(status)
+            last_status = status['status']
+            if status['status'] in FINAL_STATUSES:
+                return status
+
+    def _set_status(self, session: QRLoginSession, status: Dict[str, Any]):
+        session.status = status
+        if session.finished:
+            session.finished_time = time.time()
+        session.changed.set()
+        for callback in list(session.listeners):
+            try:
+                callback(status)
+            except Exception as e:
+                print(f"扫码状态订阅者出错: {e}")
+
+    async def _save_login(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        """获取用户信息并保存cookie
+
+        nav接口暂时无法访问时，用cookie中的 DedeUserID 作为用户ID保存，用户信息留空，之后加载时再获取；
+        两者都拿不到时不保存，返回错误状态。
+        """
+        cookies = status['cookies']
+        try:
+            user_info = await session_keeper.validate(cookies, force=True)
+        except SessionCheckError as e:
+            print(f"{e}，暂不获取用户信息")
+            user_info = {}
+            user_id = cookies.get('DedeUserID')
+            if not user_id:
+                return {'status': 'error', 'message': f"登录成功但无法获取用户信息: {e}"}
+        else:
+            if user_info is None:
+                return {'status': 'error', 'message': '登录返回的cookie无效'}
+            user_id = str(user_info['mid'])
+        cookie_manager.save_cookies(user_id, cookies, user_info, status.get('refresh_token'))
+        return {**status, 'user_id': user_id, 'user_info': user_info}
+
+    async def _poll(self, session: QRLoginSession):
+        auth = self._get_auth()
+        interval = self.min_interval
+        errors = 0
+        try:
+            while time.time() - session.created_time < self.expire_after:
+                await asyncio.sleep(interval)
+                status = await auth.check_qr_status(session.qrcode_key)
+
+                if status['status'] == 'error':
+                    # 网络错误重试几次再放弃
+                    errors += 1
+                    if errors < 3:
+                        interval = self.max_interval
+                        continue
+                else:
+                    errors = 0
+
+                if status['status'] == 'success':
+                    # 共用的连接不保留登录得到的cookie
+                    auth.session.cookies.clear()
+                    status = await self._save_login(status)
+
+                if status['status'] != session.status['status'] or status['status'] in FINAL_STATUSES:
+                    self._set_status(session, status)
+                if session.finished:
+                    return
+
+                if status['status'] == 'scanned':
+                    interval = self.min_interval
+                else:
+                    interval = min(interval * self.backoff, self.max_interval)
+
+            self._set_status(session, {'status': 'expired', 'message': '二维码已过期'})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._set_status(session, {'status': 'error', 'message': str(e)})
+
+    async def close(self):
+        for session in self.sessions.values():
+            if session.task and not session.task.done():
+                session.task.cancel()
+        self.sessions.clear()
+        if self._auth is not None:
+            await self._auth.session.aclose()
+            self._auth = None
+
+
+# 全局扫码登录管理器实例
+qr_login_manager = QRLoginManager()
@@ -0,0 +1,263 @@
+"""
+登录状态维护 - 缓存cookie有效性检查结果，并在后台按B站的cookie刷新流程提前刷新即将过期的cookie
+"""
+
+import asyncio
+import binascii
+import hashlib
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .client import api_event_hooks
+from ..utils.cookie_manager import CookieManager, cookie_manager, sessdata_expires
+from ..utils.metrics import CACHE_REQUESTS
+
+
+# 生成 correspondPath 使用的公钥（RSA-OAEP, SHA-256）
+REFRESH_PUBLIC_KEY = b"""-----BEGIN PUBLIC KEY-----
+MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDLgd2OAkcGVtoE3ThUREbio0Eg
+Uc/prcajMKXvkCKFCWhJYJcLkcM2DKKcSeFpD/j6Boy538YXnR6VhcuUJOhH2x71
+nzPjfdTcqMz7djHum0qSZA0AyCBDABUqCrfNgCiJ00Ra7GmRj+YCK1NJEuewlb40
+JNrRuoEUXpabUzGB8QIDAQAB
+-----END PUBLIC KEY-----"""
+
+REFRESH_CSRF_PATTERN = re.compile(r'<div id="1-name">(.+?)</div>')
+
+
+def correspond_path(timestamp: int) -> str:
+    """生成刷新cookie时访问的 correspondPath（需要 cryptography 库）"""
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    public_key = serialization.load_pem_public_key(REFRESH_PUBLIC_KEY)
+    encrypted = public_key.encrypt(
+        f"refresh_{timestamp}".encode(),
+        padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+    )
+    return binascii.b2a_hex(encrypted).decode()
+
+
+class SessionCheckError(Exception):
+    """无法确定cookie是否有效（网络错误、风控或接口返回异常），不代表cookie已失效"""
+
+
+class SessionKeeper:
+    """登录状态维护
+
+    - 有效性缓存: 以SESSDATA为键缓存nav接口的检查结果，有效结果保留 ttl 秒，无效结果保留 invalid_ttl 秒，
+      并发检查同一个cookie时只请求一次
+    - 后台刷新: 每 check_interval 秒检查所有已保存账号，SESSDATA 在 refresh_before 秒内过期、
+      或接口提示需要刷新的账号按B站的cookie刷新流程换取新cookie，写回 CookieManager
+    """
+
+    def __init__(self, manager: Optional[CookieManager] = None, ttl: float = 600, invalid_ttl: float = 60,
+                 refresh_before: float = 3 * 24 * 3600, check_interval: float = 3600):
+        self.manager = manager or cookie_manager
+        self.ttl = ttl
+        self.invalid_ttl = invalid_ttl
+        self.refresh_before = refresh_before
+        self.check_interval = check_interval
+        # 缓存键 -> (检查时间, nav数据，无效时为None)
+        self._cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._session: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_session(self) -> httpx.AsyncClient:
+        if self._session is None:
+            self._session = httpx.AsyncClient(
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Referer': 'https://www.bilibili.com'
+                },
+                timeout=30.0,
+                event_hooks=api_event_hooks()
+            )
+        return self._session
+
+    @staticmethod
+    def _cookie_header(cookies: Dict[str, str]) -> Dict[str, str]:
+        # 共享会话不保存cookie，每个请求单独带上对应账号的cookie
+        return {'Cookie': '; '.join(f"{name}={value}" for name, value in cookies.items())}
+
+    @staticmethod
+    def _cache_key(cookies: Dict[str, str]) -> str:
+        return hashlib.sha1(cookies.get('SESSDATA', '').encode()).hexdigest()
+
+    def invalidate(self, cookies: Dict[str, str]):
+        self._cache.pop(self._cache_key(cookies), None)
+
+    async def validate(self, cookies: Dict[str, str], force: bool = False) -> Optional[Dict[str, Any]]:
+        """检查cookie是否有效，有效时返回nav接口的用户数据，确定无效时返回None
+
+        只有nav接口明确返回未登录（code为-101，或 isLogin 为false）时才视为无效；
+        网络错误、风控等无法判断的情况抛出 SessionCheckError，结果不缓存，调用方不应据此删除cookie。
+        """
+        if not cookies.get('SESSDATA'):
+            return None
+
+        key = self._cache_key(cookies)
+        cached = self._cache.get(key)
+        if cached and not force:
+            checked_time, data = cached
+            if time.time() - checked_time < (self.ttl if data is not None else self.invalid_ttl):
+                CACHE_REQUESTS.inc(cache='session_validate', result='hit')
+                return data
+
+        future = self._inflight.get(key)
+        if future is not None:
+            CACHE_REQUESTS.inc(cache='session_validate', result='inflight')
+            return await asyncio.shield(future)
+
+        CACHE_REQUESTS.inc(cache='session_validate', result='miss')
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                response = await self._get_session().get(
+                    'https://api.bilibili.com/x/web-interface/nav', headers=self._cookie_header(cookies)
+                )
+                result = response.json()
+            except Exception as e:
+                raise SessionCheckError(f"检查登录状态失败: {e}") from e
+
+            code = result.get('code')
+            login_data = result.get('data') or {}
+            if code == 0 and login_data.get('isLogin'):
+                data = login_data
+            elif code == -101 or (code == 0 and login_data.get('isLogin') is False):
+                data = None
+            else:
+                raise SessionCheckError(f"检查登录状态失败: {result.get('code')} {result.get('message', '')}")
+            self._cache[key] = (time.time(), data)
+            future.set_result(data)
+            return data
+        except (Exception, asyncio.CancelledError) as e:
+            # 同时等待的调用方收到同样的错误；检查被取消时等待方无法判断，同样视为无法确定
+            error = e if isinstance(e, SessionCheckError) else SessionCheckError(f"检查登录状态失败: {e!r}")
+            future.set_exception(error)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def needs_refresh(self, cookies: Dict[str, str]) -> bool:
+        """SESSDATA即将过期，或接口提示需要刷新"""
+        expires = sessdata_expires(cookies)
+        if expires is not None and expires - time.time() < self.refresh_before:
+            return True
+        try:
+            response = await self._get_session().get(
+                'https://passport.bilibili.com/x/passport-login/web/cookie/info',
+                params={'csrf': cookies.get('bili_jct', '')},
+                headers=self._cookie_header(cookies)
+            )
+            result = response.json()
+            return result.get('code') == 0 and bool(result.get('data', {}).get('refresh'))
+        except Exception as e:
+            print(f"检查是否需要刷新cookie失败: {e}")
+            return False
+
+    async def refresh_user(self, user_id: str) -> bool:
+        """按B站的cookie刷新流程刷新指定账号的cookie，成功后写回 CookieManager"""
+        cookies = self.manager.get_cookies(user_id)
+        refresh_token = self.manager.get_refresh_token(user_id)
+        if not cookies or not refresh_token:
+            return False
+
+        try:
+            path = correspond_path(int(time.time() * 1000))
+        except ImportError:
+            print("刷新cookie需要安装 cryptography 库")
+            return False
+
+        session = self._get_session()
+        headers = self._cookie_header(cookies)
+        try:
+            # 1. 获取 refresh_csrf
+            response = await session.get(f'https://www.bilibili.com/correspond/1/{path}', headers=headers)
+            match = REFRESH_CSRF_PATTERN.search(response.text)
+            if not match:
+                print(f"获取refresh_csrf失败: 账号 {user_id}")
+                return False
+
+            # 2. 刷新cookie，新cookie在响应的Set-Cookie中
+            response = await session.post(
+                'https://passport.bilibili.com/x/passport-login/web/cookie/refresh',
+                data={
+                    'csrf': cookies.get('bili_jct', ''),
+                    'refresh_csrf': match.group(1),
+                    'source': 'main_web',
+                    'refresh_token': refresh_token
+                },
+                headers=headers
+            )
+            result = response.json()
+            if result.get('code') != 0:
+                print(f"刷新cookie失败: {result.get('message')}")
+                return False
+            new_cookies = {**cookies, **{name: value for name, value in response.cookies.items()}}
+            # 共享会话的cookie只应来自请求头，不保留响应中设置的cookie
+            session.cookies.clear()
+            new_refresh_token = result['data']['refresh_token']
+
+            # 3. 确认刷新，旧的refresh_token随之失效
+            response = await session.post(
+                'https://passport.bilibili.com/x/passport-login/web/confirm/refresh',
+                data={'csrf': new_cookies.get('bili_jct', ''), 'refresh_token': refresh_token},
+                headers=self._cookie_header(new_cookies)
+            )
+            result = response.json()
+            if result.get('code') != 0:
+                print(f"确认刷新cookie失败: {result.get('message')}")
+        except Exception as e:
+            print(f"刷新cookie异常: {e}")
+            return False
+
+        self.invalidate(cookies)
+        self.manager.update_cookies(user_id, new_cookies, new_refresh_token)
+        print(f"已刷新账号 {user_id} 的cookie")
+        return True
+
+    async def refresh_due(self) -> int:
+        """刷新所有需要刷新的账号，返回刷新成功的数量"""
+        refreshed = 0
+        for user_id in list(self.manager.get_all_users()):
+            cookies = self.manager.get_cookies(user_id)
+            if cookies and await self.needs_refresh(cookies) and await self.refresh_user(user_id):
+                refreshed += 1
+        return refreshed
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_due()
+            except Exception as e:
+                print(f"后台刷新cookie出错: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        """在当前事件循环中启动后台刷新任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+
+# 全局登录状态维护实例
+session_keeper = SessionKeeper()
@@ -1,9 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Form, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from .api import auth, video, comment
+from .api import auth, video, comment, download
+from .bilibili.session_keeper import session_keeper
+from .utils.log import get_logger
+from .utils.metrics import metrics
+from .utils.profiler import MAX_INTERVAL, MIN_INTERVAL, profiler
+
+logger = get_logger('main')
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -25,6 +31,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api")
 app.include_router(video.router, prefix="/api")
 app.include_router(comment.router, prefix="/api")
+app.include_router(download.router, prefix="/api")
 
 # 应用启动时自动加载保存的cookies
 @app.on_event("startup")
@@ -32,6 +39,16 @@ async def startup_event():
     """应用启动事件"""
     print("正在启动Bilibili客户端...")
     auth.init_client_from_saved_cookies()
+    # BILI_PROFILE=1 时启动即开启性能分析，也可以用 SIGUSR1 或 /profile 接口开关
+    profiler.setup()
+    # 后台定期刷新即将过期的cookie，长时间运行时不会在下载中途掉登录
+    session_keeper.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭事件"""
+    await session_keeper.stop()
+    profiler.stop()
 
 # 静态文件服务
 frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
@@ -50,20 +67,16 @@ async def read_root():
 async def video_page():
     """视频播放页面"""
     video_page_path = os.path.join(frontend_path, "templates", "video.html")
-    print(f"查找视频页面: {video_page_path}")
-    print(f"文件是否存在: {os.path.exists(video_page_path)}")
-
     if os.path.exists(video_page_path):
         return FileResponse(video_page_path)
 
     # 如果路径不存在，尝试其他可能的路径
     alternative_path = os.path.join(os.getcwd(), "frontend", "templates", "video.html")
-    print(f"尝试备用路径: {alternative_path}")
-    print(f"备用路径是否存在: {os.path.exists(alternative_path)}")
-
     if os.path.exists(alternative_path):
         return FileResponse(alternative_path)
 
+    logger.warning("视频页面未找到: %s, %s", video_page_path, alternative_path)
+
     return {"message": "视频页面未找到", "error": "404", "searched_paths": [video_page_path, alternative_path]}
 
 @app.get("/health")
@@ -71,6 +84,32 @@ async def health_check():
     """健康检查"""
     return {"status": "ok", "message": "服务运行正常"}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus格式的运行指标"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/profile")
+async def profile_status():
+    """采样性能分析的状态和热点函数"""
+    return {"code": 0, "data": profiler.status()}
+
+@app.post("/profile")
+async def set_profile(enabled: bool = Form(...), interval: float = Form(0.01), include_idle: bool = Form(False)):
+    """开启或停止采样性能分析，停止时写出本次的折叠栈文件"""
+    if not MIN_INTERVAL <= interval <= MAX_INTERVAL:
+        raise HTTPException(status_code=400, detail=f"interval 必须在 {MIN_INTERVAL} 到 {MAX_INTERVAL} 秒之间")
+    if enabled:
+        profiler.start(interval=interval, include_idle=include_idle)
+    else:
+        profiler.stop()
+    return {"code": 0, "data": profiler.status()}
+
+@app.get("/profile/folded")
+async def profile_folded():
+    """当前的折叠栈文本，可直接用于生成火焰图"""
+    return PlainTextResponse(profiler.collapsed())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.main:app", host="127.0.0.1", port=8000, reload=True)
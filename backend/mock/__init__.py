@@ -0,0 +1 @@
+# Local mock Bilibili server package
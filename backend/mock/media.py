@@ -0,0 +1,86 @@
+"""
+模拟媒体数据 - 生成结构合法的fMP4分段数据，支持按任意字节范围读取而不在内存中保存整个文件
+"""
+
+import random
+import shutil
+import subprocess
+from typing import Iterator, Optional
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return (8 + len(payload)).to_bytes(4, 'big') + box_type + payload
+
+
+class SyntheticMedia:
+    """合成的fMP4数据
+
+    结构为 ftyp + moov + 重复的 (moof + mdat)，顶层box首尾相接，可以通过下载器的box结构检查；
+    mdat内容是伪随机数据，无法解码，合并时ffmpeg会报错（测试合并请使用 FileMedia）。
+    所有分片共用一个模板，大小会向上取整到分片大小的整数倍。
+    """
+
+    def __init__(self, size: int, seed: int = 0, fragment_size: int = 1024 * 1024):
+        rng = random.Random(seed)
+        self.header = (
+            _box(b'ftyp', b'iso5' + (1).to_bytes(4, 'big') + b'iso5dashavc1mp41')
+            + _box(b'moov', _box(b'mvhd', bytes(100)))
+        )
+        moof = _box(b'moof', _box(b'mfhd', bytes(4) + (1).to_bytes(4, 'big')))
+        payload_size = max(fragment_size - len(moof) - 8, 0)
+        self.fragment = memoryview(moof + _box(b'mdat', rng.randbytes(payload_size)))
+        fragments = max(1, -(-(size - len(self.header)) // len(self.fragment)))
+        self.size = len(self.header) + fragments * len(self.fragment)
+
+    def iter_range(self, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """按块返回 [start, end] 范围内的数据（包含end）"""
+        position = start
+        while position <= end:
+            if position < len(self.header):
+                data = self.header[position:min(end + 1, len(self.header))]
+            else:
+                offset = (position - len(self.header)) % len(self.fragment)
+                length = min(chunk_size, len(self.fragment) - offset, end + 1 - position)
+                data = bytes(self.fragment[offset:offset + length])
+            position += len(data)
+            yield data
+
+
+class FileMedia:
+    """从文件加载的媒体数据（例如 ffmpeg 生成的真实fMP4，可以正常合并）"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.data = memoryview(f.read())
+        self.size = len(self.data)
+
+    def iter_range(self, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        for position in range(start, end + 1, chunk_size):
+            yield bytes(self.data[position:min(position + chunk_size, end + 1)])
+
+
+def generate_real_media(path: str, kind: str, duration: int, bandwidth: int) -> Optional[str]:
+    """用ffmpeg生成可解码的分片MP4测试片段，ffmpeg不可用时返回None
+
+    kind为'video'（仅视频轨）、'audio'（仅音频轨）或'segment'（传统格式的分段，同时包含音视频轨）。
+    """
+    if not shutil.which('ffmpeg'):
+        return None
+    video = ['-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate=30:duration={duration}']
+    video_codec = ['-c:v', 'libx264', '-preset', 'ultrafast', '-b:v', str(bandwidth), '-g', '60']
+    if kind == 'video':
+        source = video + video_codec
+    elif kind == 'segment':
+        source = video + ['-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}'] + video_codec + [
+            '-c:a', 'aac', '-b:a', '128000']
+    else:
+        source = ['-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                  '-c:a', 'aac', '-b:a', str(bandwidth)]
+    command = ['ffmpeg', '-y', '-loglevel', 'error', *source,
+               '-movflags', 'frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4', path]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+        return path
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"生成测试片段失败: {e}")
+        return None
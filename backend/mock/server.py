@@ -0,0 +1,487 @@
+"""
+本地模拟B站服务器 - 实现 BilibiliClient 用到的主要接口，并提供支持Range请求的模拟m4s文件，
+可以注入延迟、限速、错误和412风控，用于离线压测和调试
+
+启动: python -m backend.mock.server --port 8765 --throughput 20M --latency 0.05
+然后设置环境变量 BILIBILI_API_BASE=http://127.0.0.1:8765，客户端对B站域名的请求会改发到模拟服务器。
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+
+from ..utils.link_importer import av_to_bv, bv_to_av
+from .media import FileMedia, SyntheticMedia, generate_real_media
+
+
+# (画质ID, 说明, 宽, 高, AVC码率bps)，HEVC码率按AVC的70%计算
+VIDEO_QUALITIES = [
+    (120, '4K 超清', 3840, 2160, 12_000_000),
+    (116, '1080P 60帧', 1920, 1080, 6_000_000),
+    (112, '1080P 高码率', 1920, 1080, 5_000_000),
+    (80, '1080P 高清', 1920, 1080, 2_500_000),
+    (64, '720P 高清', 1280, 720, 1_200_000),
+    (32, '480P 清晰', 852, 480, 600_000),
+    (16, '360P 流畅', 640, 360, 300_000),
+]
+VIP_ONLY = {112, 116, 120}
+
+# (音频ID, 码率bps)
+AUDIO_QUALITIES = [(30280, 192_000), (30232, 132_000), (30216, 64_000)]
+
+# 编码: (codecid, codecs, 码率系数)
+CODECS = {'avc': (7, 'avc1.640032', 1.0), 'hevc': (12, 'hev1.1.6.L150.90', 0.7)}
+
+# 传统格式（durl）视频的分段数
+DURL_SEGMENTS = 4
+
+# 与线上接口格式一致的WBI图片地址，文件名即为密钥
+WBI_IMG_URL = 'https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png'
+WBI_SUB_URL = 'https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png'
+
+
+def parse_size(value: str) -> int:
+    """解析 20M、512K 这样的大小或速率，单位为字节"""
+    value = value.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value or 0))
+
+
+class MockConfig:
+    """模拟服务器配置
+
+    - throughput / total_throughput: 单个连接和所有连接合计的下载速率上限 (字节/秒)，0为不限
+    - latency: 每个请求在响应前等待的秒数
+    - error_rate: 请求失败的概率（接口返回 code -500，媒体文件返回HTTP 503）
+    - drop_rate: 媒体文件传输到一半时断开连接的概率（模拟丢包/连接中断）
+    - risk_rate: 返回HTTP 412风控页面的概率
+    - duration: 视频时长（秒），决定模拟媒体文件的大小
+    - pages: 每个视频的分P数量
+    - vip: 当前账号是否为大会员，非大会员时不返回大会员画质
+    - url_ttl: 播放地址的有效期（秒），写入地址的 deadline 参数
+    - qr_polls: 模拟扫码登录时，第几次轮询返回"已扫码"，再下一次返回登录成功
+    - chunk_size: 媒体文件响应每次发送的数据块大小
+    - real_media: 用ffmpeg生成可解码的测试片段（需要安装ffmpeg），否则使用无法解码的合成数据
+    """
+
+    def __init__(self, throughput: int = 0, total_throughput: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, drop_rate: float = 0.0, risk_rate: float = 0.0, duration: int = 60,
+                 pages: int = 1, vip: bool = True, url_ttl: int = 7200, qr_polls: int = 2,
+                 chunk_size: int = 64 * 1024, real_media: bool = False, seed: int = 0):
+        self.throughput = throughput
+        self.total_throughput = total_throughput
+        self.latency = latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.risk_rate = risk_rate
+        self.duration = duration
+        self.pages = pages
+        self.vip = vip
+        self.url_ttl = url_ttl
+        self.qr_polls = qr_polls
+        self.chunk_size = chunk_size
+        self.real_media = real_media
+        self.seed = seed
+
+
+class TokenBucket:
+    """令牌桶限速，多个连接共用时按请求顺序排队"""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self._allowance = float(rate)
+        self._last = time.monotonic()
+
+    async def consume(self, amount: int):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self._allowance = min(float(self.rate), self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        # 先预留再等待，余额为负时等到补足为止
+        self._allowance -= amount
+        if self._allowance < 0:
+            await asyncio.sleep(-self._allowance / self.rate)
+
+
+def video_ids(bvid: str) -> Tuple[int, int]:
+    """BV号对应的 (aid, 第1P的cid)，非法BV号按CRC32生成"""
+    try:
+        aid = bv_to_av(bvid)
+    except (ValueError, IndexError):
+        aid = zlib.crc32(bvid.encode()) & 0x7fffffff
+    return aid, aid * 10 + 1
+
+
+def ok(data: Any) -> Dict[str, Any]:
+    return {'code': 0, 'message': '0', 'ttl': 1, 'data': data}
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """创建模拟服务器应用"""
+    config = config or MockConfig()
+    app = FastAPI(title="Bilibili 模拟服务器")
+    app.state.config = config
+    app.state.stats = {'requests': 0, 'bytes_sent': 0, 'errors': 0, 'risk_control': 0, 'dropped': 0}
+    total_bucket = TokenBucket(config.total_throughput)
+    rng = random.Random(config.seed)
+    media_cache: Dict[Tuple[str, int], Any] = {}
+    # 正在用ffmpeg生成的片段，同一片段只生成一次
+    media_pending: Dict[Tuple[str, int], asyncio.Future] = {}
+    qr_sessions: Dict[str, int] = {}
+    media_dir = tempfile.mkdtemp(prefix="bili_mock_") if config.real_media else None
+
+    def load_media(kind: str, bandwidth: int):
+        path = None
+        if media_dir:
+            duration, bitrate = config.duration, bandwidth
+            if kind == 'segment':
+                # 分段地址中的码率按整个视频时长折算，实际生成单个分段的时长
+                duration, bitrate = max(1, config.duration // DURL_SEGMENTS), bandwidth * DURL_SEGMENTS
+            path = generate_real_media(os.path.join(media_dir, f"{kind}_{bandwidth}.mp4"), kind, duration, bitrate)
+        if path:
+            return FileMedia(path)
+        return SyntheticMedia(bandwidth // 8 * config.duration, seed=config.seed + bandwidth)
+
+    async def get_media(kind: str, bandwidth: int):
+        key = (kind, bandwidth)
+        media = media_cache.get(key)
+        if media is None:
+            if not media_dir:
+                media = media_cache[key] = load_media(kind, bandwidth)
+                return media
+            # ffmpeg生成片段需要数秒，放到线程池中，不阻塞其他请求
+            future = media_pending.get(key)
+            if future is None:
+                future = media_pending[key] = asyncio.get_running_loop().run_in_executor(
+                    None, load_media, kind, bandwidth)
+            media = media_cache[key] = await future
+            media_pending.pop(key, None)
+        return media
+
+    def media_variants():
+        """playurl 可能返回的所有媒体片段 (类型, 码率)"""
+        qualities = [q for q in VIDEO_QUALITIES if config.vip or q[0] not in VIP_ONLY]
+        variants = {('video', int(q[4] * factor)) for q in qualities for _, _, factor in CODECS.values()}
+        variants.update(('audio', bandwidth) for _, bandwidth in AUDIO_QUALITIES)
+        variants.update(('segment', q[4] // DURL_SEGMENTS) for q in qualities)
+        return sorted(variants)
+
+    @app.on_event("startup")
+    async def prepare_media():
+        """使用真实媒体时在启动时生成所有片段，避免首次请求时生成影响测得的吞吐量"""
+        if media_dir:
+            variants = media_variants()
+            print(f"正在生成 {len(variants)} 个测试片段...")
+            await asyncio.gather(*(get_media(kind, bandwidth) for kind, bandwidth in variants))
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        """注入延迟、错误和412风控"""
+        stats = app.state.stats
+        stats['requests'] += 1
+        if request.url.path.startswith('/mock/'):
+            return await call_next(request)
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        roll = rng.random()
+        if roll < config.risk_rate:
+            stats['risk_control'] += 1
+            return HTMLResponse("<html><body>412 Precondition Failed</body></html>", status_code=412)
+        if roll < config.risk_rate + config.error_rate:
+            stats['errors'] += 1
+            if request.url.path.startswith('/upos/'):
+                return Response(status_code=503)
+            return JSONResponse({'code': -500, 'message': '服务器错误', 'ttl': 1})
+        return await call_next(request)
+
+    def base_url(request: Request) -> str:
+        return str(request.base_url)
+
+    def video_data(request: Request, bvid: str) -> Dict[str, Any]:
+        aid, cid = video_ids(bvid)
+        pages = [
+            {'cid': aid * 10 + page, 'page': page, 'part': f"第{page}部分", 'duration': config.duration}
+            for page in range(1, config.pages + 1)
+        ]
+        return {
+            'bvid': bvid,
+            'aid': aid,
+            'cid': cid,
+            'title': f"模拟视频 {bvid}",
+            'desc': "本地模拟服务器生成的视频",
+            'pic': f"{base_url(request)}cover/{bvid}.jpg",
+            'duration': config.duration,
+            'pubdate': 1700000000,
+            'owner': {'mid': aid % 100000, 'name': f"UP主{aid % 100}", 'face': ''},
+            'stat': {'view': aid % 1000000, 'danmaku': aid % 1000, 'reply': 20, 'like': aid % 10000,
+                     'coin': 0, 'favorite': 0, 'share': 0},
+            'pages': pages,
+        }
+
+    def archive(request: Request, aid: int) -> Dict[str, Any]:
+        bvid = av_to_bv(aid)
+        data = video_data(request, bvid)
+        return {
+            'aid': aid, 'bvid': bvid, 'title': data['title'], 'pic': data['pic'],
+            'duration': config.duration, 'owner': data['owner'], 'stat': data['stat'], 'pubdate': data['pubdate']
+        }
+
+    @app.get("/x/web-interface/nav")
+    async def nav(request: Request):
+        logged_in = bool(request.cookies.get('SESSDATA'))
+        data = {
+            'isLogin': logged_in,
+            'wbi_img': {'img_url': WBI_IMG_URL, 'sub_url': WBI_SUB_URL},
+        }
+        if logged_in:
+            data.update({'mid': 1, 'uname': 'mock_user', 'face': '', 'vipStatus': 1 if config.vip else 0,
+                         'vipType': 2 if config.vip else 0})
+        # 未登录时线上接口同样返回 -101，但仍带有 wbi_img
+        return {'code': 0 if logged_in else -101, 'message': '0' if logged_in else '账号未登录', 'data': data}
+
+    @app.get("/x/web-interface/view")
+    async def view(request: Request, bvid: Optional[str] = None, aid: Optional[int] = None):
+        if not bvid and not aid:
+            return {'code': -400, 'message': '请求错误'}
+        return ok(video_data(request, bvid or av_to_bv(aid)))
+
+    async def playurl(request: Request, bvid: str, cid: int, qn: int = 80, fnval: int = 16):
+        qualities = [q for q in VIDEO_QUALITIES if config.vip or q[0] not in VIP_ONLY]
+        accept = [q[0] for q in qualities]
+        deadline = int(time.time()) + config.url_ttl
+        base = base_url(request)
+
+        if not fnval & 16:
+            # 传统格式：按请求画质返回分段地址
+            quality = next((q for q in qualities if q[0] <= qn), qualities[-1])
+            size = quality[4] // 8 * config.duration
+            segment_bandwidth = quality[4] // DURL_SEGMENTS
+            segment_size = (await get_media('segment', segment_bandwidth)).size
+            durl = [{
+                'order': index + 1,
+                'length': config.duration * 1000 // DURL_SEGMENTS,
+                'size': segment_size,
+                'url': f"{base}upos/durl/{bvid}/{cid}/{quality[0]}-{index}.flv?deadline={deadline}&bw={segment_bandwidth}",
+                'backup_url': []
+            } for index in range(DURL_SEGMENTS)]
+            return ok({'quality': quality[0], 'format': 'flv', 'timelength': config.duration * 1000,
+                       'accept_quality': accept, 'accept_description': [q[1] for q in qualities],
+                       'durl': durl, 'size': size})
+
+        videos = []
+        for quality_id, _, width, height, bandwidth in qualities:
+            if quality_id > qn and quality_id != qualities[-1][0]:
+                continue
+            for codec, (codecid, codecs, factor) in CODECS.items():
+                stream_bandwidth = int(bandwidth * factor)
+                url = f"{base}upos/{bvid}/{cid}/{quality_id}-{codec}.m4s?deadline={deadline}&bw={stream_bandwidth}&kind=video"
+                videos.append({
+                    'id': quality_id, 'baseUrl': url, 'base_url': url, 'backupUrl': [], 'backup_url': [],
+                    'bandwidth': stream_bandwidth, 'mimeType': 'video/mp4', 'mime_type': 'video/mp4',
+                    'codecs': codecs, 'codecid': codecid, 'width': width, 'height': height,
+                    'frameRate': '30', 'frame_rate': '30',
+                    'segment_base': {'initialization': '0-999', 'index_range': '1000-1999'}
+                })
+        audios = []
+        for audio_id, bandwidth in AUDIO_QUALITIES:
+            url = f"{base}upos/{bvid}/{cid}/{audio_id}.m4s?deadline={deadline}&bw={bandwidth}&kind=audio"
+            audios.append({
+                'id': audio_id, 'baseUrl': url, 'base_url': url, 'backupUrl': [], 'backup_url': [],
+                'bandwidth': bandwidth, 'mimeType': 'audio/mp4', 'mime_type': 'audio/mp4',
+                'codecs': 'mp4a.40.2', 'codecid': 0
+            })
+        return ok({
+            'quality': min(qn, qualities[0][0]), 'format': 'mp4', 'timelength': config.duration * 1000,
+            'accept_quality': accept, 'accept_description': [q[1] for q in qualities],
+            'dash': {'duration': config.duration, 'video': videos, 'audio': audios, 'dolby': None, 'flac': None}
+        })
+
+    @app.get("/x/player/wbi/playurl")
+    async def playurl_wbi(request: Request, bvid: str, cid: int, qn: int = 80, fnval: int = 16):
+        return await playurl(request, bvid, cid, qn, fnval)
+
+    @app.get("/x/player/playurl")
+    async def playurl_legacy(request: Request, bvid: str, cid: int, qn: int = 80, fnval: int = 16):
+        return await playurl(request, bvid, cid, qn, fnval)
+
+    @app.get("/x/web-interface/popular")
+    async def popular(request: Request, pn: int = 1, ps: int = 20):
+        start = 100000 + (pn - 1) * ps
+        return ok({'list': [archive(request, aid) for aid in range(start, start + ps)], 'no_more': False})
+
+    @app.get("/x/web-interface/wbi/search/type")
+    async def search(request: Request, keyword: str = '', page: int = 1):
+        seed = zlib.crc32(keyword.encode()) % 100000
+        results = []
+        for index in range(20):
+            item = archive(request, 200000 + seed + (page - 1) * 20 + index)
+            results.append({
+                'type': 'video', 'aid': item['aid'], 'bvid': item['bvid'],
+                'title': f'<em class="keyword">{keyword}</em> {item["title"]}',
+                'pic': item['pic'], 'author': item['owner']['name'], 'mid': item['owner']['mid'],
+                'play': item['stat']['view'], 'duration': f"{config.duration // 60}:{config.duration % 60:02d}"
+            })
+        return ok({'page': page, 'pagesize': 20, 'numResults': 1000, 'numPages': 50, 'result': results})
+
+    @app.get("/x/space/arc/search")
+    async def space_videos(request: Request, mid: int, pn: int = 1, ps: int = 10):
+        total = 95
+        start = (pn - 1) * ps
+        vlist = []
+        for index in range(start, min(start + ps, total)):
+            item = archive(request, mid * 1000 + index + 1)
+            vlist.append({'aid': item['aid'], 'bvid': item['bvid'], 'title': item['title'], 'pic': item['pic'],
+                          'play': item['stat']['view'], 'length': f"{config.duration // 60}:{config.duration % 60:02d}",
+                          'created': item['pubdate'], 'author': item['owner']['name'], 'mid': mid})
+        return ok({'list': {'vlist': vlist}, 'page': {'pn': pn, 'ps': ps, 'count': total}})
+
+    @app.get("/x/v2/reply")
+    async def replies(oid: int = 0, pn: int = 1, ps: int = 20):
+        total = 100
+        start = (pn - 1) * ps
+        items = [{
+            'rpid': oid * 1000 + index, 'oid': oid, 'ctime': 1700000000 + index, 'like': index,
+            'member': {'mid': str(index), 'uname': f"用户{index}", 'avatar': ''},
+            'content': {'message': f"模拟评论 #{index + 1}"}, 'replies': []
+        } for index in range(start, min(start + ps, total))]
+        return ok({'page': {'num': pn, 'size': ps, 'count': total, 'acount': total}, 'replies': items})
+
+    @app.get("/x/passport-login/web/qrcode/generate")
+    async def qrcode_generate(request: Request):
+        key = uuid.uuid4().hex
+        qr_sessions[key] = 0
+        return ok({'url': f"{base_url(request)}qrcode/{key}", 'qrcode_key': key})
+
+    @app.get("/x/passport-login/web/qrcode/poll")
+    async def qrcode_poll(qrcode_key: str):
+        if qrcode_key not in qr_sessions:
+            return ok({'code': 86038, 'message': '二维码已失效', 'url': '', 'refresh_token': ''})
+        qr_sessions[qrcode_key] += 1
+        polls = qr_sessions[qrcode_key]
+        if polls < config.qr_polls:
+            return ok({'code': 86101, 'message': '未扫码', 'url': '', 'refresh_token': ''})
+        if polls == config.qr_polls:
+            return ok({'code': 86090, 'message': '二维码已扫码未确认', 'url': '', 'refresh_token': ''})
+
+        del qr_sessions[qrcode_key]
+        expires = int(time.time()) + 180 * 24 * 3600
+        response = JSONResponse(ok({'code': 0, 'message': '', 'url': '', 'refresh_token': uuid.uuid4().hex}))
+        for name, value in (('SESSDATA', f"{uuid.uuid4().hex[:8]}%2C{expires}%2Cmock%2A11"),
+                            ('bili_jct', uuid.uuid4().hex), ('DedeUserID', '1')):
+            response.set_cookie(name, value, max_age=180 * 24 * 3600)
+        return response
+
+    def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+        """解析单个Range，无效时返回None"""
+        if not header or not header.startswith('bytes='):
+            return None
+        start_text, _, end_text = header[6:].split(',')[0].strip().partition('-')
+        if not start_text:
+            # bytes=-N 表示最后N个字节
+            length = int(end_text)
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if start >= size or end < start:
+            return None
+        return start, min(end, size - 1)
+
+    async def serve_media(request: Request, media):
+        headers = {'Accept-Ranges': 'bytes', 'Content-Type': 'video/mp4'}
+        range_header = request.headers.get('range')
+        byte_range = parse_range(range_header, media.size)
+        if range_header and byte_range is None:
+            return Response(status_code=416, headers={'Content-Range': f"bytes */{media.size}"})
+        start, end = byte_range or (0, media.size - 1)
+        headers['Content-Length'] = str(end - start + 1)
+        status_code = 200
+        if byte_range:
+            status_code = 206
+            headers['Content-Range'] = f"bytes {start}-{end}/{media.size}"
+        if request.method == 'HEAD':
+            return Response(status_code=status_code, headers=headers)
+
+        connection_bucket = TokenBucket(config.throughput)
+        # 需要中断的连接在随机位置停止发送，响应长度与Content-Length不符，服务器随即关闭连接
+        drop_at = None
+        if rng.random() < config.drop_rate:
+            drop_at = rng.randint(start, max(start, end - 1))
+            app.state.stats['dropped'] += 1
+
+        async def body():
+            for chunk in media.iter_range(start, end if drop_at is None else drop_at, config.chunk_size):
+                await connection_bucket.consume(len(chunk))
+                await total_bucket.consume(len(chunk))
+                app.state.stats['bytes_sent'] += len(chunk)
+                yield chunk
+
+        return StreamingResponse(body(), status_code=status_code, headers=headers)
+
+    def check_deadline(deadline: int) -> Optional[Response]:
+        if deadline and deadline < time.time():
+            return Response("地址已过期", status_code=403)
+        return None
+
+    @app.api_route("/upos/durl/{bvid}/{cid}/{name}", methods=["GET", "HEAD"])
+    async def durl_media(request: Request, bvid: str, cid: int, name: str, bw: int = 300_000, deadline: int = 0):
+        return check_deadline(deadline) or await serve_media(request, await get_media('segment', bw))
+
+    @app.api_route("/upos/{bvid}/{cid}/{name}", methods=["GET", "HEAD"])
+    async def dash_media(request: Request, bvid: str, cid: int, name: str, bw: int = 600_000,
+                         kind: str = 'video', deadline: int = 0):
+        return check_deadline(deadline) or await serve_media(request, await get_media(kind, bw))
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        """模拟服务器的请求统计（不受延迟和错误注入影响）"""
+        return ok(app.state.stats)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟B站服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--throughput", default="0", help="单连接速率上限，例如 20M (字节/秒，0为不限)")
+    parser.add_argument("--total-throughput", default="0", help="所有连接合计速率上限")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟 (秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="请求失败概率 (0-1)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="媒体传输中途断开的概率 (0-1)")
+    parser.add_argument("--chunk-size", default="64K", help="媒体响应的数据块大小")
+    parser.add_argument("--risk-rate", type=float, default=0.0, help="返回412风控的概率 (0-1)")
+    parser.add_argument("--duration", type=int, default=60, help="视频时长 (秒)")
+    parser.add_argument("--pages", type=int, default=1, help="每个视频的分P数量")
+    parser.add_argument("--no-vip", action="store_true", help="模拟非大会员账号")
+    parser.add_argument("--url-ttl", type=int, default=7200, help="播放地址有效期 (秒)")
+    parser.add_argument("--real-media", action="store_true", help="用ffmpeg生成可解码的测试片段")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        throughput=parse_size(args.throughput), total_throughput=parse_size(args.total_throughput),
+        latency=args.latency, error_rate=args.error_rate, drop_rate=args.drop_rate, risk_rate=args.risk_rate,
+        duration=args.duration, pages=args.pages, vip=not args.no_vip, url_ttl=args.url_ttl,
+        chunk_size=parse_size(args.chunk_size), real_media=args.real_media, seed=args.seed
+    )
+
+    import uvicorn
+    print(f"模拟服务器: http://{args.host}:{args.port}")
+    print(f"客户端设置环境变量 BILIBILI_API_BASE=http://{args.host}:{args.port} 即可连接")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
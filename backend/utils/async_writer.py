@@ -0,0 +1,239 @@
+"""
+后台写入器 - 将下载数据合并成大块缓冲区，由独立线程写入磁盘，避免阻塞事件循环
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from .disk_space import preallocate
+
+
+# 缓冲区大小按4KiB对齐，保证除最后一块外的写入偏移都是对齐的
+ALIGNMENT = 4096
+
+
+class AdaptiveBufferSizer:
+    """根据实际吞吐量调整缓冲区大小
+
+    目标是每 target_interval 秒提交一个缓冲区：低速时用小缓冲区让数据和进度及时落地，
+    高速时用大缓冲区减少每GB的提交、进度计算和写入系统调用次数。
+    """
+
+    def __init__(self, min_size: int = 256 * 1024, max_size: int = 8 * 1024 * 1024, target_interval: float = 0.25):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_interval = target_interval
+        self.size = min_size
+        self._last_time = time.monotonic()
+        self._last_bytes = 0
+
+    def update(self, total_bytes: int) -> int:
+        """根据累计字节数更新并返回建议的缓冲区大小"""
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return self.size
+
+        throughput = (total_bytes - self._last_bytes) / elapsed
+        self._last_time = now
+        self._last_bytes = total_bytes
+
+        # 按2的幂调整，避免缓冲区大小来回抖动
+        target = throughput * self.target_interval
+        size = self.min_size
+        while size < target and size < self.max_size:
+            size *= 2
+        self.size = size
+        return size
+
+
+class BufferedFileWriter:
+    """后台缓冲写入器
+
+    网络协程调用 write() 只会把数据复制进缓冲池中的缓冲区，缓冲区写满后交给写入线程。
+    缓冲池用尽时 write() 会异步等待写入线程归还缓冲区（背压），不会阻塞事件循环。
+    指定 verifier 时，校验和在写入线程中与写盘一同计算，不占用事件循环也不需要重读文件。
+    buffer_size 可在写入过程中调整，之后取出的缓冲区若小于新大小会被重新分配。
+
+    用法:
+        async with BufferedFileWriter(filename, preallocate_size=total_size) as writer:
+            async for chunk in response.aiter_bytes():
+                await writer.write(chunk)
+    """
+
+    def __init__(self, filename: str, buffer_size: int = 4 * 1024 * 1024, pool_size: int = 4,
+                 fsync: bool = False, preallocate_size: int = 0, verifier=None):
+        self.filename = filename
+        self.buffer_size = max(ALIGNMENT, buffer_size - buffer_size % ALIGNMENT)
+        self.fsync = fsync
+        self.preallocate_size = preallocate_size
+        # 可选的流式校验器（如 StreamVerifier），在写入线程中随每个缓冲区更新
+        self.verifier = verifier
+        self.bytes_written = 0
+
+        # 空闲缓冲区池，数量固定，同时决定了排队等待写入的数据上限
+        self._free_buffers: "queue.Queue[bytearray]" = queue.Queue()
+        for _ in range(max(2, pool_size)):
+            self._free_buffers.put(bytearray(self.buffer_size))
+        # 待写入队列，元素为 (缓冲区, 有效长度)，None表示结束
+        self._pending: "queue.Queue[Optional[tuple]]" = queue.Queue()
+
+        self._current: Optional[bytearray] = None
+        self._current_length = 0
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buffer_returned: Optional[asyncio.Event] = None
+        self._finished: Optional[asyncio.Future] = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        """启动写入线程"""
+        self._loop = asyncio.get_running_loop()
+        self._buffer_returned = asyncio.Event()
+        self._finished = self._loop.create_future()
+        self._thread = threading.Thread(target=self._writer_loop, name=f"writer-{os.path.basename(self.filename)}", daemon=True)
+        self._thread.start()
+
+    def _notify(self, callback, *args):
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    def _set_finished(self):
+        if not self._finished.done():
+            self._finished.set_result(None)
+
+    def _writer_loop(self):
+        """写入线程：打开文件，依次写入缓冲区并归还到缓冲池"""
+        f = None
+        try:
+            f = open(self.filename, 'wb')
+            preallocate(f, self.preallocate_size)
+
+            while True:
+                item = self._pending.get()
+                if item is None:
+                    break
+
+                buffer, length = item
+                if self._error is None:
+                    try:
+                        data = memoryview(buffer)[:length]
+                        f.write(data)
+                        if self.verifier is not None:
+                            self.verifier.update(data)
+                    except BaseException as e:
+                        self._error = e
+                self._free_buffers.put(buffer)
+                self._notify(self._buffer_returned.set)
+
+            if self._error is None:
+                # 截掉预分配但未写入的部分
+                f.truncate(self.bytes_written)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        except BaseException as e:
+            self._error = self._error or e
+            # 打开文件失败时继续消费队列，避免网络协程一直等待缓冲区
+            self._drain()
+        finally:
+            if f:
+                try:
+                    f.close()
+                except BaseException as e:
+                    self._error = self._error or e
+            self._notify(self._buffer_returned.set)
+            self._notify(self._set_finished)
+
+    def _drain(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            self._free_buffers.put(item[0])
+            self._notify(self._buffer_returned.set)
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+
+    async def _acquire_buffer(self) -> bytearray:
+        while True:
+            self._raise_if_failed()
+            try:
+                buffer = self._free_buffers.get_nowait()
+                if len(buffer) < self.buffer_size:
+                    buffer = bytearray(self.buffer_size)
+                return buffer
+            except queue.Empty:
+                self._buffer_returned.clear()
+                # 清除事件后再检查一次，避免错过写入线程刚归还的缓冲区
+                if self._free_buffers.empty():
+                    await self._buffer_returned.wait()
+
+    def _submit_current(self):
+        if self._current is not None and self._current_length:
+            self._pending.put((self._current, self._current_length))
+            self._current = None
+            self._current_length = 0
+
+    async def write(self, data) -> bool:
+        """写入数据（复制到缓冲区，写满后交给写入线程）
+
+        返回本次调用是否提交了缓冲区，调用方可据此按缓冲区而不是按数据块统计进度。
+        """
+        size = len(data)
+        current = self._current
+        # 快速路径：数据能完整放入当前缓冲区，只做一次切片复制
+        if current is not None and self._current_length + size < len(current):
+            current[self._current_length:self._current_length + size] = data
+            self._current_length += size
+            self.bytes_written += size
+            return False
+
+        submitted = False
+        view = memoryview(data)
+        while view:
+            if self._current is None:
+                self._current = await self._acquire_buffer()
+
+            capacity = len(self._current)
+            size = min(capacity - self._current_length, len(view))
+            self._current[self._current_length:self._current_length + size] = view[:size]
+            self._current_length += size
+            self.bytes_written += size
+            view = view[size:]
+
+            if self._current_length == capacity:
+                self._submit_current()
+                submitted = True
+        return submitted
+
+    async def close(self):
+        """提交剩余数据并等待写入线程结束"""
+        if self._thread is None:
+            return
+
+        self._submit_current()
+        if self._current is not None:
+            self._free_buffers.put(self._current)
+            self._current = None
+        self._pending.put(None)
+
+        await self._finished
+        self._thread = None
+        self._raise_if_failed()
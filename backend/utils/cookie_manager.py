@@ -4,93 +4,274 @@ Cookie管理器 - 用于持久化保存和加载用户cookies
 
 import json
 import os
+import threading
+import urllib.parse
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import time
 
+from .file_lock import FileLock
+
+
+# 无法从SESSDATA得到过期时间时使用的有效期
+DEFAULT_EXPIRES = 30 * 24 * 3600
+
+
+def sessdata_expires(cookies: Dict[str, str]) -> Optional[int]:
+    """从SESSDATA中取出过期时间（unix时间戳），SESSDATA经URL编码，格式为 "哈希,过期时间,..." """
+    sessdata = urllib.parse.unquote(cookies.get('SESSDATA', ''))
+    parts = sessdata.split(',')
+    if len(parts) > 1 and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
 
 class CookieManager:
-    """Cookie管理器"""
-    
+    """Cookie管理器
+
+    cookie文件在第一次使用时才读取，导入模块和创建实例不会访问磁盘。
+
+    GUI、TUI和后端服务可能同时使用同一个cookie文件：
+    - 每次修改都在跨进程文件锁内重新读取文件、修改、写临时文件后原子替换，不会覆盖其他进程的修改
+    - 读取前比较文件的修改时间和大小，其他进程修改过时自动重新加载（只需一次stat）
+    - subscribe() 注册的回调在数据变化时收到变化的用户ID列表，包括其他进程造成的变化
+    """
+
     def __init__(self, cookie_file: str = "user_cookies.json"):
         self.cookie_file = Path(cookie_file)
         self.cookies_data = {}
-        self.load_cookies()
-    
-    def save_cookies(self, user_id: str, cookies: Dict[str, str], user_info: Optional[Dict] = None) -> bool:
-        """保存用户cookies"""
+        self._loaded = False
+        # 已加载数据对应的文件状态 (修改时间, 大小)，文件不存在时为None
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(f"{self.cookie_file}.lock")
+        # 订阅者列表只整体替换，通知时无需加锁
+        self._subscribers: tuple = ()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
         try:
-            self.cookies_data[user_id] = {
+            stat = os.stat(self.cookie_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> Dict[str, Dict]:
+        """读取cookie文件，同时记录文件状态"""
+        stamp = self._stamp()
+        if stamp is None:
+            self._file_stamp = None
+            return {}
+        with open(self.cookie_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._file_stamp = stamp
+        return data
+
+    def _write_file(self, data: Dict[str, Dict]):
+        # 先写临时文件再替换，其他进程不会读到写了一半的文件
+        temp_file = f"{self.cookie_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_file, self.cookie_file)
+        self._file_stamp = self._stamp()
+
+    def _replace_data(self, data: Dict[str, Dict]) -> List[str]:
+        """替换内存中的数据，返回变化的用户ID"""
+        old = self.cookies_data
+        changed = [user_id for user_id in set(old) | set(data) if old.get(user_id) != data.get(user_id)]
+        self.cookies_data = data
+        return changed
+
+    def _notify(self, changed: List[str]):
+        if not changed:
+            return
+        for callback in self._subscribers:
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"cookie变化订阅者出错: {e}")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load_cookies()
+        else:
+            self.refresh()
+
+    def _update(self, mutate: Callable[[Dict[str, Dict]], bool]) -> bool:
+        """在文件锁内读取最新数据并修改，mutate 返回True时写回文件
+
+        文件无法读取时抛出OSError，不写入；文件内容损坏时先改名为 .corrupt-<时间戳> 保留，再写入新文件。
+        """
+        with self._lock, self._file_lock:
+            try:
+                data = self._read_file()
+            except ValueError as e:
+                backup_file = f"{self.cookie_file}.corrupt-{int(time.time())}"
+                os.replace(self.cookie_file, backup_file)
+                print(f"cookie文件已损坏，已备份为 {backup_file}: {e}")
+                data = {}
+            if not mutate(data):
+                changed = self._replace_data(data)
+                modified = False
+            else:
+                self._write_file(data)
+                changed = self._replace_data(data)
+                modified = True
+            self._loaded = True
+        self._notify(changed)
+        return modified
+
+    def subscribe(self, callback: Callable[[List[str]], None]) -> Callable:
+        """订阅cookie变化，回调参数为变化的用户ID列表，在发生变化的线程中调用"""
+        with self._lock:
+            self._subscribers = self._subscribers + (callback,)
+        return callback
+
+    def unsubscribe(self, callback: Callable):
+        with self._lock:
+            self._subscribers = tuple(sub for sub in self._subscribers if sub is not callback)
+
+    def refresh(self) -> bool:
+        """文件被其他进程修改过时重新加载，返回是否重新加载"""
+        if self._loaded and self._stamp() == self._file_stamp:
+            return False
+        with self._lock:
+            try:
+                data = self._read_file()
+            except (OSError, ValueError) as e:
+                # 其他进程使用原子替换写入，读取失败一般是文件被手动改坏，保留内存中的数据
+                print(f"重新加载cookies失败: {e}")
+                return False
+            changed = self._replace_data(data)
+            self._loaded = True
+        self._notify(changed)
+        return True
+
+    def start_watching(self, interval: float = 2.0):
+        """启动后台线程定期检查文件变化，让订阅者及时收到其他进程的修改"""
+        if self._watch_thread and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                self.refresh()
+
+        self._watch_thread = threading.Thread(target=watch, name="cookie-watcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        self._watch_stop.set()
+
+    def save_cookies(self, user_id: str, cookies: Dict[str, str], user_info: Optional[Dict] = None,
+                     refresh_token: Optional[str] = None) -> bool:
+        """保存用户cookies
+
+        refresh_token 为扫码登录时返回的刷新令牌，用于之后刷新cookie。
+        """
+        def mutate(data):
+            data[user_id] = {
                 'cookies': cookies,
                 'user_info': user_info or {},
+                'refresh_token': refresh_token or '',
                 'saved_time': int(time.time()),
-                'expires_time': int(time.time()) + (30 * 24 * 3600)  # 30天过期
+                'expires_time': sessdata_expires(cookies) or int(time.time()) + DEFAULT_EXPIRES
             }
-            
-            with open(self.cookie_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cookies_data, f, ensure_ascii=False, indent=2)
-            
+            return True
+
+        try:
+            self._update(mutate)
             print(f"已保存用户 {user_id} 的cookies")
             return True
         except Exception as e:
             print(f"保存cookies失败: {e}")
             return False
-    
-    def load_cookies(self) -> bool:
-        """加载所有cookies"""
+
+    def update_cookies(self, user_id: str, cookies: Dict[str, str], refresh_token: Optional[str] = None) -> bool:
+        """替换已保存用户的cookies（例如刷新cookie后），保留用户信息"""
+        def mutate(data):
+            if user_id not in data:
+                return False
+            user_data = data[user_id]
+            user_data['cookies'] = cookies
+            if refresh_token:
+                user_data['refresh_token'] = refresh_token
+            user_data['saved_time'] = int(time.time())
+            user_data['expires_time'] = sessdata_expires(cookies) or int(time.time()) + DEFAULT_EXPIRES
+            return True
+
         try:
-            if self.cookie_file.exists():
-                with open(self.cookie_file, 'r', encoding='utf-8') as f:
-                    self.cookies_data = json.load(f)
-                print(f"已加载 {len(self.cookies_data)} 个用户的cookies")
-                return True
+            return self._update(mutate)
         except Exception as e:
-            print(f"加载cookies失败: {e}")
-        
-        self.cookies_data = {}
-        return False
-    
+            print(f"更新cookies失败: {e}")
+            return False
+
+    def get_refresh_token(self, user_id: str) -> Optional[str]:
+        """获取指定用户的刷新令牌"""
+        self._ensure_loaded()
+        user_data = self.cookies_data.get(user_id)
+        if not user_data:
+            return None
+        return user_data.get('refresh_token') or None
+
+    def load_cookies(self) -> bool:
+        """加载所有cookies"""
+        with self._lock:
+            self._loaded = True
+            try:
+                if self.cookie_file.exists():
+                    changed = self._replace_data(self._read_file())
+                    print(f"已加载 {len(self.cookies_data)} 个用户的cookies")
+                    self._notify(changed)
+                    return True
+            except Exception as e:
+                print(f"加载cookies失败: {e}")
+
+            self._replace_data({})
+            return False
+
     def get_cookies(self, user_id: str) -> Optional[Dict[str, str]]:
         """获取指定用户的cookies"""
+        self._ensure_loaded()
         if user_id not in self.cookies_data:
             return None
-        
+
         user_data = self.cookies_data[user_id]
-        
+
         # 检查是否过期
         if int(time.time()) > user_data.get('expires_time', 0):
             print(f"用户 {user_id} 的cookies已过期")
             self.remove_cookies(user_id)
             return None
-        
+
         return user_data.get('cookies')
-    
+
     def get_user_info(self, user_id: str) -> Optional[Dict]:
         """获取用户信息"""
+        self._ensure_loaded()
         if user_id not in self.cookies_data:
             return None
-        
+
         return self.cookies_data[user_id].get('user_info')
-    
+
     def remove_cookies(self, user_id: str) -> bool:
         """删除指定用户的cookies"""
         try:
-            if user_id in self.cookies_data:
-                del self.cookies_data[user_id]
-                with open(self.cookie_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.cookies_data, f, ensure_ascii=False, indent=2)
+            if self._update(lambda data: data.pop(user_id, None) is not None):
                 print(f"已删除用户 {user_id} 的cookies")
                 return True
         except Exception as e:
             print(f"删除cookies失败: {e}")
-        
+
         return False
-    
+
     def get_all_users(self) -> Dict[str, Dict]:
         """获取所有用户信息"""
+        self._ensure_loaded()
         result = {}
         current_time = int(time.time())
-        
+
         for user_id, data in self.cookies_data.items():
             if current_time <= data.get('expires_time', 0):
                 result[user_id] = {
@@ -98,21 +279,27 @@ class CookieManager:
                     'saved_time': data.get('saved_time', 0),
                     'expires_time': data.get('expires_time', 0)
                 }
-        
+
         return result
-    
+
     def cleanup_expired(self) -> int:
-        """清理过期的cookies"""
-        current_time = int(time.time())
+        """清理过期的cookies，所有过期用户一次写入"""
         expired_users = []
-        
-        for user_id, data in self.cookies_data.items():
-            if current_time > data.get('expires_time', 0):
-                expired_users.append(user_id)
-        
-        for user_id in expired_users:
-            self.remove_cookies(user_id)
-        
+
+        def mutate(data):
+            current_time = int(time.time())
+            expired_users.extend(user_id for user_id, user_data in data.items()
+                                 if current_time > user_data.get('expires_time', 0))
+            for user_id in expired_users:
+                del data[user_id]
+            return bool(expired_users)
+
+        try:
+            self._update(mutate)
+        except Exception as e:
+            print(f"清理过期cookies失败: {e}")
+            return 0
+
         return len(expired_users)
 
 
@@ -0,0 +1,110 @@
+"""
+磁盘空间管理器 - 估算下载任务占用的空间，并按输出目录所在磁盘预留空间
+"""
+
+import asyncio
+import errno
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def estimate_dash_size(video_stream: Optional[Dict[str, Any]], audio_stream: Optional[Dict[str, Any]],
+                       timelength_ms: int) -> int:
+    """根据DASH流的bandwidth和视频时长估算下载大小（字节）"""
+    bandwidth = 0
+    for stream in (video_stream, audio_stream):
+        if stream:
+            bandwidth += stream.get('bandwidth', 0)
+    # bandwidth单位为bps，额外预留5%的封装开销
+    return int(bandwidth * timelength_ms / 1000 / 8 * 1.05)
+
+
+class DiskSpaceManager:
+    """磁盘空间管理器
+
+    同一磁盘上的所有任务共享空闲空间，预留量之和加上安全余量不能超过空闲空间。
+    空间不足时，如果本进程还有其他任务占用着该磁盘的预留，则等待它们释放；
+    否则直接判定为空间不足。预留在任务结束前不随写入减少，估算偏保守。
+    """
+
+    def __init__(self, min_free_bytes: int = 512 * 1024 * 1024, poll_interval: float = 2.0):
+        self.min_free_bytes = min_free_bytes
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        # 磁盘设备号 -> {预留ID: 字节数}
+        self._reserved: Dict[int, Dict[str, int]] = {}
+        # 预留ID -> (磁盘设备号, 字节数)
+        self._tokens: Dict[str, Tuple[int, int]] = {}
+
+    def _device_of(self, path: str) -> int:
+        return os.stat(path).st_dev
+
+    def get_free_space(self, path: str) -> int:
+        """获取路径所在磁盘的空闲空间"""
+        return shutil.disk_usage(path).free
+
+    def get_reserved_space(self, path: str) -> int:
+        """获取路径所在磁盘已被预留的空间"""
+        with self._lock:
+            return sum(self._reserved.get(self._device_of(path), {}).values())
+
+    def try_reserve(self, path: str, size: int) -> Optional[str]:
+        """尝试预留空间，成功返回预留ID，失败返回None"""
+        device = self._device_of(path)
+        with self._lock:
+            reserved = sum(self._reserved.get(device, {}).values())
+            if self.get_free_space(path) - reserved - self.min_free_bytes < size:
+                return None
+
+            token = uuid.uuid4().hex
+            self._reserved.setdefault(device, {})[token] = size
+            self._tokens[token] = (device, size)
+            return token
+
+    async def reserve(self, path: str, size: int, on_wait: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+        """预留空间，空间被其他任务占用时等待释放
+
+        on_wait(需要字节数, 当前可用字节数) 在每次等待前调用。
+        返回预留ID；磁盘本身空间不足时返回None。
+        """
+        while True:
+            token = self.try_reserve(path, size)
+            if token:
+                return token
+
+            if not self.get_reserved_space(path):
+                # 没有可等待释放的预留，空间确实不足
+                return None
+
+            if on_wait:
+                available = self.get_free_space(path) - self.get_reserved_space(path) - self.min_free_bytes
+                on_wait(size, max(available, 0))
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self, token: Optional[str]):
+        """释放预留的空间"""
+        if not token:
+            return
+        with self._lock:
+            device, _ = self._tokens.pop(token, (None, 0))
+            if device is not None:
+                self._reserved.get(device, {}).pop(token, None)
+
+
+def preallocate(f, size: int):
+    """为已打开的文件预分配磁盘空间，文件系统不支持时忽略"""
+    if size <= 0 or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError as e:
+        # 空间不足需要让下载失败，其余错误（如文件系统不支持）忽略
+        if e.errno == errno.ENOSPC:
+            raise
+
+
+# 全局磁盘空间管理器实例
+disk_space_manager = DiskSpaceManager()
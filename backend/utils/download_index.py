@@ -0,0 +1,150 @@
+"""
+下载索引 - 记录已完成的下载及其输出文件和校验结果，用于导入链接时去重
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .file_lock import FileLock
+
+
+def video_key(bvid: str, page: int = 1) -> str:
+    """视频的唯一键，分P视频的第2P起带上分P序号"""
+    return bvid if page <= 1 else f"{bvid}:p{page}"
+
+
+def stream_hashes(streams: Dict[str, Any]) -> Dict[str, Any]:
+    """从下载报告的校验结果中只取出各个流的SHA-256，分段视频为按顺序排列的列表"""
+    hashes: Dict[str, Any] = {}
+    for name, verification in streams.items():
+        if isinstance(verification, list):
+            hashes[name] = [item.get('sha256') for item in verification]
+        elif verification:
+            hashes[name] = verification.get('sha256')
+    return hashes
+
+
+class DownloadIndex:
+    """下载索引
+
+    以 video_key 为键保存输出文件路径、大小和各个流的SHA-256（来自下载时的校验结果）。
+    输出文件被删除后对应记录视为无效，可以重新下载。
+
+    GUI、TUI和后端服务可能同时使用同一个索引文件：
+    - record() 只修改内存并标记待写入，flush_delay 秒内的多条记录由后台线程合并为一次写入，不阻塞事件循环
+    - 写入时在跨进程文件锁内重新读取文件、合并待写入的记录、写临时文件后原子替换，不会覆盖其他进程的记录
+    - 读取前比较文件的修改时间和大小，其他进程修改过时自动重新加载
+    """
+
+    def __init__(self, index_file: str = "download_index.json", flush_delay: float = 1.0):
+        self.index_file = index_file
+        self.flush_delay = flush_delay
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        # 尚未写入文件的记录
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # 已加载数据对应的文件状态 (修改时间, 大小)，文件不存在时为None
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(f"{index_file}.lock")
+        atexit.register(self.flush)
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.index_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> Tuple[Dict[str, Dict[str, Any]], Optional[Tuple[int, int]]]:
+        """读取索引文件，返回数据和读取时的文件状态"""
+        stamp = self._stamp()
+        if stamp is None:
+            return {}, None
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f), stamp
+        except (OSError, ValueError) as e:
+            print(f"加载下载索引失败: {e}")
+            return {}, stamp
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """返回内存中的索引，文件被其他进程修改过时重新读取（保留尚未写入的记录）"""
+        if self._entries is None or self._stamp() != self._file_stamp:
+            data, self._file_stamp = self._read_file()
+            self._entries = {**data, **self._pending}
+        return self._entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取有效的下载记录（输出文件仍然存在）"""
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and os.path.exists(entry.get('output_file', '')):
+            return entry
+        return None
+
+    def contains(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def record(self, key: str, report: Dict[str, Any]):
+        """记录一次成功的下载，report 为 download_video 填写的报告
+
+        只更新内存，文件由后台线程稍后写入。
+        """
+        output_file = report.get('output_file')
+        if not output_file:
+            return
+
+        entry = {
+            'output_file': output_file,
+            'size': os.path.getsize(output_file) if os.path.exists(output_file) else 0,
+            'sha256': stream_hashes(report.get('streams') or {}),
+            'time': int(time.time())
+        }
+        with self._lock:
+            self._load()[key] = entry
+            self._pending[key] = entry
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """把待写入的记录合并进索引文件，写文件时不占用内存索引的锁"""
+        with self._lock:
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            pending = dict(self._pending)
+        if not pending:
+            return
+
+        try:
+            with self._file_lock:
+                data, _ = self._read_file()
+                data.update(pending)
+                # 先写临时文件再替换，其他进程不会读到写了一半的文件
+                temp_file = f"{self.index_file}.{os.getpid()}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(temp_file, self.index_file)
+                stamp = self._stamp()
+        except OSError as e:
+            # 保留待写入的记录，下次记录或退出时重试
+            print(f"保存下载索引失败: {e}")
+            return
+
+        with self._lock:
+            for key, entry in pending.items():
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+            self._file_stamp = stamp
+            self._entries = {**data, **self._pending}
+
+
+# 全局下载索引实例
+download_index = DownloadIndex()
@@ -0,0 +1,136 @@
+"""
+完整性校验 - 在数据写入时增量计算分段CRC32、整体SHA-256，并检查fMP4顶层box结构
+"""
+
+import hashlib
+import zlib
+from typing import Any, Dict, List, Optional
+
+
+class StreamVerifier:
+    """流式校验器
+
+    由写入线程在每个缓冲区落盘时调用 update()，不需要在下载后重新读取文件。
+    - range_crc32: 每 range_size 字节一个CRC32，便于之后按范围比对或断点续传
+    - sha256: 整个文件的SHA-256
+    - check_boxes为True时按ISO BMFF解析顶层box，检查box是否首尾相接并覆盖整个文件
+    """
+
+    # fMP4分段文件（DASH m4s）必须包含的顶层box
+    REQUIRED_BOXES = ('ftyp', 'moov')
+
+    def __init__(self, range_size: int = 4 * 1024 * 1024, check_boxes: bool = False):
+        self.range_size = range_size
+        self.check_boxes = check_boxes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._range_crcs: List[int] = []
+        self._range_crc = 0
+        self._range_filled = 0
+
+        # box解析状态
+        self._box_offset = 0
+        self._box_header = bytearray()
+        self._box_types: List[str] = []
+        self._box_error: Optional[str] = None
+        self._box_until_eof = False
+
+    def update(self, data):
+        """处理新写入的数据"""
+        view = memoryview(data)
+        self._sha256.update(view)
+        self._update_ranges(view)
+        if self.check_boxes and not self._box_error and not self._box_until_eof:
+            self._scan_boxes(view)
+        self.size += len(view)
+
+    def _update_ranges(self, view: memoryview):
+        while view:
+            size = min(self.range_size - self._range_filled, len(view))
+            self._range_crc = zlib.crc32(view[:size], self._range_crc)
+            self._range_filled += size
+            view = view[size:]
+            if self._range_filled == self.range_size:
+                self._range_crcs.append(self._range_crc)
+                self._range_crc = 0
+                self._range_filled = 0
+
+    def _scan_boxes(self, view: memoryview):
+        """解析落在本次数据中的顶层box头（box头可能跨越两次写入）"""
+        base = self.size
+        length = len(view)
+        while True:
+            header_pos = self._box_offset + len(self._box_header) - base
+            if header_pos >= length:
+                return
+
+            header_length = 8
+            if len(self._box_header) >= 4 and int.from_bytes(self._box_header[:4], 'big') == 1:
+                # size为1表示使用64位largesize
+                header_length = 16
+            need = header_length - len(self._box_header)
+            self._box_header += view[header_pos:header_pos + need]
+            if len(self._box_header) < 8:
+                return
+            if len(self._box_header) == 8 and int.from_bytes(self._box_header[:4], 'big') == 1:
+                continue
+            if len(self._box_header) < header_length:
+                return
+
+            box_size = int.from_bytes(self._box_header[:4], 'big')
+            box_type = bytes(self._box_header[4:8]).decode('latin-1')
+            if box_size == 1:
+                box_size = int.from_bytes(self._box_header[8:16], 'big')
+
+            if not box_type.isprintable():
+                self._box_error = f"偏移 {self._box_offset} 处的box类型无效"
+                return
+            self._box_types.append(box_type)
+
+            if box_size == 0:
+                # size为0表示box一直延续到文件末尾
+                self._box_until_eof = True
+                return
+            if box_size < len(self._box_header):
+                self._box_error = f"{box_type} box大小无效: {box_size}"
+                return
+
+            self._box_offset += box_size
+            self._box_header = bytearray()
+
+    def box_check(self) -> Dict[str, Any]:
+        """fMP4顶层box结构检查结果"""
+        error = self._box_error
+        if not error and not self._box_until_eof:
+            if self._box_header:
+                error = "文件在box头中间结束"
+            elif self._box_offset != self.size:
+                error = f"box结构与文件大小不符: {self._box_offset}/{self.size}"
+        if not error:
+            missing = [box for box in self.REQUIRED_BOXES if box not in self._box_types]
+            if not self._box_types or self._box_types[0] != 'ftyp':
+                error = "文件不是以ftyp box开头"
+            elif missing:
+                error = f"缺少必要的box: {', '.join(missing)}"
+
+        counts: Dict[str, int] = {}
+        for box_type in self._box_types:
+            counts[box_type] = counts.get(box_type, 0) + 1
+
+        return {'ok': error is None, 'error': error, 'boxes': counts}
+
+    def result(self) -> Dict[str, Any]:
+        """汇总校验结果"""
+        range_crcs = list(self._range_crcs)
+        if self._range_filled:
+            range_crcs.append(self._range_crc)
+
+        result = {
+            'size': self.size,
+            'sha256': self._sha256.hexdigest(),
+            'range_size': self.range_size,
+            'range_crc32': [f"{crc:08x}" for crc in range_crcs]
+        }
+        if self.check_boxes:
+            result['box_check'] = self.box_check()
+        return result
@@ -0,0 +1,22 @@
+"""
+JSON解析后端 - 安装了 orjson 时使用 orjson 解析接口响应（大型播放地址/搜索响应快数倍），否则使用标准库 json
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 当前使用的后端名称
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+# 解析JSON，参数可以是bytes或str；直接绑定到后端函数，避免多一层调用
+loads = orjson.loads if orjson is not None else json.loads
+
+
+def response_json(response):
+    """解析httpx响应的JSON内容，结果与 response.json() 相同"""
+    return loads(response.content)
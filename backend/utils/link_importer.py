@@ -0,0 +1,234 @@
+"""
+链接批量导入 - 从大段文本、文件或标准输入中提取视频，解析短链接、合集和收藏夹，并去重
+"""
+
+import asyncio
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .download_index import DownloadIndex, download_index, video_key
+
+
+# av号与BV号互相转换的参数，转换在本地完成，不需要请求接口
+XOR_CODE = 23442827791579
+MASK_CODE = 2251799813685247
+MAX_AID = 1 << 51
+BASE = 58
+ALPHABET = "FcwAPNKTMug3GV5Lj7EJnHpWsx4tb8haYeviqBz6rkCy12mUSDQX9RdoZf"
+ENCODE_MAP = (8, 7, 0, 5, 1, 3, 2, 4, 6)
+
+
+def av_to_bv(aid: int) -> str:
+    """av号转BV号"""
+    chars = [""] * 9
+    tmp = (MAX_AID | aid) ^ XOR_CODE
+    for index in ENCODE_MAP:
+        chars[index] = ALPHABET[tmp % BASE]
+        tmp //= BASE
+    return "BV1" + "".join(chars)
+
+
+def bv_to_av(bvid: str) -> int:
+    """BV号转av号"""
+    tmp = 0
+    for index in reversed(ENCODE_MAP):
+        tmp = tmp * BASE + ALPHABET.index(bvid[3 + index])
+    return (tmp & MASK_CODE) ^ XOR_CODE
+
+
+# 所有链接形式合并为一个预编译的正则，一次扫描按出现顺序提取
+# 完整URL写在前面，保证URL中的BV号不会被下面的裸BV号规则重复匹配
+LINK_PATTERN = re.compile(
+    r"""
+    (?:https?://)?(?:www\.|m\.)?bilibili\.com/video/
+        (?:(?P<url_bv>[Bb][Vv]1[0-9A-Za-z]{9})|av(?P<url_av>\d+))
+        [/]?(?P<query>\?[^\s#"'<>]*)?
+    | (?:https?://)?space\.bilibili\.com/\d+/favlist\?[^\s"'<>]*?\bfid=(?P<fav_fid>\d+)
+    | (?:https?://)?(?:www\.)?bilibili\.com/(?:medialist/detail|list)/ml(?P<fav_ml>\d+)
+    | (?:https?://)?space\.bilibili\.com/(?P<season_mid>\d+)/(?:channel/collectiondetail|lists/\d+)\?[^\s"'<>]*?\bsid=(?P<season_id>\d+)
+    | (?:https?://)?space\.bilibili\.com/(?P<series_mid>\d+)/channel/seriesdetail\?[^\s"'<>]*?\bsid=(?P<series_id>\d+)
+    | (?:https?://)?(?:www\.)?bilibili\.com/list/(?P<list_mid>\d+)\?[^\s"'<>]*?\bsid=(?P<list_sid>\d+)
+    | (?P<short>(?:https?://)?(?:b23\.tv|bili2233\.cn)/[0-9A-Za-z]+)
+    | (?<![0-9A-Za-z])(?P<bv>[Bb][Vv]1[0-9A-Za-z]{9})(?![0-9A-Za-z])
+    | (?<![0-9A-Za-z])[aA][vV](?P<av>\d+)(?![0-9A-Za-z])
+    """,
+    re.VERBOSE
+)
+
+PAGE_PATTERN = re.compile(r"[?&]p=(\d+)")
+
+
+def normalize_bvid(bvid: str) -> str:
+    """BV前缀不区分大小写，统一为大写；其余部分是区分大小写的编码，保持不变"""
+    return "BV" + bvid[2:]
+
+
+def extract_links(text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """从文本中提取链接
+
+    返回 (视频列表, 待解析列表)：
+    - 视频: {'bvid': BV号, 'page': 分P序号}
+    - 待解析: {'type': 'short'|'favorite'|'season'|'series', ...}，需要请求网络后才能得到视频
+    """
+    videos = []
+    pending = []
+    for match in LINK_PATTERN.finditer(text):
+        group = match.lastgroup
+        if match.group('url_bv') or match.group('url_av'):
+            bvid = normalize_bvid(match.group('url_bv')) if match.group('url_bv') else av_to_bv(int(match.group('url_av')))
+            page = 1
+            query = match.group('query')
+            if query:
+                page_match = PAGE_PATTERN.search(query)
+                if page_match:
+                    page = max(1, int(page_match.group(1)))
+            videos.append({'bvid': bvid, 'page': page})
+        elif group == 'bv':
+            videos.append({'bvid': normalize_bvid(match.group('bv')), 'page': 1})
+        elif group == 'av':
+            videos.append({'bvid': av_to_bv(int(match.group('av'))), 'page': 1})
+        elif group == 'short':
+            url = match.group('short')
+            if not url.startswith('http'):
+                url = f"https://{url}"
+            pending.append({'type': 'short', 'url': url})
+        elif match.group('fav_fid') or match.group('fav_ml'):
+            pending.append({'type': 'favorite', 'media_id': int(match.group('fav_fid') or match.group('fav_ml'))})
+        elif match.group('season_id'):
+            pending.append({'type': 'season', 'mid': int(match.group('season_mid')), 'id': int(match.group('season_id'))})
+        elif match.group('list_sid'):
+            pending.append({'type': 'season', 'mid': int(match.group('list_mid')), 'id': int(match.group('list_sid'))})
+        elif match.group('series_id'):
+            pending.append({'type': 'series', 'mid': int(match.group('series_mid')), 'id': int(match.group('series_id'))})
+    return videos, pending
+
+
+class LinkImporter:
+    """链接批量导入器
+
+    文本按行扫描，视频ID直接提取；短链接、合集、收藏夹并发解析，同时进行的请求不超过 concurrency。
+    结果按 video_key 去重，并排除已在队列中（exclude）或已下载（下载索引中文件仍存在）的视频。
+    """
+
+    def __init__(self, client, concurrency: int = 8, index: Optional[DownloadIndex] = None):
+        self.client = client
+        self.concurrency = concurrency
+        self.index = index or download_index
+
+    async def _resolve_short(self, url: str) -> str:
+        """解析短链接，返回跳转后的地址"""
+        for _ in range(3):
+            response = await self.client.session.get(url, follow_redirects=False)
+            location = response.headers.get('location')
+            if not location:
+                break
+            url = location
+            if 'b23.tv' not in url and 'bili2233.cn' not in url:
+                break
+        return url
+
+    async def _expand_favorite(self, media_id: int) -> List[Dict[str, Any]]:
+        result = await self.client.get_favorite_ids(media_id)
+        if result.get('code') != 0:
+            raise Exception(result.get('message', '获取收藏夹失败'))
+        # type 2 为视频，其余为音频、合集等
+        return [{'bvid': item.get('bvid') or item['bv_id'], 'page': 1}
+                for item in result.get('data') or [] if item.get('type') == 2]
+
+    async def _expand_archives(self, fetch, mid: int, list_id: int) -> List[Dict[str, Any]]:
+        videos = []
+        page_number = 1
+        while True:
+            result = await fetch(mid, list_id, page_number)
+            if result.get('code') != 0:
+                raise Exception(result.get('message', '获取视频列表失败'))
+            data = result.get('data') or {}
+            archives = data.get('archives') or []
+            videos.extend({'bvid': archive['bvid'], 'page': 1} for archive in archives)
+
+            page = data.get('page') or {}
+            total = page.get('total', 0)
+            page_size = page.get('page_size') or page.get('size') or len(archives)
+            if not archives or page_number * page_size >= total:
+                return videos
+            page_number += 1
+
+    async def resolve(self, item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """解析一个待解析项，返回其中的视频"""
+        if item['type'] == 'short':
+            url = await self._resolve_short(item['url'])
+            videos, pending = extract_links(url)
+            # 短链接可能指向合集或收藏夹，跳转后的地址不会再是短链接
+            for nested in pending:
+                if nested['type'] != 'short':
+                    videos.extend(await self.resolve(nested))
+            return videos
+        if item['type'] == 'favorite':
+            return await self._expand_favorite(item['media_id'])
+        if item['type'] == 'season':
+            return await self._expand_archives(self.client.get_season_archives, item['mid'], item['id'])
+        if item['type'] == 'series':
+            return await self._expand_archives(self.client.get_series_archives, item['mid'], item['id'])
+        return []
+
+    async def import_lines(self, lines: Iterable[str], exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """从多行文本导入
+
+        返回 {'videos': 新视频列表, 'duplicates': 重复数量, 'downloaded': 已下载数量, 'failed': 解析失败项}
+        """
+        videos: List[Dict[str, Any]] = []
+        pending: List[Dict[str, Any]] = []
+        seen_pending: Set[str] = set()
+        for line in lines:
+            line_videos, line_pending = extract_links(line)
+            videos.extend(line_videos)
+            for item in line_pending:
+                # 同一个短链接、收藏夹只解析一次
+                key = repr(sorted(item.items()))
+                if key not in seen_pending:
+                    seen_pending.add(key)
+                    pending.append(item)
+
+        failed = []
+        if pending:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def resolve_one(item):
+                async with semaphore:
+                    try:
+                        return await self.resolve(item)
+                    except Exception as e:
+                        failed.append({**item, 'error': str(e)})
+                        return []
+
+            for resolved in await asyncio.gather(*(resolve_one(item) for item in pending)):
+                videos.extend(resolved)
+
+        excluded = set(exclude)
+        seen: Set[str] = set()
+        result = []
+        duplicates = 0
+        downloaded = 0
+        for video in videos:
+            key = video_key(video['bvid'], video['page'])
+            if key in seen or key in excluded:
+                duplicates += 1
+                continue
+            seen.add(key)
+            if self.index.contains(key):
+                downloaded += 1
+                continue
+            result.append(video)
+
+        return {'videos': result, 'duplicates': duplicates, 'downloaded': downloaded, 'failed': failed}
+
+    async def import_text(self, text: str, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        return await self.import_lines(text.splitlines(), exclude)
+
+    async def import_file(self, path: str, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """从文件导入，path为"-"时读取标准输入"""
+        if path == '-':
+            return await self.import_lines(sys.stdin, exclude)
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return await self.import_lines(f, exclude)
@@ -0,0 +1,70 @@
+"""
+日志 - 分级、限频的日志输出，用于替代接口层热点路径上的 print 调试信息
+
+日志级别由环境变量 BILI_LOG_LEVEL 设置（DEBUG/INFO/WARNING/ERROR，默认INFO），
+同一行代码产生的日志每 interval 秒最多输出 burst 条，高负载时不会刷屏，被丢弃的条数计入指标并在下次输出时注明。
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from .metrics import LOG_SUPPRESSED
+
+
+class RateLimitFilter(logging.Filter):
+    """按日志产生的位置（文件+行号）限频"""
+
+    def __init__(self, interval: float = 10.0, burst: int = 5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        # 位置 -> [窗口开始时间, 窗口内已输出条数, 被丢弃条数]
+        self._windows: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (此前 {self.interval:.0f} 秒内省略了 {suppressed} 条相同位置的日志)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+        LOG_SUPPRESSED.inc(logger=record.name)
+        return False
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _configure():
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        logger = logging.getLogger('bili')
+        level = os.environ.get('BILI_LOG_LEVEL', 'INFO').upper()
+        logger.setLevel(getattr(logging, level, logging.INFO))
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        handler.addFilter(RateLimitFilter())
+        logger.addHandler(handler)
+        logger.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取 bili 下的子日志器，例如 get_logger('api.video')"""
+    _configure()
+    return logging.getLogger('bili').getChild(name)
@@ -0,0 +1,89 @@
+"""
+后台事件循环线程 - 供GUI等同步代码提交协程，所有协程共享同一个事件循环和其上的连接
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Any, Callable, Coroutine, Optional
+
+
+class AsyncLoopThread:
+    """后台事件循环线程
+
+    GUI线程通过 submit() 把协程交给后台事件循环执行，完成回调不会在后台线程中直接调用，
+    而是放入线程安全的结果队列，由GUI线程定期调用 process_results() 取出并执行，
+    因此回调里可以直接操作界面控件。
+    """
+
+    def __init__(self, name: str = "async-loop"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        # (回调, 结果, 异常)
+        self._results: "queue.Queue[tuple]" = queue.Queue()
+
+    def start(self):
+        """启动后台线程，重复调用无副作用"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro: Coroutine, on_done: Optional[Callable[[Any, Optional[BaseException]], None]] = None
+               ) -> concurrent.futures.Future:
+        """提交协程到后台事件循环
+
+        on_done(结果, 异常) 在调用 process_results() 的线程中执行。
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if on_done:
+            def done(fut: concurrent.futures.Future):
+                if fut.cancelled():
+                    self._results.put((on_done, None, concurrent.futures.CancelledError()))
+                elif fut.exception() is not None:
+                    self._results.put((on_done, None, fut.exception()))
+                else:
+                    self._results.put((on_done, fut.result(), None))
+            future.add_done_callback(done)
+        return future
+
+    def call_soon(self, callback: Callable, *args):
+        """把普通回调放入结果队列，由 process_results() 所在线程执行"""
+        self._results.put((lambda result, error: callback(*args), None, None))
+
+    def process_results(self, limit: int = 100) -> int:
+        """执行已完成协程的回调，返回本次处理的数量"""
+        count = 0
+        while count < limit:
+            try:
+                callback, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            try:
+                callback(result, error)
+            except Exception as e:
+                print(f"回调执行出错: {e}")
+        return count
+
+    def stop(self):
+        """停止事件循环"""
+        if self.loop and self._thread and self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+        self._thread = None
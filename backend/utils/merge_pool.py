@@ -0,0 +1,97 @@
+"""
+合并任务池 - 在有限大小的线程池中执行ffmpeg合并/拼接/封装，避免阻塞下载所在的事件循环
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from .metrics import MERGE_DURATION, MERGE_QUEUE_DEPTH
+from .tracing import NULL_TRACE
+
+
+def default_merge_workers() -> int:
+    """默认并发合并数
+
+    ffmpeg 使用 -c copy 时几乎不占CPU，瓶颈在磁盘读写；每个合并要同时读两个流、写一个文件，
+    并发过多只会让磁盘来回寻道，因此按CPU核数的一半估算，最多4个。
+    """
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+class MergePool:
+    """合并任务池
+
+    合并函数本身是同步的（subprocess.run 等待 ffmpeg 结束），在池中的线程里运行，
+    调用方只需 await run()，等待期间事件循环可以继续处理其他任务的下载。
+    线程池可被多个事件循环共享（例如GUI中每个下载线程各自的事件循环），
+    同时运行的合并数不超过 max_workers，其余合并按提交顺序排队。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or default_merge_workers()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """已提交但尚未完成的合并数（包括排队中的）"""
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="merge")
+            return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, trace=NULL_TRACE, **kwargs) -> Any:
+        """在合并线程池中执行函数并等待结果
+
+        trace为任务追踪记录，分别记录等待空闲线程的时间（merge_queue）和实际执行的时间（merge）。
+        """
+        loop = asyncio.get_running_loop()
+        operation = getattr(func, '__name__', 'merge')
+        # [开始执行的时间, 执行结束的时间]，由线程池中的线程填写
+        times: List[float] = []
+        submitted = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+            MERGE_QUEUE_DEPTH.set(self._pending)
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), functools.partial(self._timed, times, operation, func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                MERGE_QUEUE_DEPTH.set(self._pending)
+            if times:
+                trace.add_span('merge_queue', submitted, times[0])
+            if len(times) > 1:
+                trace.add_span('merge', times[0], times[1], operation=operation)
+
+    @staticmethod
+    def _timed(times: List[float], operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # 在线程中计时，不包括排队等待的时间
+        times.append(time.perf_counter())
+        try:
+            with MERGE_DURATION.time(operation=operation):
+                return func(*args, **kwargs)
+        finally:
+            times.append(time.perf_counter())
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池，之后再次提交会重新创建"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+# 全局合并任务池实例
+merge_pool = MergePool()
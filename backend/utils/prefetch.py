@@ -0,0 +1,98 @@
+"""
+元数据预取 - 在下载槽位空出之前提前获取队列中视频的信息和播放地址
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def stream_deadline(stream_info: Optional[Dict[str, Any]]) -> Optional[int]:
+    """从播放地址的 deadline 参数获取过期时间（unix时间戳），取所有流中最早的一个"""
+    data = (stream_info or {}).get('data') or {}
+    urls = []
+    dash = data.get('dash') or {}
+    for stream in (dash.get('video') or []) + (dash.get('audio') or []):
+        urls.append(stream.get('baseUrl') or stream.get('base_url') or '')
+    for segment in data.get('durl') or []:
+        urls.append(segment.get('url') or '')
+
+    deadlines = []
+    for url in urls:
+        values = parse_qs(urlparse(url).query).get('deadline')
+        if values and values[0].isdigit():
+            deadlines.append(int(values[0]))
+    return min(deadlines) if deadlines else None
+
+
+class MetadataPrefetcher:
+    """队列元数据预取器
+
+    items 为 {'bvid', 'page', 'quality'} 列表。调用 get(index) 时，会在后台启动
+    index 之后 lookahead 个视频的 fetch_metadata，同时进行的接口请求不超过 concurrency，
+    这样下载槽位空出时视频信息和播放地址通常已经就绪。
+    播放地址带有过期时间，取出时剩余时间不足 min_remaining 秒的只重新获取视频流。
+    """
+
+    def __init__(self, downloader, items: List[Dict[str, Any]], lookahead: int = 8,
+                 concurrency: int = 4, min_remaining: float = 300):
+        self.downloader = downloader
+        self.items = items
+        self.lookahead = lookahead
+        self.min_remaining = min_remaining
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._next_index = 0
+
+    async def _fetch(self, index: int) -> Optional[Dict[str, Any]]:
+        item = self.items[index]
+        async with self._semaphore:
+            try:
+                return await self.downloader.fetch_metadata(
+                    item['bvid'], item.get('quality', 126), item.get('page', 1)
+                )
+            except Exception as e:
+                print(f"预取视频信息失败 {item['bvid']}: {e}")
+                return None
+
+    def _schedule(self, until: int):
+        """启动 until 之前（不含）尚未开始的预取"""
+        until = min(until, len(self.items))
+        while self._next_index < until:
+            index = self._next_index
+            self._tasks[index] = asyncio.ensure_future(self._fetch(index))
+            self._next_index += 1
+
+    async def _refresh_stream(self, index: int, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        item = self.items[index]
+        async with self._semaphore:
+            stream_info = await self.downloader.get_video_stream(
+                item['bvid'], metadata['cid'], item.get('quality', 126)
+            )
+        if not stream_info or 'data' not in stream_info:
+            return None
+        return {**metadata, 'stream_info': stream_info}
+
+    async def get(self, index: int) -> Optional[Dict[str, Any]]:
+        """获取第 index 个视频的元数据，并预取其后的视频，失败时返回None"""
+        self._schedule(index + 1 + self.lookahead)
+        task = self._tasks.pop(index, None)
+        metadata = await task if task else None
+        if metadata is None:
+            # 预取失败（或已被取走）时直接重新获取一次
+            metadata = await self._fetch(index)
+            if metadata is None:
+                return None
+
+        deadline = stream_deadline(metadata['stream_info'])
+        if deadline is not None and deadline - time.time() < self.min_remaining:
+            print(f"播放地址即将过期，重新获取: {self.items[index]['bvid']}")
+            metadata = await self._refresh_stream(index, metadata)
+        return metadata
+
+    def cancel(self):
+        """取消尚未取走的预取任务"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
@@ -0,0 +1,196 @@
+"""
+采样性能分析 - 后台线程定期采集所有线程的调用栈，输出可直接生成火焰图的折叠栈（collapsed stacks）文件
+
+用于长时间批量下载时查看CPU花在哪里（TLS、JSON解析、进度渲染、Tk界面更新、文件写入等）。
+默认每10毫秒采样一次，每个样本只读取一次各线程当前的栈帧，开销很小；运行期间每分钟写一次文件，
+进程意外退出时也能保留大部分结果。输出格式每行为 "线程;外层函数;...;内层函数 次数"，
+可直接交给 flamegraph.pl、speedscope 或 inferno 生成火焰图。
+
+开启方式：环境变量 BILI_PROFILE=1（启动时开启）、POSIX系统上向进程发送 SIGUSR1（开关切换）、
+TUI菜单、GUI开关或后端的 /profile 接口，都无需重启。
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# 线程空闲等待时所在的函数（文件名, 函数名），默认不计入样本，只统计实际在运行的代码
+IDLE_FUNCTIONS = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('tkinter/__init__.py', 'mainloop'),
+}
+
+# 采样间隔的允许范围（秒）：过小时采样线程会一直占用GIL，过大时样本太少
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 1.0
+
+
+class SamplingProfiler:
+    """采样性能分析器，同一时间只运行一次采样"""
+
+    def __init__(self, interval: float = 0.01, dump_interval: float = 60.0, output_dir: str = 'profiles'):
+        self.interval = interval
+        self.dump_interval = dump_interval
+        self.output_dir = output_dir
+        self.include_idle = False
+        self.output_file: Optional[str] = None
+        self.started_time: Optional[float] = None
+        self.samples = 0
+        self.idle_samples = 0
+        self._stacks: Counter = Counter()
+        # 代码对象 -> 栈帧名称
+        self._labels: Dict[object, str] = {}
+        self._idle: Dict[object, bool] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, output_dir: Optional[str] = None, interval: Optional[float] = None,
+              include_idle: Optional[bool] = None) -> str:
+        """开始采样，返回本次的输出文件路径；已在运行时直接返回当前文件"""
+        with self._lock:
+            if self.running:
+                return self.output_file
+            if output_dir:
+                self.output_dir = output_dir
+            if interval is not None:
+                # 超出范围（包括NaN）时取最接近的边界
+                if not MIN_INTERVAL <= interval <= MAX_INTERVAL:
+                    interval = MAX_INTERVAL if interval > MAX_INTERVAL else MIN_INTERVAL
+                self.interval = interval
+            if include_idle is not None:
+                self.include_idle = include_idle
+            self._stacks = Counter()
+            self.samples = 0
+            self.idle_samples = 0
+            self.started_time = time.time()
+            # 每次开启写入新文件，同一秒内多次开启时加序号
+            prefix = os.path.join(self.output_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+            self.output_file = f"{prefix}.folded"
+            index = 1
+            while os.path.exists(self.output_file):
+                index += 1
+                self.output_file = f"{prefix}-{index}.folded"
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return self.output_file
+
+    def stop(self) -> Optional[str]:
+        """停止采样并写出最终结果，返回输出文件路径；未在运行时返回None"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop_event.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._thread = None
+        self.dump()
+        return self.output_file
+
+    def toggle(self) -> Optional[str]:
+        """运行中则停止，否则开始，返回输出文件路径"""
+        return self.stop() if self.running else self.start()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = self._labels[code] = f"{os.path.basename(code.co_filename)}:{name}"
+        return label
+
+    def _is_idle(self, code) -> bool:
+        idle = self._idle.get(code)
+        if idle is None:
+            filename = code.co_filename.replace('\\', '/')
+            idle = self._idle[code] = any(filename.endswith(suffix) and code.co_name == name
+                                          for suffix, name in IDLE_FUNCTIONS)
+        return idle
+
+    def _sample(self, own_ident: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if not self.include_idle and self._is_idle(frame.f_code):
+                self.idle_samples += 1
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self._stacks[';'.join(stack)] += 1
+            self.samples += 1
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        last_dump = time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            self._sample(own_ident)
+            if time.monotonic() - last_dump >= self.dump_interval:
+                self.dump()
+                last_dump = time.monotonic()
+
+    def collapsed(self) -> str:
+        """当前结果的折叠栈文本"""
+        stacks = sorted(self._stacks.copy().items())
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def dump(self) -> Optional[str]:
+        """把当前结果写入输出文件（先写临时文件再替换，读取方不会看到写了一半的文件）"""
+        if not self.output_file:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp_file = self.output_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        os.replace(temp_file, self.output_file)
+        return self.output_file
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """按自身采样次数（栈顶函数）排序的热点函数"""
+        leaves: Counter = Counter()
+        for stack, count in self._stacks.copy().items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def status(self) -> Dict[str, object]:
+        return {
+            'running': self.running,
+            'output_file': self.output_file,
+            'started_time': int(self.started_time) if self.started_time else None,
+            'interval': self.interval,
+            'samples': self.samples,
+            'idle_samples': self.idle_samples,
+            'top': [{'function': name, 'samples': count} for name, count in self.top(10)],
+        }
+
+    def setup(self):
+        """按环境变量 BILI_PROFILE 开启采样，并在POSIX系统上注册 SIGUSR1 开关，只能在主线程调用"""
+        if os.environ.get('BILI_PROFILE', '') not in ('', '0'):
+            self.start(os.environ.get('BILI_PROFILE_DIR') or None)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self._toggle_async())
+
+    def _toggle_async(self):
+        # 信号处理函数中不能等待采样线程结束，放到单独的线程中切换
+        threading.Thread(target=self.toggle, name='profiler-toggle', daemon=True).start()
+
+
+# 全局性能分析器实例
+profiler = SamplingProfiler()
@@ -0,0 +1,197 @@
+"""
+进度聚合器 - 汇总所有下载任务的字节计数，按固定频率向订阅者（TUI、GUI、SSE）发布合并后的快照
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobProgress:
+    """单个任务的进度
+
+    可直接作为 download_video 的 progress_callback 使用。下载协程只做属性赋值，不加锁、
+    不触发任何UI更新；速度和剩余时间由聚合器在发布时统一计算。
+    """
+
+    def __init__(self, job_id: str, label: str = ""):
+        self.job_id = job_id
+        self.label = label or job_id
+        self.status = "等待中"
+        self.percent = 0.0
+        self.downloaded = 0
+        self.total = 0
+        self.finished = False
+        self.success = False
+        self.speed = 0.0
+        self.eta: Optional[float] = None
+        # 已完成的流累计字节数（视频流、音频流依次下载时每个流的计数从0开始，由 begin_stream 切换）
+        self._completed_bytes = 0
+        self._last_sample_bytes = 0
+        self._last_sample_time = time.monotonic()
+
+    def __call__(self, status: str, percent: float, downloaded: Optional[int] = None, total: Optional[int] = None):
+        """更新当前流的进度
+
+        downloaded为当前流已下载的字节数，重试时会从0重新计数，不表示开始了新的流。
+        """
+        self.status = status
+        self.percent = percent
+        if downloaded is not None:
+            self.downloaded = downloaded
+        if total is not None:
+            self.total = total
+
+    def begin_stream(self, total: int = 0):
+        """开始下载下一个流，之前的流计入已完成的字节数"""
+        self._completed_bytes += self.downloaded
+        self.downloaded = 0
+        self.total = total
+
+    def finish(self, success: bool, status: Optional[str] = None):
+        """标记任务结束"""
+        self.success = success
+        self.status = status or ("下载完成" if success else "下载失败")
+        if success:
+            self.percent = 1.0
+        self.finished = True
+
+    @property
+    def bytes_done(self) -> int:
+        """任务累计下载的字节数"""
+        return self._completed_bytes + self.downloaded
+
+    def _sample(self, now: float, smoothing: float):
+        """计算速度（指数滑动平均）和当前流的剩余时间"""
+        elapsed = now - self._last_sample_time
+        if elapsed <= 0:
+            return
+        bytes_done = self.bytes_done
+        # 重试时当前流的计数回到0，这段时间按没有进展计算
+        instant = max(bytes_done - self._last_sample_bytes, 0) / elapsed
+        self.speed = instant if not self.speed else self.speed * (1 - smoothing) + instant * smoothing
+        self._last_sample_bytes = bytes_done
+        self._last_sample_time = now
+
+        if self.finished:
+            self.speed = 0.0
+            self.eta = None
+        elif self.speed > 0 and self.total > self.downloaded:
+            self.eta = (self.total - self.downloaded) / self.speed
+        else:
+            self.eta = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'label': self.label,
+            'status': self.status,
+            'percent': self.percent,
+            'downloaded': self.downloaded,
+            'total': self.total,
+            'bytes_done': self.bytes_done,
+            'speed': self.speed,
+            'eta': self.eta,
+            'finished': self.finished,
+            'success': self.success
+        }
+
+
+class ProgressAggregator:
+    """进度聚合器
+
+    发布线程每 interval 秒计算一次所有任务的速度和剩余时间，然后把同一份快照交给每个订阅者。
+    订阅者在发布线程中被调用，需要自行切换到UI线程或事件循环（例如 Tk 的 root.after、
+    asyncio 的 call_soon_threadsafe），每个发布周期只切换一次。
+    """
+
+    def __init__(self, interval: float = 0.2, smoothing: float = 0.3):
+        self.interval = interval
+        self.smoothing = smoothing
+        self._jobs: Dict[str, JobProgress] = {}
+        # 订阅者列表只整体替换，发布线程读取时无需加锁
+        self._subscribers: tuple = ()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def create_job(self, job_id: str, label: str = "") -> JobProgress:
+        """创建任务进度"""
+        job = JobProgress(job_id, label)
+        self._jobs[job_id] = job
+        self.start()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[JobProgress]:
+        return self._jobs.get(job_id)
+
+    def remove_job(self, job_id: str):
+        self._jobs.pop(job_id, None)
+
+    def subscribe(self, callback: Callable[[List[Dict[str, Any]]], None]) -> Callable:
+        """订阅进度快照，回调参数为所有任务的进度字典列表"""
+        with self._lock:
+            self._subscribers = self._subscribers + (callback,)
+        self.start()
+        return callback
+
+    def unsubscribe(self, callback: Callable):
+        with self._lock:
+            self._subscribers = tuple(sub for sub in self._subscribers if sub is not callback)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """获取最近一次计算后的进度快照"""
+        return [job.to_dict() for job in list(self._jobs.values())]
+
+    def start(self):
+        """启动发布线程"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="progress-publisher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.publish()
+
+    def publish(self):
+        """计算速度和剩余时间并发布快照"""
+        now = time.monotonic()
+        jobs = list(self._jobs.values())
+        for job in jobs:
+            job._sample(now, self.smoothing)
+
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+
+        snapshot = [job.to_dict() for job in jobs]
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"进度订阅者出错: {e}")
+
+
+def format_speed(speed: float) -> str:
+    """格式化下载速度"""
+    if speed >= 1024 * 1024:
+        return f"{speed / 1024 / 1024:.1f}MB/s"
+    return f"{speed / 1024:.0f}KB/s"
+
+
+def format_eta(eta: Optional[float]) -> str:
+    """格式化剩余时间"""
+    if eta is None:
+        return "--:--"
+    minutes, seconds = divmod(int(eta), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+# 全局进度聚合器实例
+progress_aggregator = ProgressAggregator()
@@ -0,0 +1,127 @@
+"""
+流选择策略 - 根据画质、编码和码率从DASH数据中选择视频/音频流
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+# DASH codecid 对应的编码名称
+CODEC_NAMES = {
+    7: 'avc',
+    12: 'hevc',
+    13: 'av1'
+}
+
+# 音频ID对应的音质等级，仅在缺少bandwidth时使用 (30216: 64K, 30232: 132K, 30280: 192K, 30250: 杜比全景声, 30251: Hi-Res无损)
+AUDIO_RANK = {30216: 1, 30232: 2, 30280: 3, 30250: 4, 30251: 5}
+
+
+def get_codec_name(stream: Dict[str, Any]) -> str:
+    """获取流的编码名称 (avc/hevc/av1)"""
+    name = CODEC_NAMES.get(stream.get('codecid'))
+    if name:
+        return name
+
+    codecs = stream.get('codecs', '').lower()
+    if codecs.startswith('av01'):
+        return 'av1'
+    if codecs.startswith(('hev1', 'hvc1')):
+        return 'hevc'
+    if codecs.startswith('avc'):
+        return 'avc'
+    return codecs
+
+
+class StreamSelectionPolicy:
+    """流选择策略
+
+    - codec_order: 编码偏好顺序，例如 ['av1', 'hevc', 'avc']，为空时不区分编码
+    - prefer_smallest: 同一画质下选择码率最低（体积最小）的流
+    - max_bandwidth: 视频流码率上限 (bps)，超过上限的画质会自动降级
+    """
+
+    def __init__(self, codec_order: Optional[List[str]] = None, prefer_smallest: bool = False,
+                 max_bandwidth: Optional[int] = None):
+        self.codec_order = [codec.lower() for codec in (codec_order or [])]
+        self.prefer_smallest = prefer_smallest
+        self.max_bandwidth = max_bandwidth
+
+    def _codec_rank(self, stream: Dict[str, Any]) -> int:
+        codec = get_codec_name(stream)
+        if codec in self.codec_order:
+            return self.codec_order.index(codec)
+        return len(self.codec_order)
+
+    def select_video(self, videos: List[Dict[str, Any]], quality: int) -> Optional[Dict[str, Any]]:
+        """选择视频流：优先指定画质，没有则选择不超过指定画质的最高画质"""
+        if not videos:
+            return None
+
+        candidates = videos
+        if self.max_bandwidth:
+            within_limit = [stream for stream in videos if stream.get('bandwidth', 0) <= self.max_bandwidth]
+            # 所有流都超出上限时退回码率最低的流
+            candidates = within_limit or [min(videos, key=lambda stream: stream.get('bandwidth', 0))]
+
+        available_qualities = sorted({stream['id'] for stream in candidates}, reverse=True)
+        target_quality = next((q for q in available_qualities if q <= quality), available_qualities[0])
+
+        same_quality = [stream for stream in candidates if stream['id'] == target_quality]
+        # min 对相同键值保持列表顺序，默认策略即为接口返回的第一条
+        return min(same_quality, key=lambda stream: (
+            self._codec_rank(stream),
+            stream.get('bandwidth', 0) if self.prefer_smallest else 0
+        ))
+
+    def select_audio(self, dash: Dict[str, Any], include_dolby: bool = False,
+                     prefer_flac: bool = False) -> Optional[Dict[str, Any]]:
+        """选择码率最高的音频流
+
+        include_dolby为True时同时考虑杜比全景声音轨，prefer_flac为True时优先选择无损音轨。
+        """
+        if prefer_flac:
+            flac = dash.get('flac') or {}
+            if flac.get('audio'):
+                return flac['audio']
+
+        candidates = list(dash.get('audio') or [])
+        if include_dolby:
+            dolby = dash.get('dolby') or {}
+            candidates.extend(dolby.get('audio') or [])
+        if not candidates:
+            return None
+
+        return max(candidates, key=lambda stream: (
+            stream.get('bandwidth', 0),
+            AUDIO_RANK.get(stream.get('id'), 0)
+        ))
+
+
+# 预设策略
+POLICIES = {
+    # 与接口返回顺序一致
+    'default': StreamSelectionPolicy(),
+    # 同画质下体积最小
+    'smallest': StreamSelectionPolicy(prefer_smallest=True),
+    # 优先高压缩率编码
+    'efficient': StreamSelectionPolicy(codec_order=['av1', 'hevc', 'avc'], prefer_smallest=True),
+    # 优先兼容性最好的AVC
+    'compatible': StreamSelectionPolicy(codec_order=['avc', 'hevc', 'av1'])
+}
+
+
+def get_policy(name: str = 'default', codec_order: Optional[List[str]] = None,
+               max_bandwidth: Optional[int] = None) -> StreamSelectionPolicy:
+    """根据预设名称获取策略，可额外覆盖编码顺序和码率上限"""
+    if name not in POLICIES:
+        raise ValueError(f"未知的流选择策略: {name}，可选: {', '.join(POLICIES)}")
+
+    preset = POLICIES[name]
+    if codec_order is None and max_bandwidth is None:
+        return preset
+
+    return StreamSelectionPolicy(
+        codec_order=codec_order if codec_order is not None else preset.codec_order,
+        prefer_smallest=preset.prefer_smallest,
+        max_bandwidth=max_bandwidth if max_bandwidth is not None else preset.max_bandwidth
+    )
@@ -0,0 +1,166 @@
+"""
+封面缩略图缓存 - 内存中缓存解码后的缩略图，磁盘上缓存缩放后的JPEG，解码和缩放在独立线程池中进行
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from .metrics import CACHE_REQUESTS
+
+
+class ThumbnailCache:
+    """封面缩略图缓存
+
+    - 内存缓存: 最近使用的 max_memory_items 张已缩放的PIL图像 (LRU)
+    - 磁盘缓存: cache_dir 下按键名保存缩放后的JPEG，重启后无需联网即可显示，超过 max_age 秒后重新下载
+    - 解码线程池: 图片解码、缩放、编码都在池中进行，不占用事件循环和UI线程
+
+    键一般使用BV号，这样在获取到视频信息之前就能从缓存中取出封面。
+    协程方法需要在同一个事件循环中调用（例如GUI的后台事件循环），同一个键的并发请求只下载一次。
+    """
+
+    def __init__(self, cache_dir: str = "cache/covers", size: Tuple[int, int] = (100, 75),
+                 max_memory_items: int = 512, decode_workers: int = 2, max_age: float = 30 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.max_memory_items = max_memory_items
+        self.max_age = max_age
+        self._memory: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.decode_workers = decode_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 解码线程池在第一次使用时创建
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="thumbnail")
+            return self._executor
+
+    def _disk_path(self, key: str) -> str:
+        # 键可能包含路径字符（例如URL），统一取哈希作为文件名
+        digest = hashlib.sha1(f"{key}:{self.size[0]}x{self.size[1]}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.jpg")
+
+    def get_memory(self, key: str):
+        """只查询内存缓存（可在任意线程调用，不会阻塞）"""
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            return image
+
+    def _put_memory(self, key: str, image):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _load_file(self, path: str):
+        """读取磁盘缓存（在解码线程中执行）"""
+        from PIL import Image
+
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with Image.open(path) as image:
+                image.load()
+                return image.copy()
+        except (OSError, ValueError):
+            return None
+
+    def _decode_and_store(self, data: bytes, path: str):
+        """解码、缩放并写入磁盘缓存（在解码线程中执行）"""
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as source:
+            # draft 让JPEG解码器直接按接近目标的尺寸解码，省去大部分解码和缩放开销
+            source.draft('RGB', self.size)
+            image = source.convert('RGB').resize(self.size, Image.LANCZOS)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再替换，避免其他进程读到写了一半的文件
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            image.save(temp_path, 'JPEG', quality=85)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"保存封面缓存失败: {e}")
+        return image
+
+    async def get_cached(self, key: str):
+        """从内存或磁盘缓存获取缩略图，不访问网络，未命中时返回None"""
+        image = self.get_memory(key)
+        if image is not None:
+            CACHE_REQUESTS.inc(cache='thumbnail', result='memory')
+            return image
+
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            CACHE_REQUESTS.inc(cache='thumbnail', result='miss')
+            return None
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(self._get_executor(), self._load_file, path)
+        if image is not None:
+            CACHE_REQUESTS.inc(cache='thumbnail', result='disk')
+            self._put_memory(key, image)
+        else:
+            CACHE_REQUESTS.inc(cache='thumbnail', result='miss')
+        return image
+
+    async def get(self, key: str, url: str, session):
+        """获取缩略图：依次查询内存、磁盘缓存，都未命中时用 session (httpx.AsyncClient) 下载
+
+        下载或解码失败时返回None。
+        """
+        image = await self.get_cached(key)
+        if image is not None:
+            return image
+
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        image = None
+        try:
+            response = await session.get(url)
+            if response.status_code == 200:
+                image = await loop.run_in_executor(
+                    self._get_executor(), self._decode_and_store, response.content, self._disk_path(key)
+                )
+                self._put_memory(key, image)
+            return image
+        except Exception as e:
+            print(f"获取封面失败 {url}: {e}")
+            return None
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(image)
+
+    def clear(self, disk: bool = False):
+        """清空内存缓存，disk为True时同时删除磁盘缓存"""
+        with self._lock:
+            self._memory.clear()
+        if disk and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.jpg'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+
+# 全局封面缩略图缓存实例
+thumbnail_cache = ThumbnailCache()
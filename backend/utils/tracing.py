@@ -0,0 +1,228 @@
+"""
+下载任务追踪 - 记录每个下载任务各阶段（视频信息、播放地址、排队、连接CDN、传输、合并排队、合并、写入索引）的耗时，
+可导出为JSON或Chrome trace-event格式（可在 Perfetto / chrome://tracing 中打开）
+
+默认关闭，关闭时 start_job 返回空追踪，span() 直接返回共享的空上下文管理器，几乎没有开销。
+通过环境变量 BILI_TRACE=1 或 tracer.enable() 开启。
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class JobTrace:
+    """一个下载任务的追踪记录"""
+
+    enabled = True
+
+    def __init__(self, job_id: str, name: str):
+        self.job_id = job_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs: Dict[str, Any] = {}
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs):
+        """记录with块的耗时，with得到的字典可用于在结束前补充属性（如字节数）"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.add_span(name, start, time.perf_counter(), **attrs)
+
+    def add_span(self, name: str, start: float, end: float, **attrs):
+        """添加已经结束的阶段，时间为 time.perf_counter() 的值"""
+        with self._lock:
+            self.spans.append({'name': name, 'start': start, 'end': end, 'attrs': attrs})
+
+    def finish(self, success: bool):
+        self.end = time.perf_counter()
+        self.attrs['success'] = success
+
+    def summary(self) -> Dict[str, float]:
+        """各阶段的总耗时（秒），同名阶段（如视频和音频的传输）累加；total 为任务总耗时"""
+        result: Dict[str, float] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            result[span['name']] = result.get(span['name'], 0.0) + span['end'] - span['start']
+        end = self.end if self.end is not None else time.perf_counter()
+        result['total'] = end - self.start
+        return {name: round(seconds, 3) for name, seconds in result.items()}
+
+    def to_dict(self, epoch: float) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'start': round(self.start - epoch, 6),
+            'end': round(self.end - epoch, 6) if self.end is not None else None,
+            'attrs': self.attrs,
+            'summary': self.summary(),
+            'spans': [
+                {'name': span['name'], 'start': round(span['start'] - epoch, 6),
+                 'duration': round(span['end'] - span['start'], 6), 'attrs': span['attrs']}
+                for span in spans
+            ],
+        }
+
+
+class _NullSpan:
+    """空追踪的阶段，with得到的字典每次都是新的，调用方写入的属性直接丢弃"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> Dict[str, Any]:
+        return {}
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _NullTrace:
+    """追踪关闭时使用的空记录"""
+
+    enabled = False
+    job_id = ''
+    spans: List[Dict[str, Any]] = []
+
+    def span(self, name: str, **attrs):
+        return _NULL_SPAN
+
+    def add_span(self, name: str, start: float, end: float, **attrs):
+        pass
+
+    def finish(self, success: bool):
+        pass
+
+    def summary(self) -> Dict[str, float]:
+        return {}
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Tracer:
+    """保存最近 max_jobs 个任务的追踪记录"""
+
+    def __init__(self, max_jobs: int = 1000):
+        self.enabled = os.environ.get('BILI_TRACE', '') not in ('', '0')
+        self.max_jobs = max_jobs
+        # perf_counter 与墙上时间的对应关系，导出时换算
+        self.epoch = time.perf_counter()
+        self.epoch_wall = time.time()
+        self._jobs: "OrderedDict[str, JobTrace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def start_job(self, job_id: str, name: str = ''):
+        """开始记录一个任务，关闭时返回 NULL_TRACE"""
+        if not self.enabled:
+            return NULL_TRACE
+        trace = JobTrace(job_id, name or job_id)
+        with self._lock:
+            self._jobs[job_id] = trace
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return trace
+
+    def get(self, job_id: str) -> Optional[JobTrace]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[JobTrace]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
+
+    def summarize(self, traces: Optional[Iterable[JobTrace]] = None) -> Dict[str, Dict[str, float]]:
+        """按阶段汇总多个任务：次数、总耗时、平均和最大耗时（秒）"""
+        result: Dict[str, Dict[str, float]] = {}
+        for trace in traces if traces is not None else self.jobs():
+            for name, seconds in trace.summary().items():
+                stats = result.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+                stats['count'] += 1
+                stats['total'] += seconds
+                stats['max'] = max(stats['max'], seconds)
+        for stats in result.values():
+            stats['mean'] = round(stats['total'] / stats['count'], 3)
+            stats['total'] = round(stats['total'], 3)
+        return result
+
+    def export_json(self, traces: Optional[Iterable[JobTrace]] = None) -> Dict[str, Any]:
+        """导出为JSON结构，时间为相对于追踪开始的秒数"""
+        traces = list(traces) if traces is not None else self.jobs()
+        return {
+            'epoch': self.epoch_wall,
+            'jobs': [trace.to_dict(self.epoch) for trace in traces],
+            'summary': self.summarize(traces),
+        }
+
+    def _event(self, name: str, cat: str, tid: int, start: float, end: float, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {'name': name, 'cat': cat, 'ph': 'X', 'pid': 1, 'tid': tid,
+                'ts': round((start - self.epoch) * 1e6), 'dur': round((end - start) * 1e6), 'args': args}
+
+    def export_chrome(self, traces: Optional[Iterable[JobTrace]] = None) -> Dict[str, Any]:
+        """导出为Chrome trace-event格式，每个任务一行
+
+        同一任务中时间重叠的阶段（如并发下载的分段）放到该任务的附加行中，保证每行的事件不交叉。
+        """
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'bili downloads'}}]
+        next_tid = 1
+        for trace in traces if traces is not None else self.jobs():
+            spans = sorted(list(trace.spans), key=lambda span: span['start'])
+            # 预取的视频信息可能早于任务开始
+            start = min([trace.start] + [span['start'] for span in spans])
+            end = max([trace.end if trace.end is not None else time.perf_counter()] + [span['end'] for span in spans])
+            # 每行: [tid, 最后一个事件的结束时间]
+            lanes = [[next_tid, start]]
+            next_tid += 1
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': lanes[0][0],
+                           'args': {'name': f"{trace.name} ({trace.job_id})"}})
+            events.append(self._event('job', 'job', lanes[0][0], start, end, trace.attrs))
+            for span in spans:
+                lane = next((lane for lane in lanes if lane[1] <= span['start']), None)
+                if lane is None:
+                    lane = [next_tid, 0.0]
+                    next_tid += 1
+                    lanes.append(lane)
+                    events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': lane[0],
+                                   'args': {'name': f"{trace.name} ({trace.job_id}) #{len(lanes)}"}})
+                lane[1] = span['end']
+                events.append(self._event(span['name'], 'phase', lane[0], span['start'], span['end'], span['attrs']))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path: str, format: str = 'chrome', traces: Optional[Iterable[JobTrace]] = None) -> str:
+        """保存到文件，format为 'chrome' 或 'json'"""
+        data = self.export_chrome(traces) if format == 'chrome' else self.export_json(traces)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    def save_batch(self, traces: Iterable[JobTrace], directory: str = 'traces') -> str:
+        """把一批任务保存为带时间戳的Chrome trace文件，返回文件路径"""
+        filename = f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        return self.save(os.path.join(directory, filename), 'chrome', traces)
+
+
+# 全局追踪器实例
+tracer = Tracer()
@@ -0,0 +1,175 @@
+"""
+接口层热点路径的微基准测试：WBI签名、JSON解析、视频ID提取
+
+用法:
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --number 20000 --output api.json
+
+旧版WBI签名（每次重建混合密钥、逐字符过滤、输出调试信息）保留在本文件中作为基线，
+调试输出写入 os.devnull，只统计格式化和写入的开销，不含终端显示。
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import time
+import timeit
+import urllib.parse
+from typing import Any, Dict, List
+
+from backend.bilibili.client import MIXIN_KEY_ENC_TAB, get_mixin_key, wbi_sign
+from backend.utils import json_backend
+from backend.utils.link_importer import av_to_bv, bv_to_av, extract_links
+
+
+IMG_KEY = '7cd084941338484aae1ad9425b84077c'
+SUB_KEY = '4932caff0ff746eab6f01bf08b70ac45'
+
+PLAYURL_PARAMS = {'bvid': 'BV1L9Uo7oE3Y', 'cid': 123456789, 'qn': 80, 'fnval': 4048, 'fnver': 0,
+                  'fourk': 1, 'platform': 'html5'}
+SEARCH_PARAMS = {'search_type': 'video', 'keyword': "测试 (关键词) it's *", 'page': 1,
+                 'order': 'totalrank', 'duration': 0, 'tids': 0}
+
+
+def legacy_wbi_signature(wbi_keys: Dict[str, str], params: Dict[str, Any]) -> str:
+    """优化前的签名实现（基线）"""
+    mixin_key_enc_tab = list(MIXIN_KEY_ENC_TAB)
+    raw_wbi_key = wbi_keys.get('img_key', '') + wbi_keys.get('sub_key', '')
+    wbi_key = ''.join([raw_wbi_key[i] for i in mixin_key_enc_tab])[:32]
+    params['wts'] = int(time.time())
+
+    filtered_params = {}
+    for k, v in params.items():
+        filtered_params[k] = ''.join(filter(lambda chr: chr not in "!'()*", str(v)))
+    query_string = urllib.parse.urlencode(sorted(filtered_params.items()))
+    sign_string = query_string + wbi_key
+    sign = hashlib.md5(sign_string.encode()).hexdigest()
+
+    print(f"WBI签名调试:")
+    print(f"  原始参数: {params}")
+    print(f"  过滤后参数: {filtered_params}")
+    print(f"  查询字符串: {query_string}")
+    print(f"  签名字符串长度: {len(sign_string)}")
+    print(f"  w_rid: {sign}")
+    return sign
+
+
+def check_signatures(params_list=(PLAYURL_PARAMS, SEARCH_PARAMS)) -> List[str]:
+    """确认优化后的签名与旧实现结果相同，返回不一致的参数说明；结果不同时速度对比没有意义"""
+    wbi_keys = {'img_key': IMG_KEY, 'sub_key': SUB_KEY}
+    mixin_key = get_mixin_key(IMG_KEY, SUB_KEY)
+    mismatches = []
+    for params in params_list:
+        legacy_params = dict(params)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            expected = legacy_wbi_signature(wbi_keys, legacy_params)
+        # 使用旧实现写入的 wts，两边签名的参数完全相同
+        actual = wbi_sign(dict(params, wts=legacy_params['wts']), mixin_key)
+        if actual != expected:
+            mismatches.append(f"{params}: {actual} != {expected}")
+    return mismatches
+
+
+def playurl_payload() -> bytes:
+    """与线上格式相近的播放地址响应（7种画质 × 2种编码 + 3种音质）"""
+    url = ("https://upos-sz-mirror.bilivideo.com/upgcxcode/00/00/123456789/123456789-1-100050.m4s"
+           "?e=ig8euxZM2rNcNbdlhoNvNC8BqJIzNbfqXBvEqxTEto8BTrNvN0GvT90W5JZMkX_YN0MvXg8gNEV4NC8xNEV4N03eN0B5tZlqNxTEto8BTrNvNeZVuJ10Kj_g2UB02J0mN0B5tZlqNCNEto8BTrNvNC7MTX502C8f2jmMQJ6mqF2fka1mqx6gqj0eN0B599M="
+           "&uipk=5&nbs=1&deadline=1700000000&gen=playurlv2&os=upos&oi=0&trid=abcdef&mid=1&platform=pc"
+           "&upsig=0123456789abcdef0123456789abcdef&uparams=e,uipk,nbs,deadline,gen,os,oi,trid,mid,platform&bvc=vod&nettype=0&orderid=0,3&logo=80000000")
+    videos = []
+    for quality in (120, 116, 112, 80, 64, 32, 16):
+        for codecid, codecs in ((7, 'avc1.640032'), (12, 'hev1.1.6.L150.90')):
+            videos.append({'id': quality, 'baseUrl': url, 'base_url': url, 'backupUrl': [url, url],
+                           'backup_url': [url, url], 'bandwidth': 2_500_000, 'mimeType': 'video/mp4',
+                           'mime_type': 'video/mp4', 'codecs': codecs, 'width': 1920, 'height': 1080,
+                           'frameRate': '30.000', 'frame_rate': '30.000', 'sar': '1:1', 'startWithSap': 1,
+                           'SegmentBase': {'Initialization': '0-1000', 'indexRange': '1001-2000'},
+                           'codecid': codecid})
+    audios = [{'id': audio_id, 'baseUrl': url, 'base_url': url, 'backupUrl': [url], 'backup_url': [url],
+               'bandwidth': 192_000, 'mimeType': 'audio/mp4', 'codecs': 'mp4a.40.2', 'codecid': 0}
+              for audio_id in (30280, 30232, 30216)]
+    data = {'quality': 80, 'format': 'flv720', 'timelength': 600000,
+            'accept_description': ['4K 超清', '1080P 60帧', '1080P 高码率', '1080P 高清', '720P 高清', '480P 清晰', '360P 流畅'],
+            'accept_quality': [120, 116, 112, 80, 64, 32, 16],
+            'dash': {'duration': 600, 'video': videos, 'audio': audios, 'dolby': None, 'flac': None}}
+    return json.dumps({'code': 0, 'message': '0', 'ttl': 1, 'data': data}, ensure_ascii=False).encode()
+
+
+def import_text(lines: int = 200) -> str:
+    """批量导入时常见的混合文本：裸BV号、av号、完整链接、分P链接、短链接和无关内容"""
+    samples = [
+        av_to_bv(170001),
+        "av170001",
+        f"https://www.bilibili.com/video/{av_to_bv(2)}?p=3&spm_id_from=333.1007",
+        f"【标题】 https://www.bilibili.com/video/{av_to_bv(3)}/ 分享自哔哩哔哩",
+        "https://b23.tv/abc123X",
+        "这一行没有任何链接，只是普通的说明文字",
+    ]
+    return "\n".join(samples[index % len(samples)] for index in range(lines))
+
+
+def run_benchmarks(number: int) -> List[Dict[str, Any]]:
+    mismatches = check_signatures()
+    if mismatches:
+        raise RuntimeError("WBI签名与旧实现不一致:\n" + "\n".join(mismatches))
+
+    wbi_keys = {'img_key': IMG_KEY, 'sub_key': SUB_KEY}
+    mixin_key = get_mixin_key(IMG_KEY, SUB_KEY)
+    payload = playurl_payload()
+    payload_text = payload.decode()
+    text = import_text()
+    bvid = av_to_bv(170001)
+
+    def sign_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        signed = dict(params, wts=int(time.time()))
+        signed['w_rid'] = wbi_sign(signed, mixin_key)
+        return signed
+
+    devnull = open(os.devnull, 'w')
+    cases: List[tuple] = [
+        ('wbi_sign.legacy.playurl', lambda: legacy_wbi_signature(wbi_keys, dict(PLAYURL_PARAMS)), number),
+        ('wbi_sign.optimized.playurl', lambda: sign_params(PLAYURL_PARAMS), number),
+        ('wbi_sign.legacy.search', lambda: legacy_wbi_signature(wbi_keys, dict(SEARCH_PARAMS)), number),
+        ('wbi_sign.optimized.search', lambda: sign_params(SEARCH_PARAMS), number),
+        ('wbi_mixin_key', lambda: get_mixin_key(IMG_KEY, SUB_KEY), number),
+        ('json.stdlib.playurl', lambda: json.loads(payload), max(1, number // 10)),
+        (f'json.{json_backend.JSON_BACKEND}.playurl', lambda: json_backend.loads(payload), max(1, number // 10)),
+        ('json.stdlib.playurl_str', lambda: json.loads(payload_text), max(1, number // 10)),
+        ('extract_links.200_lines', lambda: extract_links(text), max(1, number // 100)),
+        ('extract_links.single_bv', lambda: extract_links(bvid), number),
+        ('av_to_bv', lambda: av_to_bv(170001), number),
+        ('bv_to_av', lambda: bv_to_av(bvid), number),
+    ]
+
+    results = []
+    with contextlib.redirect_stdout(devnull):
+        for name, func, count in cases:
+            # 取3轮中最快的一轮，减少其他进程干扰
+            best = min(timeit.repeat(func, number=count, repeat=3))
+            results.append({'name': name, 'number': count, 'us_per_op': round(best / count * 1e6, 3),
+                            'ops_per_s': round(count / best) if best else None})
+    devnull.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接口层热点路径微基准测试")
+    parser.add_argument("--number", type=int, default=10000, help="每轮执行次数（JSON和批量提取按比例减少）")
+    parser.add_argument("--output", help="结果JSON文件")
+    args = parser.parse_args()
+
+    print(f"JSON后端: {json_backend.JSON_BACKEND}，播放地址响应大小: {len(playurl_payload()) / 1024:.1f}KB")
+    results = run_benchmarks(args.number)
+    for item in results:
+        print(f"{item['name']:<32} {item['us_per_op']:>10.2f} µs/op {item['ops_per_s']:>12} ops/s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'json_backend': json_backend.JSON_BACKEND, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+端到端下载性能测试 - 启动本地模拟服务器（backend/mock），按
+文件大小 × 并发数 × 数据块大小 × 延迟 × 丢包率 的组合驱动 VideoDownloader.download_video 批量下载，
+记录吞吐量(MB/s)、每GB的CPU时间、峰值内存、事件循环延迟和合并耗时，结果保存为JSON，可在不同提交间对比。
+
+用法:
+    python -m benchmarks.bench_download --sizes 20M,100M --concurrency 1,4 --output results.json
+    python -m benchmarks.bench_download --compare baseline.json results.json
+
+每个场景使用独立的模拟服务器进程和下载进程，CPU时间和峰值内存只统计下载进程。
+默认的合成媒体数据无法合并，合并步骤会被跳过；加 --real-media 时由ffmpeg生成测试片段并计入合并耗时。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，不统计峰值内存
+    resource = None
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 模拟服务器在画质80下选中的AVC视频流和最高音质音频流的码率，用于把文件大小换算成视频时长
+BENCH_QUALITY = 80
+STREAM_BITRATE = 2_500_000 + 192_000
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value or 0))
+
+
+def format_size(size: int) -> str:
+    for unit, factor in (('G', 1024 ** 3), ('M', 1024 ** 2), ('K', 1024)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def scenario_key(scenario: Dict[str, Any]) -> str:
+    return (f"size={format_size(scenario['size'])},videos={scenario['videos']},c={scenario['concurrency']},"
+            f"chunk={format_size(scenario['chunk_size'])},latency={scenario['latency']},loss={scenario['loss']}")
+
+
+# ---------------------------------------------------------------- 下载进程
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.01):
+    """记录事件循环的调度延迟：sleep实际耗时超出预期的部分"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前进程中执行一个场景（环境变量 BILIBILI_API_BASE 需已指向模拟服务器）"""
+    from video_downloader import VideoDownloader
+    from backend.utils.link_importer import av_to_bv
+    from backend.utils.merge_pool import merge_pool
+    from backend.utils.prefetch import MetadataPrefetcher
+
+    merge_times: List[float] = []
+
+    class BenchDownloader(VideoDownloader):
+        def merge_video_audio(self, video_file: str, audio_file: str, output_file: str) -> bool:
+            start = time.perf_counter()
+            try:
+                if scenario['merge']:
+                    return super().merge_video_audio(video_file, audio_file, output_file)
+                # 合成数据无法合并，只删除临时文件
+                self._cleanup_files(video_file, audio_file)
+                Path(output_file).touch()
+                return True
+            finally:
+                merge_times.append(time.perf_counter() - start)
+
+    output_dir = os.path.abspath("downloads")
+    downloader = BenchDownloader(cookie_file="bench_cookies.json")
+    downloader.cookies = {'SESSDATA': 'bench'}
+    downloader.user_id = 'bench'
+    if not await downloader.init_client():
+        raise RuntimeError("初始化下载器失败")
+
+    items = [{'bvid': av_to_bv(300000 + index), 'quality': BENCH_QUALITY, 'page': 1}
+             for index in range(scenario['videos'])]
+    concurrency = scenario['concurrency']
+    # 与TUI批量下载相同的调度方式
+    downloader.download_semaphore = asyncio.Semaphore(concurrency)
+    semaphore = asyncio.Semaphore(concurrency + merge_pool.max_workers)
+    prefetcher = MetadataPrefetcher(downloader, items, lookahead=concurrency * 2)
+    reports: List[Dict[str, Any]] = []
+
+    async def download_one(index: int) -> bool:
+        async with semaphore:
+            metadata = await prefetcher.get(index)
+            report: Dict[str, Any] = {}
+            success = metadata is not None and await downloader.download_video(
+                items[index]['bvid'], BENCH_QUALITY, output_dir, report=report, metadata=metadata
+            )
+            if success:
+                reports.append(report)
+            return success
+
+    lag_samples: List[float] = []
+    monitor = asyncio.get_running_loop().create_task(monitor_loop_lag(lag_samples))
+    cpu_start = time.process_time()
+    children_start = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    wall_start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(download_one(index) for index in range(len(items))))
+    finally:
+        wall = time.perf_counter() - wall_start
+        prefetcher.cancel()
+        monitor.cancel()
+        await downloader.close()
+    cpu = time.process_time() - cpu_start
+
+    downloaded = sum(stream.get('size', 0) for report in reports for stream in report.get('streams', {}).values())
+    gigabytes = downloaded / 1024 ** 3
+    result = {
+        'succeeded': sum(1 for ok in results if ok),
+        'failed': sum(1 for ok in results if not ok),
+        'bytes': downloaded,
+        'wall_seconds': round(wall, 3),
+        'mb_per_s': round(downloaded / 1024 ** 2 / wall, 2) if wall else 0.0,
+        'cpu_seconds': round(cpu, 3),
+        'cpu_seconds_per_gb': round(cpu / gigabytes, 3) if gigabytes else None,
+        'loop_lag_ms': {
+            'mean': round(sum(lag_samples) / len(lag_samples) * 1000, 2) if lag_samples else 0.0,
+            'p99': round(percentile(lag_samples, 0.99) * 1000, 2),
+            'max': round(max(lag_samples, default=0.0) * 1000, 2),
+        },
+        'merge_seconds': {
+            'total': round(sum(merge_times), 3),
+            'mean': round(sum(merge_times) / len(merge_times), 3) if merge_times else 0.0,
+            'max': round(max(merge_times, default=0.0), 3),
+        } if scenario['merge'] else None,
+    }
+    if resource:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        result['child_cpu_seconds'] = round(children.ru_utime + children.ru_stime
+                                            - children_start.ru_utime - children_start.ru_stime, 3)
+        # Linux 上 ru_maxrss 单位为KB，macOS 上为字节
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result['peak_rss_mb'] = round(maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+    return result
+
+
+# ---------------------------------------------------------------- 调度进程
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch_json(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def start_mock_server(scenario: Dict[str, Any], port: int, args) -> subprocess.Popen:
+    duration = max(1, round(scenario['size'] * 8 / STREAM_BITRATE))
+    command = [
+        sys.executable, '-m', 'backend.mock.server', '--port', str(port),
+        '--duration', str(duration), '--chunk-size', str(scenario['chunk_size']),
+        '--latency', str(scenario['latency']), '--drop-rate', str(scenario['loss']),
+        '--throughput', args.throughput, '--seed', str(args.seed)
+    ]
+    if scenario['merge']:
+        command.append('--real-media')
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"模拟服务器启动失败: {process.stderr.read().decode(errors='replace')}")
+        try:
+            fetch_json(f"http://127.0.0.1:{port}/mock/stats")
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("模拟服务器启动超时")
+
+
+def warm_up(port: int, timeout: float):
+    """提前请求一次测试用到的媒体文件，让模拟服务器生成数据（--real-media 时需要调用ffmpeg），不计入测试时间"""
+    base = f"http://127.0.0.1:{port}"
+    play = fetch_json(f"{base}/x/player/playurl?bvid=BV1warmup&cid=1&qn={BENCH_QUALITY}&fnval=16")
+    dash = play['data']['dash']
+    for stream in [s for s in dash['video'] if s['id'] == BENCH_QUALITY] + dash['audio']:
+        request = urllib.request.Request(stream['baseUrl'], method='HEAD')
+        urllib.request.urlopen(request, timeout=timeout).close()
+
+
+def run_isolated(scenario: Dict[str, Any], args) -> Dict[str, Any]:
+    """在独立的模拟服务器进程和下载进程中执行一个场景"""
+    port = free_port()
+    server = start_mock_server(scenario, port, args)
+    try:
+        warm_up(port, args.timeout)
+        with tempfile.TemporaryDirectory(prefix="bili_bench_") as workdir:
+            result_file = os.path.join(workdir, "result.json")
+            env = dict(os.environ, BILIBILI_API_BASE=f"http://127.0.0.1:{port}",
+                       PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+            # 下载进程在临时目录中运行，cookie文件、下载索引和下载结果都不会写入仓库
+            worker = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_download', '--worker', json.dumps(scenario),
+                 '--result-file', result_file],
+                cwd=workdir, env=env, timeout=args.timeout,
+                stdout=None if args.verbose else subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            if worker.returncode != 0:
+                raise RuntimeError(f"下载进程异常退出: {worker.stderr.decode(errors='replace')[-2000:]}")
+            with open(result_file, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        result['server'] = fetch_json(f"http://127.0.0.1:{port}/mock/stats")['data']
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def build_scenarios(args) -> List[Dict[str, Any]]:
+    matrix = itertools.product(
+        [parse_size(size) for size in args.sizes.split(',')],
+        [int(value) for value in args.concurrency.split(',')],
+        [parse_size(size) for size in args.chunk_sizes.split(',')],
+        [float(value) for value in args.latency.split(',')],
+        [float(value) for value in args.loss.split(',')],
+    )
+    return [
+        {'size': size, 'videos': args.videos, 'concurrency': concurrency, 'chunk_size': chunk_size,
+         'latency': latency, 'loss': loss, 'merge': args.real_media}
+        for size, concurrency, chunk_size, latency, loss in matrix
+    ]
+
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': int(time.time()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def print_result(key: str, result: Dict[str, Any]):
+    if 'error' in result:
+        print(f"{key}: 失败 - {result['error']}")
+        return
+    cpu_per_gb = result['cpu_seconds_per_gb']
+    merge = result['merge_seconds']
+    print(f"{key}: {result['mb_per_s']:.1f} MB/s, "
+          f"CPU {cpu_per_gb if cpu_per_gb is not None else '-'} s/GB, "
+          f"RSS {result.get('peak_rss_mb', '-')} MB, "
+          f"循环延迟 p99 {result['loop_lag_ms']['p99']} ms, "
+          f"合并 {merge['total'] if merge else '-'} s, "
+          f"成功 {result['succeeded']}/{result['succeeded'] + result['failed']}")
+
+
+def compare(baseline_file: str, current_file: str):
+    """按场景对比两次测试结果"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {item['key']: item for item in json.load(f)['results']}
+    with open(current_file, 'r', encoding='utf-8') as f:
+        current = json.load(f)['results']
+
+    def change(old: Optional[float], new: Optional[float]) -> str:
+        if not old or new is None:
+            return '-'
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    for item in current:
+        old = baseline.get(item['key'])
+        if old is None or 'error' in old or 'error' in item:
+            print(f"{item['key']}: 无可对比的结果")
+            continue
+        print(f"{item['key']}: MB/s {old['mb_per_s']} -> {item['mb_per_s']} ({change(old['mb_per_s'], item['mb_per_s'])}), "
+              f"CPU/GB {old['cpu_seconds_per_gb']} -> {item['cpu_seconds_per_gb']} "
+              f"({change(old['cpu_seconds_per_gb'], item['cpu_seconds_per_gb'])}), "
+              f"RSS {old.get('peak_rss_mb')} -> {item.get('peak_rss_mb')} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端下载性能测试")
+    parser.add_argument("--sizes", default="20M,100M", help="每个视频的大小（视频+音频），逗号分隔")
+    parser.add_argument("--concurrency", default="1,4", help="并发下载数，逗号分隔")
+    parser.add_argument("--chunk-sizes", default="64K", help="模拟服务器每次发送的数据块大小，逗号分隔")
+    parser.add_argument("--latency", default="0", help="每个请求的延迟（秒），逗号分隔")
+    parser.add_argument("--loss", default="0", help="媒体传输中途断开的概率，逗号分隔")
+    parser.add_argument("--videos", type=int, default=4, help="每个场景批量下载的视频数")
+    parser.add_argument("--throughput", default="0", help="模拟服务器单连接速率上限，0为不限")
+    parser.add_argument("--real-media", action="store_true", help="使用ffmpeg生成的测试片段并统计合并耗时")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=1800, help="单个场景的超时时间（秒）")
+    parser.add_argument("--startup-timeout", type=float, default=60, help="等待模拟服务器启动的时间（秒）")
+    parser.add_argument("--output", help="结果JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="显示下载进程的输出")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="对比两次测试结果")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.worker:
+        result = asyncio.run(run_scenario(json.loads(args.worker)))
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    results = []
+    for scenario in build_scenarios(args):
+        key = scenario_key(scenario)
+        try:
+            result = run_isolated(scenario, args)
+        except Exception as e:
+            result = {'error': str(e)}
+        print_result(key, result)
+        results.append({'key': key, 'scenario': scenario, **result})
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment_info(), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,22 @@
 import customtkinter as ctk
+import tkinter
 import asyncio
-import threading
 import os
-import re
 from pathlib import Path
 from video_downloader import VideoDownloader
+from backend.bilibili.account_pool import account_pool
+from backend.utils.download_index import video_key
+from backend.utils.link_importer import LinkImporter
+from backend.utils.loop_thread import AsyncLoopThread
+from backend.utils.merge_pool import merge_pool
+from backend.utils.prefetch import MetadataPrefetcher
+from backend.utils.profiler import profiler
+from backend.utils.progress import format_eta, format_speed, progress_aggregator
+from backend.utils.thumbnail_cache import thumbnail_cache
 import tempfile
 import base64
 from PIL import Image, ImageTk
 import io
-import httpx
 import random
 
 # 设置CTk主题
@@ -21,16 +28,282 @@ lucky_msg = ['祝你有美好的一天', '欢迎使用👋', '你好', 'Hello,Wo
 
 class VideoItem:
     """视频项目类，用于存储视频信息"""
-    def __init__(self, bvid, title="", cover_url="", cover_image=None):
+    def __init__(self, bvid, title="", cover_url="", cover_image=None, page=1):
         self.bvid = bvid
+        self.page = page
+        # 列表中的唯一键，同一视频的不同分P是不同的项目
+        self.key = video_key(bvid, page)
         self.title = title
         self.cover_url = cover_url
         self.cover_image = cover_image
         self.cover_photo = None
-        self.progress_bar = None
-        self.progress_label = None
-        self.status_label = None
-        self.list_item_frame = None
+        # 下载状态，卡片绑定到该项目时据此显示
+        self.status = "等待下载"
+        self.progress = 0.0
+
+
+class VideoCard:
+    """视频卡片，滚动时复用并重新绑定到不同的视频项目"""
+    
+    def __init__(self, parent, on_remove):
+        self.video = None
+        self.on_remove = on_remove
+        
+        self.frame = ctk.CTkFrame(parent, corner_radius=10)
+        self.frame.grid_columnconfigure(1, weight=1)
+        
+        # 封面区域
+        cover_frame = ctk.CTkFrame(self.frame, width=100, height=75, corner_radius=8)
+        cover_frame.grid(row=0, column=0, rowspan=2, padx=15, pady=15)
+        cover_frame.grid_propagate(False)
+        
+        # 占位标签和封面标签分开，切换时只改变显示的标签
+        self.cover_placeholder = ctk.CTkLabel(cover_frame, text="📷\n加载中", font=ctk.CTkFont(size=10))
+        self.cover_placeholder.place(relx=0.5, rely=0.5, anchor="center")
+        self.cover_label = ctk.CTkLabel(cover_frame, text="")
+        
+        # 信息区域
+        info_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        info_frame.grid(row=0, column=1, sticky="ew", padx=(0, 15), pady=(15, 5))
+        info_frame.grid_columnconfigure(0, weight=1)
+        
+        # 标题（卡片高度固定，标题只显示一行）
+        self.title_label = ctk.CTkLabel(
+            info_frame, 
+            text="获取中...", 
+            anchor="w", 
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        self.title_label.grid(row=0, column=0, sticky="ew")
+        
+        # BV号和操作按钮
+        bv_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+        bv_frame.grid(row=1, column=0, sticky="ew", pady=(5, 0))
+        bv_frame.grid_columnconfigure(0, weight=1)
+        
+        self.bvid_label = ctk.CTkLabel(
+            bv_frame, 
+            text="", 
+            anchor="w", 
+            font=ctk.CTkFont(size=12),
+            text_color=("gray60", "gray40")
+        )
+        self.bvid_label.grid(row=0, column=0, sticky="w")
+        
+        remove_button = ctk.CTkButton(
+            bv_frame,
+            text="🗑️",
+            width=30,
+            height=25,
+            corner_radius=12,
+            command=lambda: self.video and self.on_remove(self.video),
+            font=ctk.CTkFont(size=12)
+        )
+        remove_button.grid(row=0, column=1, sticky="e")
+        
+        # 进度区域
+        progress_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        progress_frame.grid(row=1, column=1, sticky="ew", padx=(0, 15), pady=(5, 15))
+        progress_frame.grid_columnconfigure(0, weight=1)
+        
+        # 进度条
+        self.progress_bar = ctk.CTkProgressBar(progress_frame, height=6, corner_radius=3)
+        self.progress_bar.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.progress_bar.set(0)
+        
+        # 进度信息
+        progress_info_frame = ctk.CTkFrame(progress_frame, fg_color="transparent")
+        progress_info_frame.grid(row=1, column=0, sticky="ew", pady=(5, 0))
+        progress_info_frame.grid_columnconfigure(1, weight=1)
+        
+        self.progress_label = ctk.CTkLabel(
+            progress_info_frame, 
+            text="0%", 
+            font=ctk.CTkFont(size=11),
+            width=40
+        )
+        self.progress_label.grid(row=0, column=0, sticky="w")
+        
+        self.status_label = ctk.CTkLabel(
+            progress_info_frame, 
+            text="等待下载",
+            font=ctk.CTkFont(size=11),
+            text_color=("gray60", "gray40")
+        )
+        self.status_label.grid(row=0, column=2, sticky="e")
+        
+        # 封面、标题只在变化时更新，避免每次滚动都重设图片
+        self._shown_photo = None
+        self._shown_title = None
+        
+    def bind_video(self, video):
+        """绑定到视频项目并显示其当前状态"""
+        self.video = video
+        self.bvid_label.configure(text=f"🎬 {video.bvid}" if video.page <= 1 else f"🎬 {video.bvid} P{video.page}")
+        self.refresh()
+        
+    def refresh(self):
+        """按绑定的视频项目刷新卡片内容"""
+        video = self.video
+        if video.cover_photo is not self._shown_photo:
+            if video.cover_photo:
+                self.cover_label.configure(image=video.cover_photo)
+                self.cover_placeholder.place_forget()
+                self.cover_label.place(relx=0.5, rely=0.5, anchor="center")
+            else:
+                self.cover_label.place_forget()
+                self.cover_placeholder.place(relx=0.5, rely=0.5, anchor="center")
+            self._shown_photo = video.cover_photo
+            
+        title = video.title if video.title else "获取中..."
+        if title != self._shown_title:
+            self.title_label.configure(text=title)
+            self._shown_title = title
+            
+        self.update_progress()
+        
+    def update_progress(self):
+        """只刷新进度和状态"""
+        video = self.video
+        self.progress_bar.set(video.progress)
+        self.progress_label.configure(text="100%" if video.progress >= 1.0 else f"{int(video.progress * 100)}%")
+        self.status_label.configure(text=video.status)
+
+
+class VirtualVideoList:
+    """虚拟化视频列表
+    
+    只为可见区域创建卡片（数量取决于列表高度，与视频总数无关），滚动时把卡片重新绑定到
+    对应位置的视频项目。以视频键记录当前绑定的卡片，单个视频变化时只刷新它所在的卡片，
+    不在可见区域内的视频只更新数据，滚动到时再显示。
+    """
+    
+    ROW_HEIGHT = 125
+    CARD_PADDING = 8
+    SCROLL_STEP = 40
+    
+    def __init__(self, parent, items, on_remove, height=300):
+        self.items = items
+        self.on_remove = on_remove
+        self.offset = 0
+        self.cards = []
+        # 视频键 -> 当前绑定的卡片
+        self.bound = {}
+        
+        self.frame = ctk.CTkFrame(parent, height=height, corner_radius=10)
+        self.frame.grid_propagate(False)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(0, weight=1)
+        
+        self.body = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew", padx=(5, 0), pady=5)
+        
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns", padx=(0, 5), pady=5)
+        
+        # 空列表提示
+        self.empty_label = ctk.CTkLabel(
+            self.body,
+            text="📝 暂无视频，请添加视频链接",
+            font=ctk.CTkFont(size=14),
+            text_color=("gray50", "gray50")
+        )
+        
+        self.body.bind("<Configure>", lambda event: self.render(), add="+")
+        self._bind_wheel(self.body)
+        self._bind_wheel(self.empty_label)
+        
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+        
+    def _bind_wheel(self, widget):
+        """为控件及其所有子控件绑定滚轮
+        
+        直接绑定在底层Tk控件上并返回"break"，避免外层滚动框架同时滚动。
+        """
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tkinter.Misc.bind(widget, sequence, self._on_mouse_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+            
+    def _on_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.offset - self.SCROLL_STEP)
+        elif event.num == 5 or event.delta < 0:
+            self.scroll_to(self.offset + self.SCROLL_STEP)
+        return "break"
+        
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self._content_height())
+        elif args[0] == "scroll":
+            step = self.body.winfo_height() if args[2] == "pages" else self.SCROLL_STEP
+            self.scroll_to(self.offset + int(args[1]) * step)
+            
+    def _content_height(self):
+        return len(self.items) * self.ROW_HEIGHT
+    
+    def scroll_to(self, offset):
+        max_offset = max(0, self._content_height() - self.body.winfo_height())
+        offset = int(min(max(offset, 0), max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+            
+    def render(self):
+        """按当前滚动位置放置卡片，列表结构变化（增删、清空）后调用"""
+        height = max(self.body.winfo_height(), 1)
+        # 数据减少后滚动位置可能越界
+        self.offset = min(self.offset, max(0, self._content_height() - height))
+        
+        if self.items:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, rely=0.5, anchor="center")
+            
+        # 可见行数 + 1 张卡片覆盖半行露出的情况
+        needed = min(len(self.items), height // self.ROW_HEIGHT + 2)
+        while len(self.cards) < needed:
+            card = VideoCard(self.body, self.on_remove)
+            self._bind_wheel(card.frame)
+            self.cards.append(card)
+            
+        first = self.offset // self.ROW_HEIGHT
+        self.bound = {}
+        for index, card in enumerate(self.cards):
+            item_index = first + index
+            if index >= needed or item_index >= len(self.items):
+                card.frame.place_forget()
+                card.video = None
+                continue
+                
+            video = self.items[item_index]
+            if card.video is not video:
+                card.bind_video(video)
+            self.bound[video.key] = card
+            card.frame.place(
+                x=self.CARD_PADDING,
+                y=item_index * self.ROW_HEIGHT - self.offset + self.CARD_PADDING,
+                relwidth=1.0,
+                width=-2 * self.CARD_PADDING,
+                height=self.ROW_HEIGHT - self.CARD_PADDING
+            )
+            
+        total = self._content_height()
+        if total > height:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
+            
+    def refresh(self, video, progress_only=False):
+        """刷新单个视频的卡片，不在可见区域时不做任何事"""
+        card = self.bound.get(video.key)
+        if card is None or card.video is not video:
+            return
+        if progress_only:
+            card.update_progress()
+        else:
+            card.refresh()
 
 
 class BilibiliVideoDownloaderGUI:
@@ -44,10 +317,16 @@ class BilibiliVideoDownloaderGUI:
         self.root.wm_attributes("-alpha", 0.98)
         
         # 下载器实例
-        self.downloader = VideoDownloader()
+        self.downloader = VideoDownloader(account_pool=account_pool)
         
-        # 下载线程
-        self.download_thread = None
+        # 后台事件循环：获取信息、登录、下载都提交到同一个事件循环，共享API客户端和连接
+        self.async_loop = AsyncLoopThread("gui-async")
+        self.async_loop.start()
+        # 在后台事件循环中创建，保证共享客户端只初始化一次
+        self._client_lock = None
+        
+        # 当前批量下载任务
+        self.download_future = None
         
         # 二维码相关
         self.qr_image = None
@@ -61,12 +340,53 @@ class BilibiliVideoDownloaderGUI:
         # 登录状态标签
         self.login_status_label = None
         
+        # 待写入状态文本框的消息 (文本, 是否替换最后一行)，每个轮询周期统一写入一次
+        self._pending_status = []
+        
         # 创建UI
         self.create_widgets()
         
         # 初始化完成后尝试加载已保存的cookies
         self.load_saved_cookies()
         
+        # 定期处理后台事件循环投递的结果
+        self.poll_async_results()
+        
+    def poll_async_results(self):
+        """在UI线程中执行后台协程的完成回调，并写入这段时间内产生的状态消息"""
+        self.async_loop.process_results()
+        self.flush_status()
+        self.root.after(50, self.poll_async_results)
+        
+    def ui(self, func, *args):
+        """从后台线程把界面操作交给UI线程执行"""
+        self.async_loop.call_soon(func, *args)
+        
+    async def _get_client(self):
+        """获取共享的API客户端（在后台事件循环中调用）
+        
+        已登录时使用下载器的客户端，未登录时创建匿名客户端，只用于获取公开的视频信息。
+        """
+        if self._client_lock is None:
+            self._client_lock = asyncio.Lock()
+        async with self._client_lock:
+            if self.downloader.client is None:
+                if not await self.downloader.init_client():
+                    from backend.bilibili.client import BilibiliClient
+                    self.downloader.client = BilibiliClient()
+                    await self.downloader.client.get_wbi_keys()
+            return self.downloader.client
+    
+    async def _reset_client(self):
+        """登录状态变化后关闭旧客户端，下次使用时重新初始化"""
+        if self._client_lock is None:
+            self._client_lock = asyncio.Lock()
+        async with self._client_lock:
+            client = self.downloader.client
+            self.downloader.client = None
+            if client:
+                await client.session.aclose()
+        
     def load_saved_cookies(self):
         """加载已保存的用户cookies"""
         try:
@@ -187,7 +507,7 @@ class BilibiliVideoDownloaderGUI:
         # 输入框
         self.url_entry = ctk.CTkEntry(
             entry_container,
-            placeholder_text="请输入Bilibili视频链接，例如: https://www.bilibili.com/video/BV1xx411c7mu",
+            placeholder_text="请输入视频链接、BV/av号、b23.tv短链接或合集/收藏夹链接，多个用空格分隔",
             height=40,
             font=ctk.CTkFont(size=14),
             corner_radius=20
@@ -195,6 +515,18 @@ class BilibiliVideoDownloaderGUI:
         self.url_entry.grid(row=0, column=0, sticky="ew", padx=(0, 15))
         self.url_entry.insert(0, "https://www.bilibili.com/video/BV1xx411c7mu")
         
+        # 导入文件按钮
+        import_button = ctk.CTkButton(
+            entry_container,
+            text="📂 导入文件",
+            command=self.import_links_from_file,
+            width=120,
+            height=40,
+            corner_radius=20,
+            font=ctk.CTkFont(size=14)
+        )
+        import_button.grid(row=0, column=2, padx=(10, 0))
+        
         # 添加按钮
         add_button = ctk.CTkButton(
             entry_container,
@@ -248,6 +580,31 @@ class BilibiliVideoDownloaderGUI:
         )
         self.quality_combo.pack(anchor="w")
         
+        # 仅音频模式
+        audio_frame = ctk.CTkFrame(quality_container, fg_color="transparent")
+        audio_frame.pack(anchor="w", pady=(10, 0))
+        
+        self.audio_only_var = ctk.BooleanVar(value=False)
+        self.audio_only_check = ctk.CTkCheckBox(
+            audio_frame,
+            text="🎵 仅下载音频",
+            variable=self.audio_only_var,
+            font=ctk.CTkFont(size=13)
+        )
+        self.audio_only_check.pack(side="left", padx=(0, 10))
+        
+        self.audio_format_var = ctk.StringVar(value="m4a")
+        self.audio_format_combo = ctk.CTkComboBox(
+            audio_frame,
+            values=["m4a", "flac"],
+            variable=self.audio_format_var,
+            width=90,
+            height=30,
+            corner_radius=15,
+            font=ctk.CTkFont(size=12)
+        )
+        self.audio_format_combo.pack(side="left")
+        
         # 输出目录设置
         output_container = ctk.CTkFrame(settings_frame, fg_color="transparent")
         output_container.grid(row=1, column=1, sticky="ew", padx=20, pady=(0, 20))
@@ -323,23 +680,14 @@ class BilibiliVideoDownloaderGUI:
         )
         clear_button.grid(row=0, column=2, padx=(10, 0))
         
-        # 创建滚动列表区域
-        self.list_scroll_frame = ctk.CTkScrollableFrame(
-            list_frame, 
-            height=300,
-            corner_radius=10
-        )
-        self.list_scroll_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
-        self.list_scroll_frame.grid_columnconfigure(0, weight=1)
-        
-        # 空列表提示
-        self.empty_list_label = ctk.CTkLabel(
-            self.list_scroll_frame,
-            text="📝 暂无视频，请添加视频链接",
-            font=ctk.CTkFont(size=14),
-            text_color=("gray50", "gray50")
+        # 创建虚拟化列表区域
+        self.video_list_view = VirtualVideoList(
+            list_frame,
+            self.video_list,
+            self.remove_video_from_list,
+            height=300
         )
-        self.empty_list_label.grid(row=0, column=0, pady=50)
+        self.video_list_view.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 20))
         
     def create_status_section(self, parent):
         """创建状态和控制区域"""
@@ -402,6 +750,26 @@ class BilibiliVideoDownloaderGUI:
         )
         self.download_button.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
         
+        # 性能分析开关，长时间批量下载时查看CPU耗在哪里
+        self.profile_switch = ctk.CTkSwitch(
+            control_frame,
+            text="性能分析",
+            command=self.toggle_profiler
+        )
+        self.profile_switch.grid(row=0, column=1, padx=(0, 20), pady=20)
+        if profiler.running:
+            self.profile_switch.select()
+        
+    def toggle_profiler(self):
+        """开启或停止采样性能分析，停止时输出火焰图可用的折叠栈文件"""
+        if self.profile_switch.get():
+            path = profiler.start()
+            self.append_status(f"🔬 已开启性能分析，结果每分钟写入 {path}")
+        else:
+            path = profiler.stop()
+            if path:
+                self.append_status(f"🔬 性能分析已停止，折叠栈文件: {path}")
+        
     def clear_video_list(self):
         """清空视频列表"""
         if not self.video_list:
@@ -412,211 +780,128 @@ class BilibiliVideoDownloaderGUI:
         self.append_status("🗑️ 已清空视频列表")
         
     def add_video_to_list(self):
-        """添加视频到下载列表"""
-        url = self.url_entry.get().strip()
-        if not url:
+        """解析输入框中的链接并添加到下载列表"""
+        text = self.url_entry.get().strip()
+        if not text:
             self.append_status("❌ 请输入视频链接!")
             return
             
-        # 提取BV号
-        bvid = self.extract_bv_id(url)
-        if not bvid:
-            self.append_status("❌ 无法从链接中提取BV号，请检查链接格式!")
-            return
-            
-        # 检查是否已存在
-        if any(video.bvid == bvid for video in self.video_list):
-            self.append_status(f"⚠️ 视频 {bvid} 已在下载列表中!")
-            return
-            
-        # 创建视频项目并添加到列表
-        video_item = VideoItem(bvid)
-        self.video_list.append(video_item)
-        
-        # 在后台线程中获取视频信息
-        thread = threading.Thread(target=self.fetch_video_info, args=(video_item,))
-        thread.daemon = True
-        thread.start()
-        
         # 清空输入框
         self.url_entry.delete(0, "end")
+        self.import_links(text.splitlines())
         
-        self.append_status(f"➕ 已添加视频 {bvid} 到下载列表，正在获取详细信息...")
-        self.update_video_list_ui()
-        
-    def extract_bv_id(self, url):
-        """从URL中提取BV号"""
-        patterns = [
-            r"BV[0-9A-Za-z]{10}",
-            r"bilibili\.com/video/(BV[0-9A-Za-z]{10})",
-        ]
+    def import_links_from_file(self):
+        """从文本文件批量导入链接"""
+        from tkinter import filedialog
+        path = filedialog.askopenfilename(filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                lines = f.readlines()
+        except OSError as e:
+            self.append_status(f"❌ 读取文件失败: {e}")
+            return
+        self.import_links(lines)
         
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(0) if match.group(0).startswith("BV") else match.group(1)
-                
-        return None
+    def import_links(self, lines):
+        """在后台事件循环中解析链接（短链接、合集、收藏夹需要请求网络）"""
+        self.append_status("🔍 正在解析链接...")
+        queued = [video.key for video in self.video_list]
         
-    def fetch_video_info(self, video_item):
-        """获取视频详细信息"""
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self._fetch_video_info_async(video_item))
-            loop.close()
-        except Exception as e:
-            self.append_status(f"❌ 获取视频 {video_item.bvid} 信息失败: {str(e)}")
-    
-    async def _fetch_video_info_async(self, video_item):
-        """异步获取视频详细信息"""
-        try:
-            from backend.bilibili.client import BilibiliClient
-            
-            client = BilibiliClient()
-            if self.downloader.cookies:
-                client.set_cookies(self.downloader.cookies)
-                await client.get_wbi_keys()
-            
-            video_info = await client.get_video_info(bvid=video_item.bvid)
-            
-            if video_info and video_info.get('code') == 0:
-                data = video_info['data']
-                video_item.title = data['title']
-                video_item.cover_url = data['pic']
-                
-                # 下载封面图片
-                async with httpx.AsyncClient() as httpx_client:
-                    response = await httpx_client.get(video_item.cover_url)
-                    if response.status_code == 200:
-                        image_data = response.content
-                        video_item.cover_image = Image.open(io.BytesIO(image_data))
-                        video_item.cover_image = video_item.cover_image.resize((100, 75), Image.LANCZOS)
-                        video_item.cover_photo = ImageTk.PhotoImage(video_item.cover_image)
-                
-                self.root.after(0, self.update_video_list_ui)
-                self.append_status(f"✅ 已获取视频 {video_item.bvid} 的详细信息")
-            else:
-                self.append_status(f"❌ 获取视频 {video_item.bvid} 信息失败: {video_info.get('message', '未知错误')}")
-                self.root.after(0, self.update_video_list_ui)
-        except Exception as e:
-            self.append_status(f"❌ 获取视频 {video_item.bvid} 信息时出错: {str(e)}")
-            self.root.after(0, self.update_video_list_ui)
-    
-    def update_video_list_ui(self):
-        """更新视频列表UI"""
-        # 清空当前列表显示
-        for widget in self.list_scroll_frame.winfo_children():
-            widget.destroy()
+        async def import_task():
+            client = await self._get_client()
+            return await LinkImporter(client).import_lines(lines, exclude=queued)
             
-        # 更新统计信息
-        self.list_stats_label.configure(text=f"共 {len(self.video_list)} 个视频")
+        self.async_loop.submit(import_task(), self._on_links_imported)
         
-        if not self.video_list:
-            # 显示空列表提示
-            self.empty_list_label = ctk.CTkLabel(
-                self.list_scroll_frame,
-                text="📝 暂无视频，请添加视频链接",
-                font=ctk.CTkFont(size=14),
-                text_color=("gray50", "gray50")
-            )
-            self.empty_list_label.grid(row=0, column=0, pady=50)
+    def _on_links_imported(self, result, error):
+        """链接解析完成，添加到下载列表（在UI线程中执行）"""
+        if error:
+            self.append_status(f"❌ 解析链接失败: {error}")
             return
-        
-        # 添加视频项到列表
-        for i, video in enumerate(self.video_list):
-            # 创建视频卡片
-            card = ctk.CTkFrame(self.list_scroll_frame, corner_radius=10)
-            card.grid(row=i, column=0, sticky="ew", padx=10, pady=8)
-            card.grid_columnconfigure(1, weight=1)
-            video.list_item_frame = card
             
-            # 封面区域
-            cover_frame = ctk.CTkFrame(card, width=100, height=75, corner_radius=8)
-            cover_frame.grid(row=0, column=0, rowspan=2, padx=15, pady=15)
-            cover_frame.grid_propagate(False)
+        for item in result["failed"]:
+            self.append_status(f"❌ 解析失败: {item.get('url') or item['type']} ({item['error']})")
             
-            if video.cover_photo:
-                cover_label = ctk.CTkLabel(cover_frame, image=video.cover_photo, text="")
-                cover_label.place(relx=0.5, rely=0.5, anchor="center")
-            else:
-                cover_label = ctk.CTkLabel(cover_frame, text="📷\n加载中", font=ctk.CTkFont(size=10))
-                cover_label.place(relx=0.5, rely=0.5, anchor="center")
-            
-            # 信息区域
-            info_frame = ctk.CTkFrame(card, fg_color="transparent")
-            info_frame.grid(row=0, column=1, sticky="ew", padx=(0, 15), pady=(15, 5))
-            info_frame.grid_columnconfigure(0, weight=1)
-            
-            # 标题
-            title_text = video.title if video.title else "获取中..."
-            title_label = ctk.CTkLabel(
-                info_frame, 
-                text=title_text, 
-                anchor="w", 
-                wraplength=400,
-                font=ctk.CTkFont(size=14, weight="bold")
-            )
-            title_label.grid(row=0, column=0, sticky="ew")
+        # 解析期间列表可能已经变化，再检查一次
+        existing = {video.key for video in self.video_list}
+        added = []
+        for video in result["videos"]:
+            key = video_key(video["bvid"], video["page"])
+            if key in existing:
+                continue
+            existing.add(key)
             
-            # BV号和操作按钮
-            bv_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
-            bv_frame.grid(row=1, column=0, sticky="ew", pady=(5, 0))
-            bv_frame.grid_columnconfigure(0, weight=1)
+            # 内存缓存中有封面时直接显示
+            video_item = VideoItem(video["bvid"], cover_image=thumbnail_cache.get_memory(video["bvid"]), page=video["page"])
+            if video_item.cover_image:
+                video_item.cover_photo = ImageTk.PhotoImage(video_item.cover_image)
+            self.video_list.append(video_item)
+            added.append(video_item)
             
-            bvid_label = ctk.CTkLabel(
-                bv_frame, 
-                text=f"🎬 {video.bvid}", 
-                anchor="w", 
-                font=ctk.CTkFont(size=12),
-                text_color=("gray60", "gray40")
-            )
-            bvid_label.grid(row=0, column=0, sticky="w")
-            
-            remove_button = ctk.CTkButton(
-                bv_frame,
-                text="🗑️",
-                width=30,
-                height=25,
-                corner_radius=12,
-                command=lambda v=video: self.remove_video_from_list(v),
-                font=ctk.CTkFont(size=12)
-            )
-            remove_button.grid(row=0, column=1, sticky="e")
-            
-            # 进度区域
-            progress_frame = ctk.CTkFrame(card, fg_color="transparent")
-            progress_frame.grid(row=1, column=1, sticky="ew", padx=(0, 15), pady=(5, 15))
-            progress_frame.grid_columnconfigure(0, weight=1)
-            
-            # 进度条
-            progress_bar = ctk.CTkProgressBar(progress_frame, height=6, corner_radius=3)
-            progress_bar.grid(row=0, column=0, sticky="ew", padx=(0, 10))
-            progress_bar.set(0)
-            video.progress_bar = progress_bar
-            
-            # 进度信息
-            progress_info_frame = ctk.CTkFrame(progress_frame, fg_color="transparent")
-            progress_info_frame.grid(row=1, column=0, sticky="ew", pady=(5, 0))
-            progress_info_frame.grid_columnconfigure(1, weight=1)
-            
-            progress_label = ctk.CTkLabel(
-                progress_info_frame, 
-                text="0%", 
-                font=ctk.CTkFont(size=11),
-                width=40
+        # 在后台事件循环中获取视频信息
+        for video_item in added:
+            self.async_loop.submit(
+                self._fetch_video_info_async(video_item),
+                lambda result, error, v=video_item: self._on_video_info_fetched(v, error)
             )
-            progress_label.grid(row=0, column=0, sticky="w")
-            video.progress_label = progress_label
-            
-            status_label = ctk.CTkLabel(
-                progress_info_frame, 
-                text="等待下载",
-                font=ctk.CTkFont(size=11),
-                text_color=("gray60", "gray40")
-            )
-            status_label.grid(row=0, column=2, sticky="e")
-            video.status_label = status_label
+            
+        skipped = result["duplicates"] + len(result["videos"]) - len(added)
+        message = f"➕ 已添加 {len(added)} 个视频到下载列表"
+        if skipped:
+            message += f"，跳过 {skipped} 个重复视频"
+        if result["downloaded"]:
+            message += f"，跳过 {result['downloaded']} 个已下载视频"
+        if not added and not skipped and not result["downloaded"] and not result["failed"]:
+            message = "❌ 未找到视频链接，请检查链接格式!"
+        self.append_status(message)
+        self.update_video_list_ui()
+        
+    async def _fetch_video_info_async(self, video_item):
+        """获取视频详细信息（在后台事件循环中执行）"""
+        # 磁盘缓存中有封面时先显示，不必等待视频信息
+        if video_item.cover_image is None:
+            video_item.cover_image = await thumbnail_cache.get_cached(video_item.bvid)
+            if video_item.cover_image is not None:
+                self.ui(self._show_cover, video_item)
+        
+        client = await self._get_client()
+        video_info = await client.get_video_info(bvid=video_item.bvid)
+        
+        if not video_info or video_info.get('code') != 0:
+            raise Exception(video_info.get('message', '未知错误') if video_info else '未知错误')
+            
+        data = video_info['data']
+        video_item.title = data['title']
+        video_item.cover_url = data['pic']
+        
+        # 封面与接口请求共用同一个客户端的连接池，解码和缩放在缩略图缓存的线程池中进行
+        if video_item.cover_image is None:
+            video_item.cover_image = await thumbnail_cache.get(video_item.bvid, video_item.cover_url, client.session)
+    
+    def _show_cover(self, video_item):
+        """显示已缓存的封面（在UI线程中执行）"""
+        if video_item.cover_image and not video_item.cover_photo:
+            # PhotoImage 只能在UI线程中创建
+            video_item.cover_photo = ImageTk.PhotoImage(video_item.cover_image)
+            self.video_list_view.refresh(video_item)
+    
+    def _on_video_info_fetched(self, video_item, error):
+        """视频信息获取完成（在UI线程中执行）"""
+        if error:
+            self.append_status(f"❌ 获取视频 {video_item.bvid} 信息失败: {error}")
+        else:
+            if video_item.cover_image and not video_item.cover_photo:
+                video_item.cover_photo = ImageTk.PhotoImage(video_item.cover_image)
+            self.append_status(f"✅ 已获取视频 {video_item.bvid} 的详细信息")
+        # 只刷新该视频所在的卡片
+        self.video_list_view.refresh(video_item)
+    
+    def update_video_list_ui(self):
+        """列表结构变化后更新视频列表UI（只重新放置可见区域的卡片）"""
+        self.list_stats_label.configure(text=f"共 {len(self.video_list)} 个视频")
+        self.video_list_view.render()
             
     def remove_video_from_list(self, video_item):
         """从下载列表中删除视频"""
@@ -635,118 +920,69 @@ class BilibiliVideoDownloaderGUI:
             
     def login(self):
         """执行登录操作"""
-        def login_task():
-            self.append_status("🔑 正在启动登录流程...")
-            try:
-                self.qr_login_gui()
-            except Exception as e:
-                self.append_status(f"❌ 登录过程中出现错误: {str(e)}")
-                self.update_login_status("登录失败", False)
-                
-        login_thread = threading.Thread(target=login_task)
-        login_thread.daemon = True
-        login_thread.start()
+        self.append_status("🔑 正在启动登录流程...")
+        self.async_loop.submit(self._qr_login_gui_async(), self._on_login_done)
         
-    def qr_login_gui(self):
-        """在GUI中执行二维码登录"""
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(self._qr_login_gui_async())
-            loop.close()
-            
-            if result:
-                self.append_status("✅ 登录成功!")
-                self.update_login_status("已登录", True)
-            else:
-                self.append_status("❌ 登录失败!")
-                self.update_login_status("登录失败", False)
-        except Exception as e:
-            self.append_status(f"❌ 登录过程中出现错误: {str(e)}")
+    def _on_login_done(self, result, error):
+        """登录流程结束（在UI线程中执行）"""
+        if error:
+            self.append_status(f"❌ 登录过程中出现错误: {str(error)}")
+            self.update_login_status("登录失败", False)
+        elif result:
+            self.append_status("✅ 登录成功!")
+            self.update_login_status("已登录", True)
+        else:
+            self.append_status("❌ 登录失败!")
             self.update_login_status("登录失败", False)
     
     async def _qr_login_gui_async(self):
-        """异步执行二维码登录并在GUI中显示二维码"""
+        """异步执行二维码登录并在GUI中显示二维码（在后台事件循环中执行，界面操作交给UI线程）"""
         try:
-            from backend.bilibili.auth import BilibiliAuth
+            from backend.bilibili.qr_login import qr_login_manager
             
-            async with BilibiliAuth() as auth:
-                self.append_status("📱 正在生成二维码...")
-                qr_data = await auth.login_with_qr()
-                
-                if qr_data['status'] != 'qr_ready':
-                    self.append_status(f"❌ 获取二维码失败: {qr_data['message']}")
-                    return False
-                
-                # 显示二维码到GUI
-                qr_image_data = qr_data['qr_image']
-                qrcode_key = qr_data['qrcode_key']
-                
-                header, encoded = qr_image_data.split(",", 1)
-                qr_bytes = base64.b64decode(encoded)
-                image = Image.open(io.BytesIO(qr_bytes))
-                
-                self.show_qr_code(image)
-                self.append_status("📱 请使用Bilibili手机客户端扫描二维码")
-                
-                # 轮询检查扫码状态
-                max_attempts = 100
-                attempt = 0
-                
-                while attempt < max_attempts:
-                    status = await auth.check_qr_status(qrcode_key)
-                    
-                    if status['status'] == 'success':
-                        self.append_status("✅ 登录成功!")
-                        self.close_qr_window()
-                        
-                        cookies = status['cookies']
-                        user_info = await self._get_user_info_with_cookies(cookies)
-                        user_id = user_info.get('mid', 'unknown_user')
-                        
-                        from backend.utils.cookie_manager import cookie_manager
-                        cookie_manager.save_cookies(user_id, cookies, user_info)
-                        
-                        self.downloader.cookies = cookies
-                        self.append_status(f"👤 已保存用户: {user_info.get('uname', user_id)}")
-                        return True
-                        
-                    elif status['status'] == 'waiting':
-                        self.append_status("⏳ 等待扫码...", replace_last=True)
-                    elif status['status'] == 'scanned':
-                        self.append_status("📱 已扫码，等待确认...", replace_last=True)
-                    elif status['status'] == 'expired':
-                        self.append_status("⏰ 二维码已过期，请重新登录")
-                        self.close_qr_window()
-                        return False
-                    else:
-                        self.append_status(f"❌ 登录出错: {status['message']}")
-                        self.close_qr_window()
-                        return False
-                    
-                    attempt += 1
-                    await asyncio.sleep(3)
-                
-                self.append_status("⏰ 登录超时，请重新登录")
-                self.close_qr_window()
+            self.ui(self.append_status, "📱 正在生成二维码...")
+            try:
+                session = await qr_login_manager.create()
+            except Exception as e:
+                self.ui(self.append_status, f"❌ 获取二维码失败: {e}")
                 return False
-        except Exception as e:
-            self.append_status(f"❌ 扫码登录异常: {str(e)}")
-            self.close_qr_window()
+            
+            # 显示二维码到GUI
+            header, encoded = session.qr_image.split(",", 1)
+            qr_bytes = base64.b64decode(encoded)
+            image = Image.open(io.BytesIO(qr_bytes))
+            
+            self.ui(self.show_qr_code, image)
+            self.ui(self.append_status, "📱 请使用Bilibili手机客户端扫描二维码")
+            
+            def on_status(status):
+                if status['status'] == 'waiting':
+                    self.ui(self.append_status, "⏳ 等待扫码...", True)
+                elif status['status'] == 'scanned':
+                    self.ui(self.append_status, "📱 已扫码，等待确认...", True)
+            
+            # 扫码状态由管理器按自适应间隔轮询，状态变化时才返回
+            status = await qr_login_manager.wait(session.qrcode_key, on_status)
+            self.ui(self.close_qr_window)
+            
+            if status['status'] == 'success':
+                # 管理器已获取用户信息并保存cookies
+                self.downloader.cookies = status['cookies']
+                self.downloader.user_id = status['user_id']
+                # 使用新的登录信息重新初始化共享客户端
+                await self._reset_client()
+                user_info = status['user_info']
+                self.ui(self.append_status, f"👤 已保存用户: {user_info.get('uname', status['user_id'])}")
+                return True
+            elif status['status'] == 'expired':
+                self.ui(self.append_status, "⏰ 二维码已过期，请重新登录")
+            else:
+                self.ui(self.append_status, f"❌ 登录出错: {status['message']}")
             return False
-    
-    async def _get_user_info_with_cookies(self, cookies: dict):
-        """使用cookies获取用户信息"""
-        try:
-            from backend.bilibili.client import BilibiliClient
-            client = BilibiliClient()
-            client.set_cookies(cookies)
-            await client.get_wbi_keys()
-            user_info = await client.get_user_info()
-            return user_info
         except Exception as e:
-            self.append_status(f"❌ 获取用户信息失败: {str(e)}")
-            return {}
+            self.ui(self.append_status, f"❌ 扫码登录异常: {str(e)}")
+            self.ui(self.close_qr_window)
+            return False
     
     def show_qr_code(self, image: Image.Image):
         """在新窗口中显示二维码"""
@@ -864,18 +1100,25 @@ class BilibiliVideoDownloaderGUI:
                 self.login_button.configure(text="🔑 扫码登录")
         
     def append_status(self, text, replace_last=False):
-        """向状态文本框添加文本"""
-        if replace_last:
-            self.status_textbox.delete("end-1c linestart", "end-1c")
-        
+        """向状态文本框添加文本
+
+        只记录消息，由 flush_status 在下一个轮询周期统一写入，批量导入时大量消息只触发一次界面刷新。
+        """
         # 添加时间戳
         import datetime
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        formatted_text = f"[{timestamp}] {text}\n"
+        self._pending_status.append((f"[{timestamp}] {text}\n", replace_last))
         
-        self.status_textbox.insert("end", formatted_text)
+    def flush_status(self):
+        """把待写入的状态消息写入文本框"""
+        if not self._pending_status:
+            return
+        pending, self._pending_status = self._pending_status, []
+        for formatted_text, replace_last in pending:
+            if replace_last:
+                self.status_textbox.delete("end-1c linestart", "end-1c")
+            self.status_textbox.insert("end", formatted_text)
         self.status_textbox.see("end")
-        self.root.update()
         
     def start_download(self):
         """开始下载视频"""
@@ -891,6 +1134,9 @@ class BilibiliVideoDownloaderGUI:
         if not output_dir:
             output_dir = "./downloads"
             
+        audio_only = self.audio_only_var.get()
+        audio_format = self.audio_format_var.get()
+            
         # 更新下载按钮状态
         self.download_button.configure(state="disabled", text="⏳ 下载中...")
         
@@ -898,112 +1144,140 @@ class BilibiliVideoDownloaderGUI:
         self.overall_progress_bar.set(0)
         self.overall_progress_label.configure(text=f"总体进度: 0/{len(self.video_list)}")
         
-        # 在后台线程中执行下载
-        self.download_thread = threading.Thread(
-            target=self.download_videos, 
-            args=(quality, output_dir)
+        # 在后台事件循环中执行下载
+        self.download_future = self.async_loop.submit(
+            self.download_videos(quality, output_dir, audio_only, audio_format),
+            self._on_download_finished
         )
-        self.download_thread.daemon = True
-        self.download_thread.start()
         
-    def download_videos(self, quality, output_dir):
-        """在后台线程中下载所有视频"""
-        try:
-            total_videos = len(self.video_list)
-            self.append_status(f"🚀 开始下载 {total_videos} 个视频...")
-            
-            import concurrent.futures
-            max_workers = min(3, total_videos)
+    async def download_videos(self, quality, output_dir, audio_only=False, audio_format="m4a"):
+        """下载所有视频（在后台事件循环中执行，界面操作交给UI线程）"""
+        videos = list(self.video_list)
+        # 任务ID -> 视频项目
+        job_items = {video.key: video for video in videos}
+        
+        def on_progress(snapshot):
+            """由进度聚合器按固定频率调用，每个周期只向UI线程投递一次刷新"""
+            active = [item for item in snapshot if item['job_id'] in job_items and not item['finished']]
+            if active:
+                self.ui(self.apply_progress_snapshot, active, job_items)
+        
+        progress_aggregator.subscribe(on_progress)
+        
+        total_videos = len(videos)
+        success_count = 0
+        completed_count = 0
+        self.ui(self.append_status, f"🚀 开始下载 {total_videos} 个视频...")
+        
+        # 同时下载最多3个视频；合并不占下载名额，额外允许合并池大小的任务在合并
+        max_downloads = min(3, total_videos)
+        self.downloader.download_semaphore = asyncio.Semaphore(max_downloads)
+        semaphore = asyncio.Semaphore(max_downloads + merge_pool.max_workers)
+        # 提前获取后续视频的信息和播放地址，槽位空出时无需等待接口请求
+        prefetcher = MetadataPrefetcher(
+            self.downloader,
+            [{'bvid': video.bvid, 'page': video.page, 'quality': quality} for video in videos],
+            lookahead=max_downloads * 2
+        )
+        
+        async def download_single_video(index, video_item):
+            """下载单个视频"""
+            nonlocal success_count, completed_count
             
-            def download_single_video(video_item):
-                """下载单个视频"""
-                self.root.after(0, lambda: self.update_video_status(video_item, "准备下载...", 0))
-                
-                async def download_task():
-                    init_result = await self.downloader.init_client()
-                    if not init_result:
-                        self.root.after(0, lambda: self.update_video_status(video_item, "初始化失败", 0))
-                        return False
-                    
-                    def progress_callback(status, progress):
-                        self.root.after(0, lambda: self.update_video_status(video_item, status, progress))
-                    
-                    success = await self.downloader.download_video(
-                        video_item.bvid, quality, output_dir, progress_callback
-                    )
-                    return success
+            async with semaphore:
+                self.ui(self.update_video_status, video_item, "准备下载...", 0)
+                job_progress = progress_aggregator.create_job(video_item.key, video_item.title)
                 
                 try:
-                    result = asyncio.run(download_task())
-                    return video_item, result
-                except Exception as e:
-                    self.root.after(0, lambda: self.update_video_status(video_item, f"错误: {str(e)}", 0))
-                    return video_item, False
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_video = {
-                    executor.submit(download_single_video, video): video 
-                    for video in self.video_list
-                }
-                
-                success_count = 0
-                completed_count = 0
-                
-                for future in concurrent.futures.as_completed(future_to_video):
-                    video_item, success = future.result()
-                    completed_count += 1
-                    
+                    metadata = await prefetcher.get(index)
+                    success = metadata is not None and await self.downloader.download_video(
+                        video_item.bvid, quality, output_dir, job_progress,
+                        audio_only=audio_only, audio_format=audio_format, page=video_item.page,
+                        metadata=metadata
+                    )
+                    job_progress.finish(success)
                     if success:
                         success_count += 1
-                        self.root.after(0, lambda v=video_item: self.update_video_status(v, "✅ 下载完成", 1.0))
+                        self.ui(self.update_video_status, video_item, "✅ 下载完成", 1.0)
                     else:
-                        self.root.after(0, lambda v=video_item: self.update_video_status(v, "❌ 下载失败", 0))
-                    
-                    # 更新总体进度
-                    overall_progress = completed_count / total_videos
-                    self.root.after(0, lambda p=overall_progress, c=completed_count, t=total_videos: (
-                        self.overall_progress_bar.set(p),
-                        self.overall_progress_label.configure(text=f"总体进度: {c}/{t}")
-                    ))
-                
-                # 显示最终结果
-                if success_count == total_videos:
-                    self.root.after(0, lambda: self.append_status(f"🎉 全部下载完成! {success_count}/{total_videos} 个视频下载成功"))
-                else:
-                    self.root.after(0, lambda: self.append_status(f"📊 下载完成: {success_count}/{total_videos} 个视频下载成功"))
+                        self.ui(self.update_video_status, video_item, "❌ 下载失败", 0)
+                except Exception as e:
+                    job_progress.finish(False)
+                    self.ui(self.update_video_status, video_item, f"错误: {str(e)}", 0)
                 
-        except Exception as e:
-            self.append_status(f"❌ 下载过程中出现错误: {str(e)}")
-        finally:
-            # 重新启用下载按钮
-            def reset_button():
-                if self.download_button.winfo_exists():
-                    self.download_button.configure(state="normal", text="🚀 开始下载")
+                # 更新总体进度
+                completed_count += 1
+                self.ui(self.update_overall_progress, completed_count, total_videos)
+        
+        try:
+            # 下载需要登录，未登录时共享客户端只是匿名客户端
+            if not self.downloader.cookies:
+                if not self.downloader.load_cookies():
+                    self.ui(self.append_status, "❌ 初始化下载器失败，请先登录")
+                    for video_item in videos:
+                        self.ui(self.update_video_status, video_item, "初始化失败", 0)
+                    return 0, total_videos
+                await self._reset_client()
+            await self._get_client()
             
-            self.root.after(0, reset_button)
+            await asyncio.gather(*(download_single_video(index, video) for index, video in enumerate(videos)))
+            return success_count, total_videos
+        finally:
+            prefetcher.cancel()
+            self.downloader.download_semaphore = None
+            progress_aggregator.unsubscribe(on_progress)
+            for job_id in job_items:
+                progress_aggregator.remove_job(job_id)
+    
+    def update_overall_progress(self, completed_count, total_videos):
+        """更新总体进度"""
+        self.overall_progress_bar.set(completed_count / total_videos)
+        self.overall_progress_label.configure(text=f"总体进度: {completed_count}/{total_videos}")
+    
+    def _on_download_finished(self, result, error):
+        """批量下载结束（在UI线程中执行）"""
+        self.download_future = None
+        if error:
+            self.append_status(f"❌ 下载过程中出现错误: {str(error)}")
+        else:
+            success_count, total_videos = result
+            if success_count == total_videos:
+                self.append_status(f"🎉 全部下载完成! {success_count}/{total_videos} 个视频下载成功")
+            else:
+                self.append_status(f"📊 下载完成: {success_count}/{total_videos} 个视频下载成功")
+        
+        # 重新启用下载按钮
+        if self.download_button.winfo_exists():
+            self.download_button.configure(state="normal", text="🚀 开始下载")
             
+    def apply_progress_snapshot(self, snapshot, job_items):
+        """在UI线程中应用一次进度快照"""
+        for item in snapshot:
+            video_item = job_items.get(item['job_id'])
+            if video_item:
+                status = f"{item['status']} {format_speed(item['speed'])} 剩余 {format_eta(item['eta'])}"
+                self.update_video_status(video_item, status, item['percent'])
+        
     def update_video_status(self, video_item, status, progress):
         """更新视频下载状态和进度"""
+        video_item.status = status
+        video_item.progress = progress
         try:
-            if video_item.progress_bar and video_item.progress_bar.winfo_exists():
-                video_item.progress_bar.set(progress)
-                
-            if video_item.progress_label and video_item.progress_label.winfo_exists():
-                if progress >= 1.0:
-                    video_item.progress_label.configure(text="100%")
-                else:
-                    video_item.progress_label.configure(text=f"{int(progress * 100)}%")
-                    
-            if video_item.status_label and video_item.status_label.winfo_exists():
-                video_item.status_label.configure(text=status)
+            self.video_list_view.refresh(video_item, progress_only=True)
         except Exception as e:
             pass  # 忽略UI更新错误
     
     def run(self):
         """运行GUI应用"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.async_loop.stop()
+            profiler.stop()
 
 
 if __name__ == "__main__":
+    # BILI_PROFILE=1 时启动即开启性能分析，也可以用 SIGUSR1 开关
+    profiler.setup()
     app = BilibiliVideoDownloaderGUI()
     app.run()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('httpx')
+
+from backend.bilibili.account_pool import AccountPool, is_risk_control  # noqa: E402
+
+
+class FakeCookieManager:
+    def __init__(self, users):
+        self.users = users
+
+    def subscribe(self, callback):
+        pass
+
+    def get_all_users(self):
+        return {user_id: {'user_info': {'uname': user_id, 'vipStatus': int(vip)}}
+                for user_id, vip in self.users.items()}
+
+    def get_cookies(self, user_id):
+        return {'SESSDATA': user_id}
+
+
+def pool(users, **kwargs) -> AccountPool:
+    return AccountPool(FakeCookieManager(users), **kwargs)
+
+
+def acquire(account_pool: AccountPool, need_vip: bool = False, exclude=None):
+    return asyncio.run(account_pool.acquire(need_vip, exclude))
+
+
+def test_is_risk_control():
+    assert is_risk_control({'code': -412})
+    assert is_risk_control({'code': -1, 'message': 'HTTP 412'})
+    assert not is_risk_control({'code': 0})
+    assert not is_risk_control({'code': -404})
+
+
+def test_round_robin_prefers_normal_accounts():
+    accounts = pool({'a': False, 'b': False, 'vip': True})
+    assert [acquire(accounts).user_id for _ in range(4)] == ['a', 'b', 'a', 'b']
+
+
+def test_vip_requests_go_to_vip_accounts():
+    accounts = pool({'a': False, 'vip': True})
+    assert acquire(accounts, need_vip=True).user_id == 'vip'
+    # 没有大会员账号时退回普通账号
+    assert acquire(pool({'a': False}), need_vip=True).user_id == 'a'
+
+
+def test_quota_falls_back_to_other_accounts():
+    accounts = pool({'a': False, 'vip': True}, quota=1)
+    assert acquire(accounts).user_id == 'a'
+    assert acquire(accounts).user_id == 'vip'
+    ready = accounts._next_available_time(set())
+    assert ready == pytest.approx(time.time() + accounts.window, abs=1)
+
+
+def test_risk_control_cooldown_doubles():
+    accounts = pool({'a': False, 'b': False}, cooldown=10, max_cooldown=15)
+    account = acquire(accounts)
+    accounts.report(account, {'code': -412})
+    assert account.cooldown_until == pytest.approx(time.time() + 10, abs=1)
+    assert acquire(accounts).user_id == 'b'
+    accounts.report(account, {'code': -352})
+    assert account.cooldown_until == pytest.approx(time.time() + 15, abs=1)
+    accounts.report(account, {'code': 0})
+    assert account.risk_hits == 0
+
+
+def test_no_accounts():
+    assert acquire(pool({})) is None
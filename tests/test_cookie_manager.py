@@ -0,0 +1,37 @@
+import json
+
+from backend.utils.cookie_manager import CookieManager
+
+
+def test_save_and_reload(tmp_path):
+    cookie_file = tmp_path / 'user_cookies.json'
+    CookieManager(str(cookie_file)).save_cookies('1', {'SESSDATA': 'a'}, {'uname': 'one'})
+    CookieManager(str(cookie_file)).save_cookies('2', {'SESSDATA': 'b'}, {'uname': 'two'})
+
+    manager = CookieManager(str(cookie_file))
+    assert set(manager.get_all_users()) == {'1', '2'}
+    assert manager.get_cookies('2') == {'SESSDATA': 'b'}
+
+
+def test_corrupt_file_is_kept_as_backup(tmp_path):
+    cookie_file = tmp_path / 'user_cookies.json'
+    cookie_file.write_text('{"1": {"cookies": ', encoding='utf-8')
+
+    manager = CookieManager(str(cookie_file))
+    assert manager.save_cookies('2', {'SESSDATA': 'b'})
+
+    backups = list(tmp_path.glob('user_cookies.json.corrupt-*'))
+    assert len(backups) == 1
+    assert backups[0].read_text(encoding='utf-8') == '{"1": {"cookies": '
+    assert set(json.loads(cookie_file.read_text(encoding='utf-8'))) == {'2'}
+
+
+def test_unreadable_file_is_not_overwritten(tmp_path):
+    # 目录无法作为文件读取，模拟读取失败
+    cookie_file = tmp_path / 'user_cookies.json'
+    cookie_file.mkdir()
+
+    manager = CookieManager(str(cookie_file))
+    assert not manager.save_cookies('2', {'SESSDATA': 'b'})
+    assert cookie_file.is_dir()
+    assert not list(tmp_path.glob('*.corrupt-*'))
@@ -0,0 +1,58 @@
+import asyncio
+
+from backend.utils.disk_space import DiskSpaceManager, estimate_dash_size
+
+MB = 1024 * 1024
+
+
+def manager(free: int, min_free: int = 100 * MB) -> DiskSpaceManager:
+    result = DiskSpaceManager(min_free_bytes=min_free, poll_interval=0.01)
+    result.get_free_space = lambda path: free
+    return result
+
+
+def test_estimate_dash_size():
+    # (2Mbps + 128kbps) * 60秒 / 8，加5%余量
+    size = estimate_dash_size({'bandwidth': 2000000}, {'bandwidth': 128000}, 60000)
+    assert size == int(2128000 * 60 / 8 * 1.05)
+    assert estimate_dash_size(None, None, 60000) == 0
+
+
+def test_reservations_share_free_space(tmp_path):
+    disk = manager(free=1000 * MB)
+    first = disk.try_reserve(str(tmp_path), 500 * MB)
+    assert first
+    assert disk.get_reserved_space(str(tmp_path)) == 500 * MB
+    # 剩余 1000 - 500 - 100 = 400MB
+    assert disk.try_reserve(str(tmp_path), 401 * MB) is None
+    second = disk.try_reserve(str(tmp_path), 400 * MB)
+    assert second
+
+    disk.release(first)
+    disk.release(first)
+    disk.release(None)
+    assert disk.get_reserved_space(str(tmp_path)) == 400 * MB
+
+
+def test_reserve_fails_without_reservations_to_wait_for(tmp_path):
+    disk = manager(free=1000 * MB)
+    assert asyncio.run(disk.reserve(str(tmp_path), 2000 * MB)) is None
+
+
+def test_reserve_waits_for_release(tmp_path):
+    disk = manager(free=1000 * MB)
+    token = disk.try_reserve(str(tmp_path), 800 * MB)
+    waits = []
+
+    async def main():
+        async def release_later():
+            await asyncio.sleep(0.05)
+            disk.release(token)
+
+        task = asyncio.ensure_future(release_later())
+        result = await disk.reserve(str(tmp_path), 500 * MB, on_wait=lambda need, available: waits.append((need, available)))
+        await task
+        return result
+
+    assert asyncio.run(main())
+    assert waits and waits[0] == (500 * MB, 100 * MB)
@@ -0,0 +1,93 @@
+import hashlib
+import struct
+import zlib
+
+import pytest
+
+from backend.utils.integrity import StreamVerifier
+
+
+def box(box_type: bytes, payload: bytes = b'') -> bytes:
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+
+def large_box(box_type: bytes, payload: bytes = b'') -> bytes:
+    """size为1、使用64位largesize的box"""
+    return struct.pack('>I', 1) + box_type + struct.pack('>Q', 16 + len(payload)) + payload
+
+
+def fmp4(*segments: bytes) -> bytes:
+    return box(b'ftyp', b'iso6' + b'\0' * 4) + box(b'moov', b'\0' * 32) + b''.join(segments)
+
+
+def verify(data: bytes, chunk_size: int = 0, **kwargs):
+    verifier = StreamVerifier(check_boxes=True, **kwargs)
+    chunk_size = chunk_size or len(data) or 1
+    for start in range(0, len(data), chunk_size):
+        verifier.update(data[start:start + chunk_size])
+    return verifier.result()
+
+
+@pytest.mark.parametrize('chunk_size', [0, 1, 3, 7, 16])
+def test_complete_fmp4(chunk_size):
+    data = fmp4(box(b'moof', b'\0' * 20), box(b'mdat', b'x' * 100))
+    check = verify(data, chunk_size)['box_check']
+    assert check['ok'], check['error']
+    assert check['boxes'] == {'ftyp': 1, 'moov': 1, 'moof': 1, 'mdat': 1}
+
+
+@pytest.mark.parametrize('chunk_size', [0, 1, 5])
+def test_truncated_mdat(chunk_size):
+    data = fmp4(box(b'moof', b'\0' * 20), box(b'mdat', b'x' * 100))[:-10]
+    check = verify(data, chunk_size)['box_check']
+    assert not check['ok']
+    assert '不符' in check['error']
+
+
+def test_truncated_in_box_header():
+    data = fmp4(box(b'mdat', b'x' * 10)) + b'\0\0\0\x10mo'
+    check = verify(data)['box_check']
+    assert not check['ok']
+    assert 'box头' in check['error']
+
+
+@pytest.mark.parametrize('chunk_size', [0, 1, 4, 9, 12])
+def test_largesize_box(chunk_size):
+    data = fmp4(large_box(b'mdat', b'y' * 50), box(b'moof', b'\0' * 8))
+    check = verify(data, chunk_size)['box_check']
+    assert check['ok'], check['error']
+    assert check['boxes'] == {'ftyp': 1, 'moov': 1, 'mdat': 1, 'moof': 1}
+
+
+def test_truncated_largesize_box():
+    data = fmp4(large_box(b'mdat', b'y' * 50))[:-1]
+    check = verify(data, 5)['box_check']
+    assert not check['ok']
+
+
+def test_box_until_eof():
+    data = fmp4(struct.pack('>I', 0) + b'mdat' + b'z' * 30)
+    check = verify(data, 7)['box_check']
+    assert check['ok'], check['error']
+
+
+def test_invalid_box_size():
+    data = fmp4(struct.pack('>I', 4) + b'mdat' + b'z' * 30)
+    check = verify(data)['box_check']
+    assert not check['ok']
+    assert 'mdat' in check['error']
+
+
+def test_missing_required_boxes():
+    assert verify(box(b'moov') + box(b'mdat', b'x'))['box_check']['error'] == "文件不是以ftyp box开头"
+    assert 'moov' in verify(box(b'ftyp') + box(b'mdat', b'x'))['box_check']['error']
+
+
+def test_hashes_do_not_depend_on_chunking():
+    data = bytes(range(256)) * 40
+    expected = verify(data, range_size=1000)
+    assert expected['sha256'] == hashlib.sha256(data).hexdigest()
+    assert expected['range_crc32'][0] == f"{zlib.crc32(data[:1000]):08x}"
+    assert len(expected['range_crc32']) == 11
+    for chunk_size in (1, 999, 1000, 1001, 4096):
+        assert verify(data, chunk_size, range_size=1000) == expected
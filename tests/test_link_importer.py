@@ -0,0 +1,93 @@
+import pytest
+
+from backend.utils.link_importer import av_to_bv, bv_to_av, extract_links
+
+
+# 公开的av号与BV号对照
+KNOWN_PAIRS = [
+    (170001, 'BV17x411w7KC'),
+    (455017605, 'BV1Q541167Qg'),
+    (882584971, 'BV1mK4y1C7Bz'),
+]
+
+
+@pytest.mark.parametrize('aid, bvid', KNOWN_PAIRS)
+def test_av_to_bv_known_pairs(aid, bvid):
+    assert av_to_bv(aid) == bvid
+
+
+@pytest.mark.parametrize('aid, bvid', KNOWN_PAIRS)
+def test_bv_to_av_known_pairs(aid, bvid):
+    assert bv_to_av(bvid) == aid
+
+
+@pytest.mark.parametrize('aid', [1, 2, 170001, 99999999, 2 ** 40, 2 ** 51 - 1])
+def test_round_trip(aid):
+    bvid = av_to_bv(aid)
+    assert len(bvid) == 12 and bvid.startswith('BV1')
+    assert bv_to_av(bvid) == aid
+
+
+def test_video_url_with_page():
+    videos, pending = extract_links('https://www.bilibili.com/video/BV17x411w7KC?p=3&t=12')
+    assert videos == [{'bvid': 'BV17x411w7KC', 'page': 3}]
+    assert pending == []
+
+
+def test_page_after_other_params_and_invalid_page():
+    videos, _ = extract_links(
+        'https://www.bilibili.com/video/BV17x411w7KC/?spm_id_from=333&p=2\n'
+        'https://m.bilibili.com/video/av170001/?p=0'
+    )
+    assert videos == [{'bvid': 'BV17x411w7KC', 'page': 2}, {'bvid': 'BV17x411w7KC', 'page': 1}]
+
+
+def test_url_bvid_is_not_matched_twice():
+    videos, _ = extract_links('bilibili.com/video/BV17x411w7KC')
+    assert videos == [{'bvid': 'BV17x411w7KC', 'page': 1}]
+
+
+def test_bare_ids_in_order():
+    videos, _ = extract_links('先看 av170001，再看BV1Q541167Qg, AV882584971')
+    assert [video['bvid'] for video in videos] == ['BV17x411w7KC', 'BV1Q541167Qg', 'BV1mK4y1C7Bz']
+
+
+def test_ids_inside_longer_words_are_ignored():
+    videos, pending = extract_links('xBV17x411w7KC BV17x411w7KCx nav170001 av170001x')
+    assert videos == []
+    assert pending == []
+
+
+def test_short_links():
+    _, pending = extract_links('分享 https://b23.tv/AbC123 和 b23.tv/xyz9 以及 bili2233.cn/q1w2e3')
+    assert pending == [
+        {'type': 'short', 'url': 'https://b23.tv/AbC123'},
+        {'type': 'short', 'url': 'https://b23.tv/xyz9'},
+        {'type': 'short', 'url': 'https://bili2233.cn/q1w2e3'},
+    ]
+
+
+def test_collections_and_favorites():
+    _, pending = extract_links(
+        'https://space.bilibili.com/123/favlist?fid=456&ftype=create '
+        'https://www.bilibili.com/medialist/detail/ml789 '
+        'https://space.bilibili.com/11/channel/collectiondetail?sid=22 '
+        'https://space.bilibili.com/33/channel/seriesdetail?sid=44 '
+        'https://www.bilibili.com/list/55?sid=66'
+    )
+    assert pending == [
+        {'type': 'favorite', 'media_id': 456},
+        {'type': 'favorite', 'media_id': 789},
+        {'type': 'season', 'mid': 11, 'id': 22},
+        {'type': 'series', 'mid': 33, 'id': 44},
+        {'type': 'season', 'mid': 55, 'id': 66},
+    ]
+
+
+def test_bv_prefix_is_case_insensitive():
+    videos, _ = extract_links('bv17x411w7KC https://www.bilibili.com/video/Bv1Q541167Qg?p=2 bV1mK4y1C7Bz')
+    assert videos == [
+        {'bvid': 'BV17x411w7KC', 'page': 1},
+        {'bvid': 'BV1Q541167Qg', 'page': 2},
+        {'bvid': 'BV1mK4y1C7Bz', 'page': 1},
+    ]
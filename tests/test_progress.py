@@ -0,0 +1,46 @@
+from backend.utils.progress import JobProgress
+
+
+def test_streams_accumulate():
+    job = JobProgress('job')
+    job.begin_stream()
+    job('视频下载中...', 0.5, 500, 1000)
+    job('视频下载中...', 1.0, 1000, 1000)
+    job.begin_stream()
+    job('音频下载中...', 0.5, 100, 200)
+    assert job.bytes_done == 1100
+    assert (job.downloaded, job.total) == (100, 200)
+
+
+def test_retry_does_not_count_failed_attempt():
+    job = JobProgress('job')
+    job.begin_stream()
+    job('视频下载中...', 0.6, 600, 1000)
+    # 重试后当前流从0开始计数
+    job('视频下载中...', 0.1, 100, 1000)
+    assert job.bytes_done == 100
+    job('视频下载中...', 1.0, 1000, 1000)
+    job.begin_stream()
+    job('音频下载中...', 1.0, 200, 200)
+    assert job.bytes_done == 1200
+
+
+def test_segment_sum_dropping_does_not_inflate():
+    job = JobProgress('job')
+    job.begin_stream()
+    # 分段下载报告所有分段之和，某个分段重试时总和会下降
+    for downloaded in (300, 700, 400, 900, 1000):
+        job('下载中...', downloaded / 1000, downloaded, 1000)
+    assert job.bytes_done == 1000
+
+
+def test_speed_is_not_negative_after_retry():
+    job = JobProgress('job')
+    job.begin_stream()
+    job._last_sample_time = 0.0
+    job('视频下载中...', 0.5, 500, 1000)
+    job._sample(1.0, 0.3)
+    assert job.speed == 500
+    job('视频下载中...', 0.0, 0, 1000)
+    job._sample(2.0, 0.3)
+    assert job.speed >= 0
@@ -0,0 +1,92 @@
+import pytest
+
+from backend.utils.stream_selector import StreamSelectionPolicy, get_codec_name, get_policy
+
+
+def video(quality: int, codecid: int, bandwidth: int):
+    return {'id': quality, 'codecid': codecid, 'bandwidth': bandwidth}
+
+
+AVC, HEVC, AV1 = 7, 12, 13
+
+# 接口返回顺序：同一画质下依次为AVC、HEVC、AV1
+VIDEOS = [
+    video(80, AVC, 3000000), video(80, HEVC, 1500000), video(80, AV1, 1200000),
+    video(64, AVC, 1800000), video(64, HEVC, 900000), video(64, AV1, 700000),
+    video(32, AVC, 800000),
+]
+
+
+def test_codec_name():
+    assert get_codec_name({'codecid': 12}) == 'hevc'
+    assert get_codec_name({'codecs': 'av01.0.08M.08'}) == 'av1'
+    assert get_codec_name({'codecs': 'hvc1.1.6.L120.90'}) == 'hevc'
+    assert get_codec_name({'codecs': 'avc1.640032'}) == 'avc'
+
+
+def test_default_keeps_api_order():
+    assert get_policy('default').select_video(VIDEOS, 80) is VIDEOS[0]
+
+
+def test_falls_back_to_next_lower_quality():
+    assert get_policy('default').select_video(VIDEOS, 74)['id'] == 64
+    # 没有不超过指定画质的流时选择最高画质
+    assert get_policy('default').select_video(VIDEOS, 16)['id'] == 80
+
+
+@pytest.mark.parametrize('name, codecid', [
+    ('smallest', AV1),
+    ('efficient', AV1),
+    ('compatible', AVC),
+])
+def test_presets(name, codecid):
+    selected = get_policy(name).select_video(VIDEOS, 80)
+    assert (selected['id'], selected['codecid']) == (80, codecid)
+
+
+def test_codec_order_override():
+    selected = get_policy('efficient', codec_order=['hevc', 'avc']).select_video(VIDEOS, 80)
+    assert selected['codecid'] == HEVC
+
+
+def test_smallest_within_preferred_codec():
+    videos = [video(80, HEVC, 2000000), video(80, AVC, 1000000), video(80, HEVC, 1500000)]
+    policy = StreamSelectionPolicy(codec_order=['hevc'], prefer_smallest=True)
+    assert policy.select_video(videos, 80) is videos[2]
+
+
+def test_max_bandwidth_downgrades_quality():
+    # 1080P中码率最低的AV1也超过上限，降到720P
+    selected = get_policy('compatible', max_bandwidth=1000000).select_video(VIDEOS, 80)
+    assert selected['id'] == 64
+    assert selected['bandwidth'] <= 1000000
+    # 720P的AVC超过上限，只剩HEVC和AV1可选
+    assert get_codec_name(selected) == 'hevc'
+
+
+def test_max_bandwidth_below_every_stream():
+    selected = get_policy('default', max_bandwidth=1).select_video(VIDEOS, 80)
+    assert selected['bandwidth'] == 700000
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        get_policy('fastest')
+
+
+def test_audio_selection():
+    dash = {
+        'audio': [{'id': 30216, 'bandwidth': 67000}, {'id': 30280, 'bandwidth': 192000}],
+        'dolby': {'audio': [{'id': 30250, 'bandwidth': 448000}]},
+        'flac': {'audio': {'id': 30251, 'bandwidth': 1000000}},
+    }
+    policy = get_policy()
+    assert policy.select_audio(dash)['id'] == 30280
+    assert policy.select_audio(dash, include_dolby=True)['id'] == 30250
+    assert policy.select_audio(dash, prefer_flac=True)['id'] == 30251
+    assert policy.select_audio({'audio': [], 'flac': None}, prefer_flac=True) is None
+
+
+def test_audio_without_bandwidth_uses_quality_rank():
+    dash = {'audio': [{'id': 30280}, {'id': 30216}, {'id': 30232}]}
+    assert get_policy().select_audio(dash)['id'] == 30280
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip('httpx')
+
+from backend.bilibili.client import get_mixin_key, wbi_sign  # noqa: E402
+from benchmarks.bench_api import IMG_KEY, PLAYURL_PARAMS, SEARCH_PARAMS, SUB_KEY, check_signatures  # noqa: E402
+
+
+def test_matches_legacy_signature():
+    assert check_signatures() == []
+
+
+def test_special_characters_are_filtered():
+    params = {'keyword': "a!b'c(d)e*f 测试", 'wts': 1700000000}
+    assert check_signatures([params]) == []
+    mixin_key = get_mixin_key(IMG_KEY, SUB_KEY)
+    assert wbi_sign(params, mixin_key) == wbi_sign({'keyword': 'abcdef 测试', 'wts': 1700000000}, mixin_key)
+
+
+@pytest.mark.parametrize('params', [PLAYURL_PARAMS, SEARCH_PARAMS])
+def test_signature_depends_on_wts(params):
+    mixin_key = get_mixin_key(IMG_KEY, SUB_KEY)
+    assert wbi_sign(dict(params, wts=1), mixin_key) != wbi_sign(dict(params, wts=2), mixin_key)
@@ -3,34 +3,36 @@
 import asyncio
 import sys
 import os
-import re
-from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
 from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 from rich.prompt import Prompt, Confirm
-from rich.layout import Layout
-from rich.live import Live
-from rich.text import Text
-from rich import box
-from rich.align import Align
-from rich.columns import Columns
-from rich.rule import Rule
+from rich.table import Table
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from video_downloader import VideoDownloader
+from backend.bilibili.account_pool import account_pool
+from backend.bilibili.client import BilibiliClient
+from backend.bilibili.session_keeper import session_keeper
+from backend.utils.download_index import video_key
+from backend.utils.link_importer import LinkImporter
+from backend.utils.merge_pool import merge_pool
+from backend.utils.prefetch import MetadataPrefetcher
+from backend.utils.profiler import profiler
+from backend.utils.progress import format_eta, format_speed, progress_aggregator
+from backend.utils.tracing import tracer
 
 
 class TUIDownloader:
     
     def __init__(self):
         self.console = Console()
-        self.downloader = VideoDownloader()
+        self.downloader = VideoDownloader(account_pool=account_pool)
         self.download_queue: List[Dict] = []
+        # 未登录时用于解析短链接、合集的匿名客户端
+        self.import_client: Optional[BilibiliClient] = None
         self.max_concurrent = 3
         self.quality_map = {
             "1": (126, "杜比视界"),  # Dolby Vision
@@ -49,28 +51,38 @@ class TUIDownloader:
         self.console.print("[dim]使用 Rich 库构建的终端用户界面[/dim]")
         self.console.print("[cyan]支持批量下载 | 自动提取BV号 | 实时进度显示 | 4K/杜比视界下载[/cyan]\n")
     
-    def extract_bvid_from_url(self, text: str) -> List[str]:
-        """从文本中提取BV号"""
-        bvids = []
-        
-        # 匹配BV号的正则表达式
-        bvid_pattern = r'BV[a-zA-Z0-9]+'
-        
-        # 匹配完整URL的正则表达式
-        url_pattern = r'https?://(?:www\.)?bilibili\.com/video/([a-zA-Z0-9]+)'
-        
-        # 提取BV号
-        bvid_matches = re.findall(bvid_pattern, text, re.IGNORECASE)
-        bvids.extend(bvid_matches)
-        
-        # 从URL中提取
-        url_matches = re.findall(url_pattern, text)
-        for match in url_matches:
-            if match.startswith('BV'):
-                bvids.append(match)
-        
-        # 去重并返回
-        return list(set(bvids))
+    def get_importer(self) -> LinkImporter:
+        """获取链接导入器，优先使用已登录的客户端（私有收藏夹需要登录）"""
+        client = self.downloader.client
+        if not client:
+            if not self.import_client:
+                self.import_client = BilibiliClient()
+                if self.downloader.cookies:
+                    self.import_client.set_cookies(self.downloader.cookies)
+            client = self.import_client
+        return LinkImporter(client)
+    
+    async def import_links(self, lines=None, path: Optional[str] = None) -> List[Dict]:
+        """从文本行或文件（path为"-"时读取标准输入）中导入视频，排除队列中已有和已下载的视频"""
+        queued = [video_key(task["bvid"], task.get("page", 1)) for task in self.download_queue]
+        importer = self.get_importer()
+        with self.console.status("[cyan]正在解析链接...[/cyan]"):
+            if path is not None:
+                result = await importer.import_file(path, exclude=queued)
+            else:
+                result = await importer.import_lines(lines, exclude=queued)
+        
+        for item in result["failed"]:
+            self.console.print(f"  [red]✗[/red] 解析失败: {item.get('url') or item['type']} ({item['error']})")
+        if result["duplicates"]:
+            self.console.print(f"  [dim]跳过 {result['duplicates']} 个重复或已在队列中的视频[/dim]")
+        if result["downloaded"]:
+            self.console.print(f"  [dim]跳过 {result['downloaded']} 个已下载的视频[/dim]")
+        return result["videos"]
+    
+    @staticmethod
+    def format_video(bvid: str, page: int = 1) -> str:
+        return bvid if page <= 1 else f"{bvid} P{page}"
     
     def show_main_menu(self) -> str:
         self.console.print("\n[bold yellow]主菜单[/bold yellow]")
@@ -83,6 +95,8 @@ class TUIDownloader:
             ("4", "清空下载队列", "删除所有待下载任务"),
             ("5", "登录/重新登录", "扫码登录B站账号"),
             ("6", "设置并发数量", "调整同时下载的任务数"),
+            ("7", "从文件导入", "批量导入文件或标准输入中的链接"),
+            ("8", "性能分析", "开启/停止采样性能分析（当前: " + ("开启" if profiler.running else "关闭") + "）"),
             ("0", "退出程序", "关闭下载工具")
         ]
         
@@ -100,49 +114,105 @@ class TUIDownloader:
         
         choice = Prompt.ask(
             "\n[bold cyan]请选择操作[/bold cyan]",
-            choices=["0", "1", "2", "3", "4", "5", "6"],
+            choices=["0", "1", "2", "3", "4", "5", "6", "7", "8"],
             default="1"
         )
         return choice
     
-    def add_download_task(self):
+    async def add_download_task(self):
         self.console.print("\n[bold green]添加下载任务[/bold green]")
         self.console.print("[white]支持以下输入方式:[/white]")
-        self.console.print("• 直接粘贴B站视频URL（自动提取BV号）")
-        self.console.print("• 直接输入BV号（如: BV1234567890）")
-        self.console.print("• 混合输入多个URL和BV号")
+        self.console.print("• 直接粘贴B站视频URL（支持 ?p= 分P、b23.tv 短链接）")
+        self.console.print("• 直接输入BV号或av号（如: BV1234567890、av170001）")
+        self.console.print("• 合集、视频列表、收藏夹链接（展开为其中的所有视频）")
         self.console.print("• 多个项目用空格或换行分隔\n")
         
-        bvids = []
+        lines = []
         while True:
-            bvid_input = Prompt.ask(
+            line = Prompt.ask(
                 "[bold cyan]请输入URL或BV号[/bold cyan] (直接回车结束)",
                 default="",
                 show_default=False
             )
-            if not bvid_input:
+            if not line:
                 break
-            
-            # 提取BV号
-            extracted_bvids = self.extract_bvid_from_url(bvid_input)
-            
-            # 如果没有提取到BV号，可能是直接输入的BV号
-            if not extracted_bvids:
-                # 检查是否是BV号
-                if re.match(r'^BV[a-zA-Z0-9]+$', bvid_input.strip(), re.IGNORECASE):
-                    extracted_bvids = [bvid_input.strip()]
-            
-            # 添加到列表（去重）
-            for bvid in extracted_bvids:
-                if bvid and bvid not in bvids:
-                    bvids.append(bvid)
-                    self.console.print(f"  [green]✓[/green] 已添加: [yellow]{bvid}[/yellow]")
+            lines.append(line)
+        
+        videos = await self.import_links(lines)
+        await self.queue_videos(videos)
+    
+    async def import_from_file(self):
+        self.console.print("\n[bold green]从文件导入[/bold green]")
+        self.console.print("[dim]输入 - 从标准输入读取（粘贴后按 Ctrl-D 结束，Windows 为 Ctrl-Z 回车）[/dim]\n")
         
-        if not bvids:
+        path = Prompt.ask("[bold cyan]文件路径[/bold cyan]")
+        try:
+            videos = await self.import_links(path=path)
+        except OSError as e:
+            self.console.print(f"[red]✗[/red] 读取文件失败: {e}")
+            return
+        
+        await self.queue_videos(videos)
+    
+    async def queue_videos(self, videos: List[Dict]):
+        """选择下载模式、画质和输出目录后加入队列"""
+        if not videos:
             self.console.print("\n[yellow]⚠ 未添加任何视频[/yellow]")
             return
         
-        # 显示质量选择
+        if len(videos) <= 20:
+            for video in videos:
+                self.console.print(f"  [green]✓[/green] 已添加: [yellow]{self.format_video(video['bvid'], video['page'])}[/yellow]")
+        else:
+            self.console.print(f"  [green]✓[/green] 已解析 [yellow]{len(videos)}[/yellow] 个视频")
+        
+        # 下载模式选择
+        self.console.print("\n[bold blue]请选择下载模式:[/bold blue]")
+        self.console.print("  1. 视频 (音视频合并为MP4)")
+        self.console.print("  2. 仅音频 (m4a)")
+        self.console.print("  3. 仅音频 (flac无损，无无损音轨时回退为m4a)")
+        
+        mode_choice = Prompt.ask(
+            "\n[bold cyan]请选择模式[/bold cyan]",
+            choices=["1", "2", "3"],
+            default="1"
+        )
+        audio_only = mode_choice != "1"
+        audio_format = "flac" if mode_choice == "3" else "m4a"
+        
+        if audio_only:
+            # 仅音频时画质不影响下载内容
+            quality_code, quality_desc = 64, f"仅音频({audio_format})"
+        else:
+            quality_code, quality_desc = self.choose_quality()
+        
+        # 输出目录选择
+        output_dir = Prompt.ask(
+            "\n[bold cyan]输出目录[/bold cyan]",
+            default="./downloads"
+        )
+        
+        # 添加任务到队列
+        for video in videos:
+            task = {
+                "bvid": video["bvid"],
+                "page": video["page"],
+                "quality": quality_code,
+                "quality_desc": quality_desc,
+                "audio_only": audio_only,
+                "audio_format": audio_format,
+                "output_dir": output_dir,
+                "status": "待下载",
+                "added_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self.download_queue.append(task)
+        
+        # 显示成功消息
+        self.console.print(f"\n[bold green]✓ 成功添加 {len(videos)} 个下载任务[/bold green]")
+        self.console.print(f"[dim]质量: {quality_desc} | 输出目录: {output_dir}[/dim]\n")
+    
+    def choose_quality(self):
+        """选择视频画质，返回(画质代码, 画质描述)"""
         self.console.print("\n[bold blue]请选择视频质量:[/bold blue]")
         
         quality_info = {
@@ -166,29 +236,7 @@ class TUIDownloader:
             choices=list(self.quality_map.keys()),
             default="7"  # 默认720P
         )
-        quality_code, quality_desc = self.quality_map[quality_choice]
-        
-        # 输出目录选择
-        output_dir = Prompt.ask(
-            "\n[bold cyan]输出目录[/bold cyan]",
-            default="./downloads"
-        )
-        
-        # 添加任务到队列
-        for bvid in bvids:
-            task = {
-                "bvid": bvid,
-                "quality": quality_code,
-                "quality_desc": quality_desc,
-                "output_dir": output_dir,
-                "status": "待下载",
-                "added_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            self.download_queue.append(task)
-        
-        # 显示成功消息
-        self.console.print(f"\n[bold green]✓ 成功添加 {len(bvids)} 个下载任务[/bold green]")
-        self.console.print(f"[dim]质量: {quality_desc} | 输出目录: {output_dir}[/dim]\n")
+        return self.quality_map[quality_choice]
     
     def show_download_queue(self):
         if not self.download_queue:
@@ -231,7 +279,7 @@ class TUIDownloader:
             }.get(task["status"], "?")
             
             self.console.print(
-                f"[cyan]{idx}.[/cyan] [yellow]{task['bvid']}[/yellow] "
+                f"[cyan]{idx}.[/cyan] [yellow]{self.format_video(task['bvid'], task.get('page', 1))}[/yellow] "
                 f"[green]{task['quality_desc']}[/green] "
                 f"[blue]{task['output_dir']}[/blue] "
                 f"[{status_style}]{status_icon} {task['status']}[/{status_style}] "
@@ -399,59 +447,102 @@ class TUIDownloader:
         
         success_count = 0
         fail_count = 0
-        semaphore = asyncio.Semaphore(self.max_concurrent)
+        # 并发数只限制网络下载，合并在合并任务池中进行；额外允许合并池大小的任务同时进行，
+        # 这样前面的任务合并时，后面的任务可以开始下载
+        self.downloader.download_semaphore = asyncio.Semaphore(self.max_concurrent)
+        semaphore = asyncio.Semaphore(self.max_concurrent + merge_pool.max_workers)
+        # 提前获取后续任务的视频信息和播放地址，槽位空出时无需等待接口请求
+        prefetcher = MetadataPrefetcher(self.downloader, self.download_queue, lookahead=self.max_concurrent * 2)
+        # 设置环境变量 BILI_TRACE=1 时记录每个任务各阶段的耗时
+        traces = []
         
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            TimeRemainingColumn(),
+            TextColumn("[green]{task.fields[speed]}"),
+            TextColumn("[cyan]{task.fields[eta]}"),
             console=self.console
         ) as progress:
             
             overall_task = progress.add_task(
                 "[cyan]总体进度", 
-                total=len(self.download_queue)
+                total=len(self.download_queue),
+                speed="",
+                eta=""
             )
             
+            # 任务ID -> 进度条ID
             task_progress_map = {}
             
+            def on_progress(snapshot):
+                """由进度聚合器按固定频率调用，一次刷新所有任务的进度"""
+                total_speed = 0
+                for item in snapshot:
+                    download_task = task_progress_map.get(item['job_id'])
+                    if download_task is None:
+                        continue
+                    total_speed += item['speed']
+                    progress.update(
+                        download_task,
+                        completed=int(item['percent'] * 100),
+                        speed=format_speed(item['speed']) if not item['finished'] else "",
+                        eta=format_eta(item['eta']) if not item['finished'] else ""
+                    )
+                progress.update(overall_task, speed=format_speed(total_speed))
+            
+            progress_aggregator.subscribe(on_progress)
+            
             async def download_single_task(task_info, idx):
                 nonlocal success_count, fail_count
                 
                 async with semaphore:
                     task_info["status"] = "下载中"
                     
+                    job_id = f"tui-{idx}"
+                    job_progress = progress_aggregator.create_job(job_id, task_info['bvid'])
                     download_task = progress.add_task(
-                        f"[yellow]({idx}/{len(self.download_queue)}) {task_info['bvid']}", 
-                        total=100
+                        f"[yellow]({idx}/{len(self.download_queue)}) {self.format_video(task_info['bvid'], task_info.get('page', 1))}", 
+                        total=100,
+                        speed="",
+                        eta=""
                     )
-                    task_progress_map[task_info['bvid']] = download_task
-                    
-                    def update_progress(status: str, percent: float):
-                        progress.update(download_task, completed=int(percent * 100))
+                    task_progress_map[job_id] = download_task
+                    trace = tracer.start_job(job_id, self.format_video(task_info['bvid'], task_info.get('page', 1)))
+                    if trace.enabled:
+                        traces.append(trace)
+                    success = False
                     
                     try:
-                        success = await self.downloader.download_video(
+                        metadata = await prefetcher.get(idx - 1)
+                        success = metadata is not None and await self.downloader.download_video(
                             task_info["bvid"],
                             task_info["quality"],
                             task_info["output_dir"],
-                            progress_callback=update_progress
+                            progress_callback=job_progress,
+                            audio_only=task_info.get("audio_only", False),
+                            audio_format=task_info.get("audio_format", "m4a"),
+                            page=task_info.get("page", 1),
+                            metadata=metadata,
+                            trace=trace
                         )
                         
                         if success:
                             task_info["status"] = "已完成"
                             success_count += 1
-                            progress.update(download_task, completed=100)
                         else:
                             task_info["status"] = "失败"
                             fail_count += 1
+                        job_progress.finish(success)
                             
                     except Exception as e:
                         task_info["status"] = "失败"
                         fail_count += 1
+                        job_progress.finish(False)
                         self.console.print(f"[red]下载 {task_info['bvid']} 时出错: {e}[/red]")
+                    finally:
+                        trace.finish(success)
                     
                     progress.update(overall_task, advance=1)
             
@@ -460,10 +551,56 @@ class TUIDownloader:
                 for idx, task in enumerate(self.download_queue, 1)
             ]
             
-            await asyncio.gather(*tasks)
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                prefetcher.cancel()
+                self.downloader.download_semaphore = None
+                progress_aggregator.unsubscribe(on_progress)
+                # 最后刷新一次，确保进度条显示最终状态
+                on_progress(progress_aggregator.snapshot())
+                for job_id in task_progress_map:
+                    progress_aggregator.remove_job(job_id)
         
         self.console.print(f"\n[bold]下载完成![/bold]")
         self.console.print(f"[green]成功: {success_count}[/green] | [red]失败: {fail_count}[/red]")
+        if traces:
+            self.show_trace_summary(traces)
+    
+    def show_trace_summary(self, traces):
+        """显示本批任务各阶段的耗时汇总，并保存为Chrome trace文件"""
+        table = Table(title="阶段耗时 (秒)")
+        table.add_column("阶段", style="cyan")
+        table.add_column("任务数", justify="right")
+        table.add_column("合计", justify="right")
+        table.add_column("平均", justify="right")
+        table.add_column("最大", justify="right", style="yellow")
+        for name, stats in tracer.summarize(traces).items():
+            table.add_row(name, str(stats['count']), f"{stats['total']:.2f}", f"{stats['mean']:.2f}", f"{stats['max']:.2f}")
+        self.console.print(table)
+        
+        path = tracer.save_batch(traces)
+        self.console.print(f"[dim]追踪已保存到 {path}，可在 https://ui.perfetto.dev 或 chrome://tracing 中打开[/dim]")
+    
+    def toggle_profiler(self):
+        """开启或停止采样性能分析，停止时显示热点函数并输出火焰图可用的折叠栈文件"""
+        if not profiler.running:
+            path = profiler.start()
+            self.console.print(f"\n[green]✓[/green] 已开启性能分析，结果每分钟写入 {path}")
+            self.console.print("[dim]也可以向进程发送 SIGUSR1 开关，无需回到菜单[/dim]")
+            return
+        
+        top = profiler.top(10)
+        path = profiler.stop()
+        table = Table(title=f"热点函数 (共 {profiler.samples} 个样本)")
+        table.add_column("函数", style="cyan")
+        table.add_column("样本数", justify="right")
+        table.add_column("占比", justify="right", style="yellow")
+        for name, count in top:
+            table.add_row(name, str(count), f"{count / max(profiler.samples, 1):.1%}")
+        self.console.print(table)
+        self.console.print(f"[green]✓[/green] 性能分析已停止，折叠栈文件: {path}")
+        self.console.print("[dim]可用 flamegraph.pl 或 https://www.speedscope.app 生成火焰图[/dim]")
     
     async def run(self):
         self.show_banner()
@@ -473,6 +610,8 @@ class TUIDownloader:
             await self.login()
         else:
             self.console.print("\n[green]✓[/green] 已加载登录信息")
+        # 批量下载期间在后台刷新即将过期的cookie
+        session_keeper.start()
         
         while True:
             try:
@@ -484,7 +623,7 @@ class TUIDownloader:
                         break
                 
                 elif choice == "1":
-                    self.add_download_task()
+                    await self.add_download_task()
                 
                 elif choice == "2":
                     self.show_download_queue()
@@ -501,6 +640,12 @@ class TUIDownloader:
                 elif choice == "6":
                     self.set_concurrent_limit()
                 
+                elif choice == "7":
+                    await self.import_from_file()
+                
+                elif choice == "8":
+                    self.toggle_profiler()
+                
             except KeyboardInterrupt:
                 if Confirm.ask("\n\n检测到中断，确定要退出吗?", default=False):
                     self.console.print("\n[cyan]感谢使用，再见！[/cyan]")
@@ -512,8 +657,13 @@ class TUIDownloader:
 
 
 async def main():
+    # BILI_PROFILE=1 时启动即开启性能分析，也可以用 SIGUSR1 开关
+    profiler.setup()
     tui = TUIDownloader()
-    await tui.run()
+    try:
+        await tui.run()
+    finally:
+        profiler.stop()
 
 
 if __name__ == "__main__":
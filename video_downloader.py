@@ -4,32 +4,73 @@ Bilibili 视频下载工具
 独立程序，可以从B站下载视频并合并音视频流为MP4格式
 """
 
+import argparse
 import asyncio
+import contextlib
 import json
 import os
 import sys
-import httpx
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 import subprocess
+import time
+import urllib.parse
 import base64
-from PIL import Image, ImageTk
-import io
 
 # 添加项目路径到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from backend.bilibili.client import BilibiliClient
 from backend.utils.cookie_manager import cookie_manager
-from backend.bilibili.auth import BilibiliAuth
+from backend.utils.async_writer import AdaptiveBufferSizer, BufferedFileWriter
+from backend.utils.disk_space import disk_space_manager, estimate_dash_size
+from backend.utils.download_index import download_index, video_key
+from backend.utils.integrity import StreamVerifier
+from backend.utils.progress import JobProgress
+from backend.utils.stream_selector import POLICIES, StreamSelectionPolicy, get_codec_name, get_policy
+
+# httpx、客户端、账号池、扫码登录、指标、追踪和性能分析在用到时才导入，
+# 查看帮助和参数错误时不加载，缩短命令行的启动时间
+if TYPE_CHECKING:
+    from backend.bilibili.account_pool import AccountPool
+
+
+def _null_trace():
+    """未传入追踪记录时使用的空记录"""
+    from backend.utils.tracing import NULL_TRACE
+    return NULL_TRACE
+
 
 class VideoDownloader:
     """Bilibili视频下载器"""
     
-    def __init__(self, cookie_file: str = "user_cookies.json"):
+    def __init__(self, cookie_file: str = "user_cookies.json", stream_policy: Optional[StreamSelectionPolicy] = None,
+                 account_pool: Optional['AccountPool'] = None):
         self.cookie_file = Path(cookie_file)
         self.client = None
+        # 账号池中有多个账号时，视频信息和播放地址请求分摊到各个账号，文件下载仍使用 self.client
+        self.account_pool = account_pool
         self.cookies = None
+        self.user_id: Optional[str] = None
+        # 流选择策略（画质、编码、码率）
+        self.stream_policy = stream_policy or get_policy()
+        # 传统格式分段的并发下载数
+        self.segment_concurrency = 4
+        # 下载文件写完后是否调用fsync
+        self.fsync = False
+        # 限制同时处于网络下载阶段的任务数，为None时不限制；合并阶段不占用该名额
+        self.download_semaphore: Optional[asyncio.Semaphore] = None
+        # cookie变化的订阅回调，init_client 成功后订阅，close() 时取消
+        self._cookie_callback = None
+        
+    def _on_cookies_changed(self, user_ids: List[str]):
+        if self.user_id is None or self.user_id not in user_ids:
+            return
+        cookies = cookie_manager.get_cookies(self.user_id)
+        if cookies and cookies != self.cookies:
+            self.cookies = cookies
+            if self.client:
+                self.client.set_cookies(cookies)
+            print("已同步刷新后的cookies")
         
     def load_cookies(self) -> bool:
         """加载用户cookies"""
@@ -50,6 +91,7 @@ class VideoDownloader:
             user_id, user_data = latest_user
             
             self.cookies = cookie_manager.get_cookies(user_id)
+            self.user_id = user_id
             if not self.cookies:
                 print("无法获取用户cookies")
                 return False
@@ -77,210 +119,131 @@ class VideoDownloader:
     
     async def _qr_login_async(self) -> bool:
         """异步执行扫码登录"""
+        from backend.bilibili.qr_login import QRLoginManager
+
+        # 每次登录使用独立的管理器，qr_login() 每次都会新建事件循环
+        manager = QRLoginManager()
         try:
-            async with BilibiliAuth() as auth:
-                # 获取二维码
-                print("正在生成二维码...")
-                qr_data = await auth.login_with_qr()
+            # 获取二维码
+            print("正在生成二维码...")
+            try:
+                session = await manager.create()
+            except Exception as e:
+                print(f"获取二维码失败: {e}")
+                return False
+            
+            # 显示二维码
+            qr_image_data = session.qr_image
+            qrcode_key = session.qrcode_key
+            
+            # 将base64数据写入本地文件并打开
+            try:
+                # 解码base64数据
+                header, encoded = qr_image_data.split(",", 1)
+                qr_bytes = base64.b64decode(encoded)
                 
-                if qr_data['status'] != 'qr_ready':
-                    print(f"获取二维码失败: {qr_data['message']}")
-                    return False
+                # 接口返回的已经是PNG数据，直接写入文件，无需通过PIL解码
+                qr_filename = "bilibili_qr.png"
+                with open(qr_filename, 'wb') as f:
+                    f.write(qr_bytes)
                 
-                # 显示二维码
-                qr_image_data = qr_data['qr_image']
-                qrcode_key = qr_data['qrcode_key']
+                print(f"二维码已保存为 {qr_filename}")
+                print("正在打开二维码图片，请使用Bilibili手机客户端扫描...")
                 
-                # 将base64数据写入本地文件并打开
+                # 自动打开图片
+                import platform
+                
+                system = platform.system()
                 try:
-                    # 解码base64数据
-                    header, encoded = qr_image_data.split(",", 1)
-                    qr_bytes = base64.b64decode(encoded)
-                    
-                    # 创建PIL图像
-                    image = Image.open(io.BytesIO(qr_bytes))
-                    
-                    # 保存到本地文件
-                    qr_filename = "bilibili_qr.png"
-                    image.save(qr_filename)
-                    
-                    print(f"二维码已保存为 {qr_filename}")
-                    print("正在打开二维码图片，请使用Bilibili手机客户端扫描...")
-                    
-                    # 自动打开图片
-                    import subprocess
-                    import platform
-                    
-                    system = platform.system()
-                    try:
-                        if system == "Windows":
-                            os.startfile(qr_filename)
-                        elif system == "Darwin":  # macOS
-                            subprocess.run(["open", qr_filename])
-                        else:  # Linux
-                            subprocess.run(["xdg-open", qr_filename])
-                        print("二维码图片已打开")
-                    except Exception as e:
-                        print(f"无法自动打开图片: {e}")
-                        print(f"请手动打开文件: {os.path.abspath(qr_filename)}")
-                        
+                    if system == "Windows":
+                        os.startfile(qr_filename)
+                    elif system == "Darwin":  # macOS
+                        subprocess.run(["open", qr_filename])
+                    else:  # Linux
+                        subprocess.run(["xdg-open", qr_filename])
+                    print("二维码图片已打开")
                 except Exception as e:
-                    print(f"保存二维码图片失败: {e}")
-                    print("请使用Bilibili手机客户端扫描以下链接:")
-                    print(f"二维码Key: {qrcode_key}")
-                
-                # 轮询检查扫码状态
-                max_attempts = 100  # 最大尝试次数
-                attempt = 0
-                
-                while attempt < max_attempts:
-                    status = await auth.check_qr_status(qrcode_key)
+                    print(f"无法自动打开图片: {e}")
+                    print(f"请手动打开文件: {os.path.abspath(qr_filename)}")
                     
-                    if status['status'] == 'success':
-                        print("登录成功!")
-                        
-                        # 保存cookies
-                        cookies = status['cookies']
-                        # 获取用户信息
-                        user_info = await self._get_user_info_with_cookies(cookies)
-                        user_id = user_info.get('mid', 'unknown_user')
-                        
-                        # 保存到cookie管理器
-                        cookie_manager.save_cookies(user_id, cookies, user_info)
-                        
-                        # 更新当前实例的cookies
-                        self.cookies = cookies
-                        print(f"已保存用户: {user_info.get('uname', user_id)}")
-                        # 清理临时二维码文件
-                        try:
-                            if os.path.exists("bilibili_qr.png"):
-                                os.remove("bilibili_qr.png")
-                        except:
-                            pass
-                        return True
-                        
-                    elif status['status'] == 'waiting':
-                        print("等待扫码...")
-                    elif status['status'] == 'scanned':
-                        print("已扫码，等待确认...")
-                    elif status['status'] == 'expired':
-                        print("二维码已过期，请重新运行程序")
-                        # 清理临时二维码文件
-                        try:
-                            if os.path.exists("bilibili_qr.png"):
-                                os.remove("bilibili_qr.png")
-                        except:
-                            pass
-                        return False
-                    else:
-                        print(f"登录出错: {status['message']}")
-                        # 清理临时二维码文件
-                        try:
-                            if os.path.exists("bilibili_qr.png"):
-                                os.remove("bilibili_qr.png")
-                        except:
-                            pass
-                        return False
-                    
-                    attempt += 1
-                    await asyncio.sleep(3)  # 每3秒检查一次
-                
-                print("登录超时，请重新运行程序")
-                # 清理临时二维码文件
-                try:
-                    if os.path.exists("bilibili_qr.png"):
-                        os.remove("bilibili_qr.png")
-                except:
-                    pass
-                return False
+            except Exception as e:
+                print(f"保存二维码图片失败: {e}")
+                print("请使用Bilibili手机客户端扫描以下链接:")
+                print(f"二维码Key: {qrcode_key}")
+            
+            def on_status(status):
+                if status['status'] == 'waiting':
+                    print("等待扫码...")
+                elif status['status'] == 'scanned':
+                    print("已扫码，等待确认...")
+            
+            # 扫码状态由管理器按自适应间隔轮询，状态变化时才返回
+            status = await manager.wait(qrcode_key, on_status)
+            
+            if status['status'] == 'success':
+                # 管理器已获取用户信息并保存cookies
+                print("登录成功!")
+                self.cookies = status['cookies']
+                self.user_id = status['user_id']
+                print(f"已保存用户: {status['user_info'].get('uname', status['user_id'])}")
+                return True
+            elif status['status'] == 'expired':
+                print("二维码已过期，请重新运行程序")
+            else:
+                print(f"登录出错: {status['message']}")
+            return False
                 
         except Exception as e:
             print(f"扫码登录异常: {e}")
+            return False
+        finally:
+            await manager.close()
             # 清理临时二维码文件
             try:
                 if os.path.exists("bilibili_qr.png"):
                     os.remove("bilibili_qr.png")
             except:
                 pass
-            return False
     
-    def _display_qr_in_terminal(self, image):
-        """在终端中显示二维码"""
-        try:
-            # 缩小图片以适应终端
-            width, height = image.size
-            aspect_ratio = height / width
-            new_width = 40
-            new_height = int(aspect_ratio * new_width * 0.5)
-            image = image.resize((new_width, new_height))
-            
-            # 转换为灰度图
-            image = image.convert('L')
-            
-            # 定义字符集，用于表示不同的灰度级
-            chars = [" ", "░", "▒", "▓", "█"]
-            
-            print("\n扫码登录二维码:")
-            print("+" + "-" * new_width + "+")
-            
-            for y in range(new_height):
-                line = "|"
-                for x in range(new_width):
-                    pixel = image.getpixel((x, y))
-                    # 将256级灰度映射到字符集
-                    char_index = min(pixel // 51, len(chars) - 1)  # 256 / 5 = 51
-                    line += chars[char_index]
-                line += "|"
-                print(line)
-            
-            print("+" + "-" * new_width + "+")
-            print("请使用Bilibili手机客户端扫描上面的二维码\n")
-        except Exception as e:
-            print(f"无法在终端中显示二维码: {e}")
-
-    async def _get_user_info_with_cookies(self, cookies: Dict[str, str]) -> Dict[str, Any]:
-        """使用cookies获取用户信息"""
-        try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Referer': 'https://www.bilibili.com/'
-                }
-                
-                # 设置cookies
-                for key, value in cookies.items():
-                    client.cookies.set(key, value)
-                
-                response = await client.get('https://api.bilibili.com/x/web-interface/nav', headers=headers)
-                data = response.json()
-                
-                if data['code'] == 0:
-                    return data['data']
-                else:
-                    return {}
-        except Exception as e:
-            print(f"获取用户信息失败: {e}")
-            return {}
-
     async def init_client(self):
         """初始化Bilibili客户端"""
         if not self.cookies:
             if not self.load_cookies():
                 return False
                 
+        from backend.bilibili.client import BilibiliClient
+
         self.client = BilibiliClient()
         self.client.set_cookies(self.cookies)
         # 获取WBI密钥
         await self.client.get_wbi_keys()
+        # 当前账号的cookie被刷新后（可能由其他进程刷新）同步到客户端
+        if self._cookie_callback is None:
+            self._cookie_callback = cookie_manager.subscribe(self._on_cookies_changed)
         return True
     
+    async def close(self):
+        """取消cookie变化订阅并关闭客户端"""
+        if self._cookie_callback is not None:
+            cookie_manager.unsubscribe(self._cookie_callback)
+            self._cookie_callback = None
+        client, self.client = self.client, None
+        if client:
+            await client.session.aclose()
+    
+    def _api(self):
+        """接口请求使用的客户端：账号池中有多个账号时使用账号池"""
+        if self.account_pool is not None and len(self.account_pool) > 1:
+            return self.account_pool
+        return self.client
+    
     async def get_video_info(self, bvid: str) -> Optional[Dict[Any, Any]]:
         """获取视频信息"""
         if not self.client:
             await self.init_client()
             
         try:
-            result = await self.client.get_video_info(bvid=bvid)
+            result = await self._api().get_video_info(bvid=bvid)
             if result.get('code') == 0:
                 return result
             else:
@@ -296,7 +259,7 @@ class VideoDownloader:
             await self.init_client()
             
         try:
-            result = await self.client.get_video_stream_url(bvid=bvid, cid=cid, qn=quality)
+            result = await self._api().get_video_stream_url(bvid=bvid, cid=cid, qn=quality)
             if result.get('code') == 0:
                 return result
             else:
@@ -327,20 +290,41 @@ class VideoDownloader:
         """下载视频/音频流（使用重试机制）"""
         return await self.download_stream_with_progress(url, filename, None)
     
-    async def download_stream_with_progress(self, url: str, filename: str, progress_callback=None, max_retries: int = 3) -> bool:
-        """下载视频/音频流（支持进度更新和重试机制）"""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Referer': 'https://www.bilibili.com/',
-            'Accept': '*/*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive'
-        }
+    # 下载CDN资源时使用的请求头
+    download_headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Referer': 'https://www.bilibili.com/',
+        'Accept': '*/*',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive'
+    }
+    
+    async def download_stream_with_progress(self, url: str, filename: str, progress_callback=None, max_retries: int = 3,
+                                            fsync: Optional[bool] = None, verification: Optional[Dict[str, Any]] = None,
+                                            check_boxes: bool = False, trace=None) -> bool:
+        """下载视频/音频流（支持进度更新和重试机制）
+        
+        fsync为True时在文件写完后调用fsync，未指定时使用实例的fsync设置。
+        下载过程中同步计算分段CRC32和SHA-256，结果写入verification字典；
+        check_boxes为True时额外检查fMP4顶层box结构，结构异常视为下载不完整并重试。
+        trace为任务追踪记录，每次尝试记录连接（到收到响应头）和传输两个阶段。
+        """
+        if trace is None:
+            trace = _null_trace()
+        import httpx
+        from backend.utils.metrics import ACTIVE_STREAMS, DOWNLOAD_BYTES, DOWNLOAD_RETRIES
+
+        headers = self.download_headers
+        if fsync is None:
+            fsync = self.fsync
+        host = urllib.parse.urlsplit(url).hostname or ''
         
         for attempt in range(max_retries):
             try:
+                ACTIVE_STREAMS.inc()
                 print(f"尝试下载 {os.path.basename(filename)} (第 {attempt + 1}/{max_retries} 次)")
+                connect_start = time.perf_counter()
                 
                 async with httpx.AsyncClient(
                     timeout=60.0,
@@ -350,6 +334,8 @@ class VideoDownloader:
                     
                     async with client.stream('GET', url, headers=headers) as response:
                         response.raise_for_status()
+                        transfer_start = time.perf_counter()
+                        trace.add_span('connect', connect_start, transfer_start, host=host, attempt=attempt + 1)
                         total_size = int(response.headers.get('content-length', 0))
                         
                         if total_size == 0:
@@ -357,11 +343,24 @@ class VideoDownloader:
                         
                         downloaded = 0
                         last_progress = 0
+                        # 已计入下载字节数指标的部分
+                        counted = 0
                         
-                        with open(filename, 'wb') as f:
-                            async for chunk in response.aiter_bytes(chunk_size=16384):
-                                f.write(chunk)
-                                downloaded += len(chunk)
+                        # 写入由后台线程完成，网络循环只负责把数据复制进缓冲区
+                        # 不指定chunk_size，直接使用传输层读到的数据块，避免httpx重新拼接分块
+                        sizer = AdaptiveBufferSizer()
+                        verifier = StreamVerifier(check_boxes=check_boxes)
+                        async with BufferedFileWriter(filename, buffer_size=sizer.size, fsync=fsync,
+                                                      preallocate_size=total_size, verifier=verifier) as writer:
+                            async for chunk in response.aiter_bytes():
+                                # 只在提交缓冲区时统计进度并调整缓冲区大小
+                                if not await writer.write(chunk):
+                                    continue
+                                
+                                downloaded = writer.bytes_written
+                                writer.buffer_size = sizer.update(downloaded)
+                                DOWNLOAD_BYTES.inc(downloaded - counted, host=host)
+                                counted = downloaded
                                 
                                 # 更新进度（避免过于频繁的更新）
                                 if total_size > 0 and progress_callback:
@@ -370,10 +369,26 @@ class VideoDownloader:
                                     if progress - last_progress > 0.01:
                                         progress_callback(progress, downloaded, total_size)
                                         last_progress = progress
+                        downloaded = writer.bytes_written
+                        DOWNLOAD_BYTES.inc(downloaded - counted, host=host)
+                        trace.add_span('transfer', transfer_start, time.perf_counter(), host=host, bytes=downloaded,
+                                       file=os.path.basename(filename))
+                        
+                        # 验证下载完整性：Content-Length描述的是传输的字节数，有压缩编码时与解码后的大小不同
+                        if total_size > 0:
+                            received = response.num_bytes_downloaded
+                            if received != total_size:
+                                raise Exception(f"下载不完整: {received}/{total_size} bytes")
+                            if 'content-encoding' not in response.headers and downloaded != total_size:
+                                raise Exception(f"下载不完整: 写入 {downloaded}/{total_size} bytes")
                         
-                        # 验证下载完整性
-                        if total_size > 0 and downloaded < total_size * 0.95:
-                            raise Exception(f"下载不完整: {downloaded}/{total_size} bytes")
+                        result = verifier.result()
+                        box_check = result.get('box_check')
+                        if box_check and not box_check['ok']:
+                            raise Exception(f"下载不完整: 文件结构异常 ({box_check['error']})")
+                        if verification is not None:
+                            verification.clear()
+                            verification.update(result)
                         
                         # 最终进度更新
                         if progress_callback:
@@ -385,6 +400,7 @@ class VideoDownloader:
             except httpx.ReadTimeout as e:
                 print(f"\n下载超时: {e}")
                 if attempt < max_retries - 1:
+                    DOWNLOAD_RETRIES.inc(reason='timeout')
                     print("等待 5 秒后重试...")
                     await asyncio.sleep(5)
                     continue
@@ -393,6 +409,7 @@ class VideoDownloader:
             except httpx.ConnectError as e:
                 print(f"\n连接错误: {e}")
                 if attempt < max_retries - 1:
+                    DOWNLOAD_RETRIES.inc(reason='connect')
                     print("等待 3 秒后重试...")
                     await asyncio.sleep(3)
                     continue
@@ -400,9 +417,11 @@ class VideoDownloader:
                 
             except Exception as e:
                 error_msg = str(e)
-                if "peer closed connection" in error_msg or "incomplete message" in error_msg:
+                if ("peer closed connection" in error_msg or "incomplete message" in error_msg
+                        or "下载不完整" in error_msg):
                     print(f"\n连接中断: {e}")
                     if attempt < max_retries - 1:
+                        DOWNLOAD_RETRIES.inc(reason='incomplete')
                         print("等待 5 秒后重试...")
                         await asyncio.sleep(5)
                         continue
@@ -416,6 +435,8 @@ class VideoDownloader:
                         os.remove(filename)
                 except:
                     pass
+            finally:
+                ACTIVE_STREAMS.dec()
                     
         print(f"下载 {filename} 失败，已达到最大重试次数")
         return False
@@ -457,9 +478,382 @@ class VideoDownloader:
             except Exception as e:
                 print(f"清理临时文件失败: {e}")
     
-    async def download_video(self, bvid: str, quality: int = 126, output_dir: str = "./downloads", progress_callback=None) -> bool:
+    async def _download_durl_segment(self, segment: Dict[str, Any], filename: str, progress_callback=None,
+                                     fsync: Optional[bool] = None,
+                                     verification: Optional[Dict[str, Any]] = None, trace=None) -> bool:
+        """下载单个durl分段，主地址失败时依次尝试backup_url，并校验分段大小"""
+        urls = [segment['url']] + list(segment.get('backup_url') or [])
+        expected_size = segment.get('size', 0)
+        
+        for url in urls:
+            if not await self.download_stream_with_progress(url, filename, progress_callback, fsync=fsync,
+                                                            verification=verification, trace=trace):
+                print(f"分段 {segment.get('order', '?')} 下载失败，尝试备用地址...")
+                continue
+            
+            actual_size = os.path.getsize(filename)
+            if expected_size and actual_size != expected_size:
+                print(f"分段 {segment.get('order', '?')} 大小不匹配: {actual_size}/{expected_size} bytes")
+                continue
+            return True
+        
+        try:
+            if os.path.exists(filename):
+                os.remove(filename)
+        except:
+            pass
+        return False
+    
+    async def download_durl_segments(self, durl: List[Dict[str, Any]], file_prefix: str, progress_callback=None,
+                                     fsync: Optional[bool] = None,
+                                     verifications: Optional[List[Dict[str, Any]]] = None,
+                                     trace=None) -> Optional[List[str]]:
+        """并发下载所有durl分段，返回按顺序排列的分段文件列表
+        
+        verifications不为None时，按分段顺序追加每个分段的校验结果。
+        """
+        segments = sorted(durl, key=lambda segment: segment.get('order', 0))
+        total_size = sum(segment.get('size', 0) for segment in segments)
+        downloaded_sizes = [0] * len(segments)
+        semaphore = asyncio.Semaphore(self.segment_concurrency)
+        
+        segment_files = []
+        segment_verifications: List[Dict[str, Any]] = [{} for _ in segments]
+        for index, segment in enumerate(segments):
+            extension = os.path.splitext(urllib.parse.urlparse(segment['url']).path)[1] or '.flv'
+            segment_files.append(f"{file_prefix}_part{index + 1}{extension}")
+        
+        async def download_one(index: int) -> bool:
+            def segment_progress(progress, downloaded, total):
+                downloaded_sizes[index] = downloaded
+                if progress_callback and total_size > 0:
+                    overall = sum(downloaded_sizes)
+                    progress_callback(overall / total_size, overall, total_size)
+            
+            async with semaphore:
+                return await self._download_durl_segment(segments[index], segment_files[index], segment_progress, fsync,
+                                                         segment_verifications[index], trace)
+        
+        results = await asyncio.gather(*(download_one(index) for index in range(len(segments))))
+        if not all(results):
+            print(f"有 {results.count(False)} 个分段下载失败")
+            for filename in segment_files:
+                try:
+                    if os.path.exists(filename):
+                        os.remove(filename)
+                except:
+                    pass
+            return None
+        
+        if verifications is not None:
+            for segment, verification in zip(segments, segment_verifications):
+                verifications.append({'order': segment.get('order', 0), **verification})
+        return segment_files
+    
+    def _probe_duration(self, filename: str) -> Optional[float]:
+        """使用ffprobe获取媒体时长（秒），ffprobe不可用时返回None"""
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=noprint_wrappers=1:nokey=1', filename],
+                capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                return None
+            return float(result.stdout.strip())
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def concat_segments(self, segment_files: List[str], output_file: str, expected_duration: float = 0) -> bool:
+        """无损拼接多个分段为一个文件，并校验总时长
+
+        成功后删除分段文件；失败时删除不完整的输出文件，保留分段文件以便重试或排查。
+        """
+        list_file = f"{output_file}.concat.txt"
+        success = False
+        try:
+            # 检查ffmpeg是否可用
+            try:
+                subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                print("错误: 未找到ffmpeg，请先安装ffmpeg")
+                return False
+            
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for filename in segment_files:
+                    escaped = os.path.abspath(filename).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            print(f"正在拼接 {len(segment_files)} 个分段...")
+            cmd = [
+                'ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_file,
+                '-c', 'copy', '-y', output_file
+            ]
+            
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"拼接失败: {result.stderr}")
+                return False
+            
+            # 校验时长（允许1秒或1%的误差）
+            if expected_duration > 0:
+                duration = self._probe_duration(output_file)
+                if duration is not None and abs(duration - expected_duration) > max(1.0, expected_duration * 0.01):
+                    print(f"拼接后时长不匹配: {duration:.1f}s / {expected_duration:.1f}s")
+                    return False
+            
+            print(f"已拼接为: {output_file}")
+            success = True
+            return True
+        except Exception as e:
+            print(f"拼接分段失败: {e}")
+            return False
+        finally:
+            # 清理临时文件
+            if not success:
+                print(f"已保留分段文件: {', '.join(segment_files)}")
+            try:
+                for filename in [list_file] + (segment_files if success else [output_file]):
+                    if os.path.exists(filename):
+                        os.remove(filename)
+            except Exception as e:
+                print(f"清理临时文件失败: {e}")
+    
+    def remux_audio(self, audio_file: str, output_file: str) -> bool:
+        """将音频流封装为独立的音频文件（不含视频轨）"""
+        try:
+            # 检查ffmpeg是否可用
+            try:
+                subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                print("错误: 未找到ffmpeg，请先安装ffmpeg")
+                return False
+            
+            print("正在封装音频...")
+            # 仅复制音频轨，丢弃可能存在的视频轨
+            cmd = [
+                'ffmpeg', '-i', audio_file,
+                '-vn', '-c:a', 'copy', '-y', output_file
+            ]
+            
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"封装失败: {result.stderr}")
+                return False
+                
+            print(f"已封装为: {output_file}")
+            return True
+        except Exception as e:
+            print(f"封装音频失败: {e}")
+            return False
+        finally:
+            # 清理临时文件
+            try:
+                if os.path.exists(audio_file):
+                    os.remove(audio_file)
+            except Exception as e:
+                print(f"清理临时文件失败: {e}")
+    
+    @contextlib.asynccontextmanager
+    async def _download_slot(self):
+        """占用一个下载名额，合并前释放，让排队的任务在合并期间开始下载"""
+        if self.download_semaphore is None:
+            yield
+            return
+        async with self.download_semaphore:
+            yield
+    
+    def _begin_stream(self, progress_callback):
+        """通知进度聚合器的任务开始下载下一个流，字节数从0重新计数"""
+        if isinstance(progress_callback, JobProgress):
+            progress_callback.begin_stream()
+    
+    def _report_progress(self, progress_callback, status: str, progress: float, downloaded: int, total: int):
+        """转发流下载进度，进度聚合器的任务额外接收字节数用于计算速度"""
+        if not progress_callback:
+            return
+        if isinstance(progress_callback, JobProgress):
+            progress_callback(status, progress, downloaded, total)
+        else:
+            progress_callback(status, progress)
+    
+    async def _estimate_download_size(self, streams: List[Dict[str, Any]], timelength_ms: int) -> int:
+        """估算DASH流的下载大小，缺少bandwidth时通过HEAD请求获取Content-Length"""
+        if timelength_ms and all(stream.get('bandwidth') for stream in streams):
+            return estimate_dash_size(streams[0], streams[1] if len(streams) > 1 else None, timelength_ms)
+        
+        import httpx
+
+        total = 0
+        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
+            for stream in streams:
+                try:
+                    response = await client.head(stream['baseUrl'], headers=self.download_headers)
+                    total += int(response.headers.get('content-length', 0))
+                except Exception as e:
+                    print(f"获取文件大小失败: {e}")
+        return total
+    
+    async def _reserve_disk_space(self, output_dir: str, size: int, progress_callback=None) -> Optional[str]:
+        """为下载任务预留磁盘空间，空间被其他任务占用时排队等待"""
+        def on_wait(needed, available):
+            print(f"磁盘空间不足，等待其他任务释放空间 (需要 {needed / 1024 / 1024:.1f}MB，可用 {available / 1024 / 1024:.1f}MB)")
+            if progress_callback:
+                progress_callback("等待磁盘空间...", 0)
+        
+        token = await disk_space_manager.reserve(output_dir, size, on_wait)
+        if not token:
+            free = disk_space_manager.get_free_space(output_dir)
+            print(f"磁盘空间不足: 预计需要 {size / 1024 / 1024:.1f}MB，可用 {free / 1024 / 1024:.1f}MB")
+        return token
+    
+    def _record_download(self, bvid: str, page: int, output_file: str, report: Dict[str, Any]):
+        """记录输出文件并写入下载索引"""
+        report['output_file'] = output_file
+        download_index.record(video_key(bvid, page), report)
+    
+    def _cleanup_files(self, *filenames: str, trace=None):
+        """删除下载失败后遗留的临时文件"""
+        if trace is None:
+            trace = _null_trace()
+        with trace.span('cleanup', files=len(filenames)):
+            for filename in filenames:
+                try:
+                    if os.path.exists(filename):
+                        os.remove(filename)
+                except Exception as e:
+                    print(f"清理临时文件失败: {e}")
+    
+    async def _download_audio_only(self, dash: Dict[str, Any], title: str, output_dir: str,
+                                   progress_callback=None, audio_format: str = "m4a",
+                                   policy: Optional[StreamSelectionPolicy] = None, timelength_ms: int = 0,
+                                   fsync: Optional[bool] = None, report: Optional[Dict[str, Any]] = None,
+                                   trace=None) -> bool:
+        """仅下载DASH音频流并封装为m4a/flac
+        
+        audio_format为flac时优先选择无损音轨(dash.flac)，
+        其余情况在杜比全景声(dash.dolby)和普通音轨(dash.audio)中选择码率最高的一条。
+        """
+        from backend.utils.merge_pool import merge_pool
+
+        if trace is None:
+            trace = _null_trace()
+        policy = policy or self.stream_policy
+        prefer_flac = audio_format == "flac"
+        if prefer_flac and not (dash.get('flac') or {}).get('audio'):
+            print("该视频没有无损音轨，改为下载m4a")
+        audio_stream = policy.select_audio(dash, include_dolby=True, prefer_flac=prefer_flac)
+        if not audio_stream:
+            print("无法找到合适的音频流")
+            return False
+        
+        print(f"音频流质量: {audio_stream['id']}")
+        
+        # 无损音轨封装为flac，其余封装为m4a
+        is_flac = audio_stream['id'] == 30251 or 'flac' in audio_stream.get('codecs', '').lower()
+        extension = "flac" if is_flac else "m4a"
+        
+        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        audio_file = os.path.join(output_dir, f"{safe_title}_audio.m4s")
+        output_file = os.path.join(output_dir, f"{safe_title}.{extension}")
+        
+        # 临时文件和封装结果同时存在，按两倍大小预留
+        with trace.span('prepare') as attrs:
+            estimated_size = await self._estimate_download_size([audio_stream], timelength_ms)
+            attrs['estimated_bytes'] = estimated_size
+            token = await self._reserve_disk_space(output_dir, estimated_size * 2, progress_callback)
+        if not token:
+            return False
+        
+        try:
+            print("正在下载音频流...")
+            self._begin_stream(progress_callback)
+            if progress_callback:
+                progress_callback("音频下载中...", 0)
+                
+            def audio_progress(progress, downloaded, total):
+                self._report_progress(progress_callback, "音频下载中...", progress, downloaded, total)
+                    
+            audio_verification: Dict[str, Any] = {}
+            queued = time.perf_counter()
+            async with self._download_slot():
+                trace.add_span('queue', queued, time.perf_counter())
+                if not await self.download_stream_with_progress(audio_stream['baseUrl'], audio_file, audio_progress, fsync=fsync,
+                                                                verification=audio_verification, check_boxes=True,
+                                                                trace=trace):
+                    self._cleanup_files(audio_file, trace=trace)
+                    return False
+            if report is not None:
+                report['streams'] = {'audio': audio_verification}
+            
+            if progress_callback:
+                progress_callback("封装中...", 0)
+                
+            if not await merge_pool.run(self.remux_audio, audio_file, output_file, trace=trace):
+                return False
+        finally:
+            disk_space_manager.release(token)
+            
+        if report is not None:
+            report['output_file'] = output_file
+        print(f"音频下载完成: {output_file}")
+        if progress_callback:
+            progress_callback("下载完成", 1.0)
+        return True
+    
+    async def fetch_metadata(self, bvid: str, quality: int = 126, page: int = 1) -> Optional[Dict[str, Any]]:
+        """获取下载所需的视频信息和视频流
+        
+        返回 {'video_info', 'stream_info', 'title', 'cid', 'timings'}，失败时返回None。
+        timings记录两个接口请求的起止时间（time.perf_counter），由 download_video 写入任务追踪。
+        """
+        view_start = time.perf_counter()
+        video_info = await self.get_video_info(bvid)
+        view_end = time.perf_counter()
+        if not video_info:
+            return None
+            
+        title = video_info['data']['title']
+        cid = video_info['data']['cid']
+        if page > 1:
+            pages = video_info['data'].get('pages') or []
+            if page > len(pages):
+                print(f"视频只有 {len(pages)} 个分P，无法下载P{page}")
+                return None
+            cid = pages[page - 1]['cid']
+            title = f"{title} P{page} {pages[page - 1].get('part', '')}".rstrip()
+        
+        playurl_start = time.perf_counter()
+        stream_info = await self.get_video_stream(bvid, cid, quality)
+        playurl_end = time.perf_counter()
+        if not stream_info:
+            return None
+            
+        # 检查数据结构
+        if 'data' not in stream_info:
+            print(f"流信息结构异常: {stream_info}")
+            return None
+        
+        timings = {'view': (view_start, view_end), 'playurl': (playurl_start, playurl_end)}
+        return {'video_info': video_info, 'stream_info': stream_info, 'title': title, 'cid': cid, 'timings': timings}
+    
+    async def download_video(self, bvid: str, quality: int = 126, output_dir: str = "./downloads", progress_callback=None,
+                             audio_only: bool = False, audio_format: str = "m4a",
+                             policy: Optional[StreamSelectionPolicy] = None, fsync: Optional[bool] = None,
+                             report: Optional[Dict[str, Any]] = None, page: int = 1,
+                             metadata: Optional[Dict[str, Any]] = None, trace=None) -> bool:
         """下载Bilibili视频（支持进度回调）
         
+        page为分P序号（从1开始），第2P起输出文件名带上分P序号和标题。
+        audio_only为True时只下载音轨并封装为m4a/flac（audio_format指定），跳过视频轨。
+        policy为流选择策略，未指定时使用实例的stream_policy。
+        fsync为True时每个文件写完后落盘，未指定时使用实例的fsync设置。
+        report不为None时写入输出文件路径和每个下载流的校验结果（大小、SHA-256、分段CRC32），
+        供去重、同步等后续操作使用，无需重新读取文件；下载成功后同一份报告也会记入下载索引。
+        metadata为 fetch_metadata 的结果（例如由预取器提前获取），为None时在此获取。
+        trace为 tracer.start_job() 返回的任务追踪记录（为None时不记录），记录视频信息、播放地址、排队、连接、传输、合并排队、合并、
+        写入索引和失败后清理临时文件各阶段的耗时。
+        
         quality参数说明:
         - 126: 杜比视界 (需要大会员)
         - 125: HDR真彩色 (需要大会员)
@@ -470,81 +864,58 @@ class VideoDownloader:
         - 64: 720P高清
         - 32: 480P清晰
         """
+        from backend.utils.merge_pool import merge_pool
+
         print(f"开始下载视频: {bvid}, 请求画质: {quality}")
+        if report is None:
+            report = {}
+        if trace is None:
+            trace = _null_trace()
         
         # 创建输出目录
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # 获取视频信息
-        video_info = await self.get_video_info(bvid)
-        if not video_info:
+        # 获取视频信息和视频流（可由预取器提前获取）
+        if metadata is None:
+            metadata = await self.fetch_metadata(bvid, quality, page)
+        if not metadata:
             return False
+        for name, (start, end) in metadata.get('timings', {}).items():
+            trace.add_span(name, start, end, bvid=bvid, cid=metadata['cid'])
             
-        title = video_info['data']['title']
-        cid = video_info['data']['cid']
+        title = metadata['title']
         print(f"视频标题: {title}")
-        print(f"视频CID: {cid}")
+        print(f"视频CID: {metadata['cid']}")
         
-        # 获取视频流
-        stream_info = await self.get_video_stream(bvid, cid, quality)
-        if not stream_info:
-            return False
-            
-        # 检查数据结构
-        if 'data' not in stream_info:
-            print(f"流信息结构异常: {stream_info}")
-            return False
-            
         # 获取数据部分
-        data = stream_info['data']
+        data = metadata['stream_info']['data']
+        
+        policy = policy or self.stream_policy
         
         # 处理DASH格式视频
         if 'dash' in data:
             dash = data['dash']
             
-            # 获取最佳视频和音频流
-            video_stream = None
-            audio_stream = None
-            
-            # 选择视频流
-            if dash.get('video'):
-                # 选择指定质量的视频流，如果没有则选择最接近的较低质量
-                for stream in dash['video']:
-                    if stream['id'] == quality:
-                        video_stream = stream
-                        break
-                
-                # 如果没有找到指定质量，则选择最接近的较低质量
-                if not video_stream:
-                    available_qualities = [stream['id'] for stream in dash['video']]
-                    available_qualities.sort(reverse=True)  # 从高到低排序
-                    
-                    # 选择不超过指定质量的最高质量
-                    for q in available_qualities:
-                        if q <= quality:
-                            for stream in dash['video']:
-                                if stream['id'] == q:
-                                    video_stream = stream
-                                    quality = q  # 更新实际使用的质量
-                                    break
-                            break
-                
-                # 如果还是没有找到，则选择最高质量
-                if not video_stream and dash['video']:
-                    video_stream = dash['video'][0]
-                    quality = video_stream['id']
-                        
-            # 选择音频流
-            if dash.get('audio'):
-                # 选择最高质量的音频流
-                audio_stream = dash['audio'][0]
+            if audio_only:
+                success = await self._download_audio_only(
+                    dash, title, output_dir, progress_callback, audio_format, policy, data.get('timelength', 0), fsync,
+                    report, trace
+                )
+                if success:
+                    with trace.span('index'):
+                        self._record_download(bvid, page, report['output_file'], report)
+                return success
+            
+            # 按流选择策略选择视频流和音频流
+            video_stream = policy.select_video(dash.get('video') or [], quality)
+            audio_stream = policy.select_audio(dash)
                 
             if not video_stream or not audio_stream:
                 print("无法找到合适的视频或音频流")
                 return False
                 
-            print(f"视频流质量: {video_stream['id']}")
-            print(f"音频流质量: {audio_stream['id']}")
+            print(f"视频流质量: {video_stream['id']} ({get_codec_name(video_stream)}, {video_stream.get('bandwidth', 0) // 1000}kbps)")
+            print(f"音频流质量: {audio_stream['id']} ({audio_stream.get('bandwidth', 0) // 1000}kbps)")
             
             # 生成文件名
             safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
@@ -552,37 +923,64 @@ class VideoDownloader:
             audio_file = os.path.join(output_dir, f"{safe_title}_audio.m4s")
             output_file = os.path.join(output_dir, f"{safe_title}.mp4")
             
-            # 下载视频流
-            print("正在下载视频流...")
-            if progress_callback:
-                progress_callback("视频下载中...", 0)
-                
-            def video_progress(progress, downloaded, total):
-                if progress_callback:
-                    progress_callback("视频下载中...", progress)
-                    
-            if not await self.download_stream_with_progress(video_stream['baseUrl'], video_file, video_progress):
+            # 临时文件和合并结果同时存在，按两倍大小预留
+            with trace.span('prepare') as attrs:
+                estimated_size = await self._estimate_download_size([video_stream, audio_stream], data.get('timelength', 0))
+                print(f"预计大小: {estimated_size / 1024 / 1024:.1f}MB")
+                attrs['estimated_bytes'] = estimated_size
+                token = await self._reserve_disk_space(output_dir, estimated_size * 2, progress_callback)
+            if not token:
                 return False
-                
-            # 下载音频流
-            print("正在下载音频流...")
-            if progress_callback:
-                progress_callback("音频下载中...", 0)
-                
-            def audio_progress(progress, downloaded, total):
+            
+            try:
+                queued = time.perf_counter()
+                async with self._download_slot():
+                    trace.add_span('queue', queued, time.perf_counter())
+                    # 下载视频流
+                    print("正在下载视频流...")
+                    self._begin_stream(progress_callback)
+                    if progress_callback:
+                        progress_callback("视频下载中...", 0)
+                    
+                    def video_progress(progress, downloaded, total):
+                        self._report_progress(progress_callback, "视频下载中...", progress, downloaded, total)
+                        
+                    # m4s为fMP4分段文件，下载时同时检查box结构，避免把截断的文件交给ffmpeg
+                    video_verification: Dict[str, Any] = {}
+                    if not await self.download_stream_with_progress(video_stream['baseUrl'], video_file, video_progress, fsync=fsync,
+                                                                    verification=video_verification, check_boxes=True,
+                                                                    trace=trace):
+                        self._cleanup_files(video_file, trace=trace)
+                        return False
+                    
+                    # 下载音频流
+                    print("正在下载音频流...")
+                    self._begin_stream(progress_callback)
+                    if progress_callback:
+                        progress_callback("音频下载中...", 0)
+                    
+                    def audio_progress(progress, downloaded, total):
+                        self._report_progress(progress_callback, "音频下载中...", progress, downloaded, total)
+                        
+                    audio_verification: Dict[str, Any] = {}
+                    if not await self.download_stream_with_progress(audio_stream['baseUrl'], audio_file, audio_progress, fsync=fsync,
+                                                                    verification=audio_verification, check_boxes=True,
+                                                                    trace=trace):
+                        self._cleanup_files(video_file, audio_file, trace=trace)
+                        return False
+                    report['streams'] = {'video': video_verification, 'audio': audio_verification}
+                    
+                # 合并音视频
                 if progress_callback:
-                    progress_callback("音频下载中...", progress)
+                    progress_callback("合并中...", 0)
                     
-            if not await self.download_stream_with_progress(audio_stream['baseUrl'], audio_file, audio_progress):
-                return False
-                
-            # 合并音视频
-            if progress_callback:
-                progress_callback("合并中...", 0)
-                
-            if not self.merge_video_audio(video_file, audio_file, output_file):
-                return False
+                if not await merge_pool.run(self.merge_video_audio, video_file, audio_file, output_file, trace=trace):
+                    return False
+            finally:
+                disk_space_manager.release(token)
                 
+            with trace.span('index'):
+                self._record_download(bvid, page, output_file, report)
             print(f"视频下载完成: {output_file}")
             if progress_callback:
                 progress_callback("下载完成", 1.0)
@@ -601,19 +999,62 @@ class VideoDownloader:
             safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
             output_file = os.path.join(output_dir, f"{safe_title}.mp4")
             
-            # 下载视频（通常已包含音频）
-            video_url = durl[0]['url']
-            print("正在下载视频...")
+            # 分段下载（旧视频可能被切分为多个FLV/MP4分段，通常已包含音频）
+            print(f"正在下载视频 ({len(durl)} 个分段)...")
+            self._begin_stream(progress_callback)
             if progress_callback:
                 progress_callback("下载中...", 0)
                 
             def video_progress(progress, downloaded, total):
-                if progress_callback:
-                    progress_callback("下载中...", progress)
+                self._report_progress(progress_callback, "下载中...", progress, downloaded, total)
                     
-            if not await self.download_stream_with_progress(video_url, output_file, video_progress):
+            if audio_only:
+                # 传统格式音视频在同一文件中，只能下载后再提取音轨
+                print("该视频为传统格式，需下载完整文件后提取音轨")
+                output_file = os.path.join(output_dir, f"{safe_title}_full.mp4")
+            
+            # 分段文件和拼接结果同时存在，按两倍大小预留
+            estimated_size = sum(segment.get('size', 0) for segment in durl)
+            with trace.span('prepare', estimated_bytes=estimated_size):
+                token = await self._reserve_disk_space(output_dir, estimated_size * 2, progress_callback)
+            if not token:
                 return False
+            
+            try:
+                segment_prefix = os.path.join(output_dir, safe_title)
+                # FLV分段不是fMP4，只计算校验和，不检查box结构
+                segment_verifications: List[Dict[str, Any]] = []
+                queued = time.perf_counter()
+                async with self._download_slot():
+                    trace.add_span('queue', queued, time.perf_counter())
+                    segment_files = await self.download_durl_segments(durl, segment_prefix, video_progress, fsync,
+                                                                      segment_verifications, trace)
+                if not segment_files:
+                    return False
+                report['streams'] = {'segments': segment_verifications}
+                
+                if len(segment_files) == 1:
+                    os.replace(segment_files[0], output_file)
+                else:
+                    if progress_callback:
+                        progress_callback("合并分段中...", 0)
+                    expected_duration = sum(segment.get('length', 0) for segment in durl) / 1000
+                    if not await merge_pool.run(self.concat_segments, segment_files, output_file, expected_duration,
+                                                trace=trace):
+                        return False
                 
+                if audio_only:
+                    if progress_callback:
+                        progress_callback("封装中...", 0)
+                    audio_output = os.path.join(output_dir, f"{safe_title}.m4a")
+                    if not await merge_pool.run(self.remux_audio, output_file, audio_output, trace=trace):
+                        return False
+                    output_file = audio_output
+            finally:
+                disk_space_manager.release(token)
+                
+            with trace.span('index'):
+                self._record_download(bvid, page, output_file, report)
             print(f"视频下载完成: {output_file}")
             if progress_callback:
                 progress_callback("下载完成", 1.0)
@@ -638,8 +1079,60 @@ async def main():
         print("  80  - 1080P高清 (需要登录)")
         print("  64  - 720P高清")
         print("  32  - 480P清晰")
+        print("\n可选参数:")
+        print("  --audio-only           仅下载音频（不下载视频轨）")
+        print("  --audio-format m4a|flac 音频封装格式，flac需要视频提供无损音轨 (默认m4a)")
+        print("  --policy NAME          流选择策略: default/smallest/efficient/compatible (默认default)")
+        print("  --codecs av1,hevc,avc  编码偏好顺序")
+        print("  --max-bitrate KBPS     视频码率上限，超过时自动降低画质")
+        print("  --fsync                文件写完后立即落盘")
+        print("  --profile              采样性能分析，结果写入 profiles/ 下的折叠栈文件")
         print("\n示例: python video_downloader.py BV1xx411c7mu")
         print("示例: python video_downloader.py BV1xx411c7mu 126 ./videos")
+        print("示例: python video_downloader.py BV1xx411c7mu --audio-only --audio-format flac")
         return
     
-    bvid
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bilibili 视频下载工具")
+    parser.add_argument("bvid", help="视频BV号")
+    parser.add_argument("quality", nargs="?", type=int, default=32, help="画质代码 (默认32)")
+    parser.add_argument("output_dir", nargs="?", default="./downloads", help="输出目录 (默认./downloads)")
+    parser.add_argument("--audio-only", action="store_true", help="仅下载音频")
+    parser.add_argument("--audio-format", choices=["m4a", "flac"], default="m4a", help="音频封装格式")
+    parser.add_argument("--policy", choices=list(POLICIES), default="default", help="流选择策略")
+    parser.add_argument("--codecs", help="编码偏好顺序，例如 av1,hevc,avc")
+    parser.add_argument("--max-bitrate", type=int, help="视频码率上限 (kbps)")
+    parser.add_argument("--fsync", action="store_true", help="文件写完后立即落盘")
+    parser.add_argument("--profile", action="store_true", help="采样性能分析，结果写入 profiles/ 下的折叠栈文件")
+    args = parser.parse_args()
+    
+    from backend.utils.profiler import profiler
+    profiler.setup()
+    
+    stream_policy = get_policy(
+        args.policy,
+        codec_order=args.codecs.split(",") if args.codecs else None,
+        max_bandwidth=args.max_bitrate * 1000 if args.max_bitrate else None
+    )
+    downloader = VideoDownloader(stream_policy=stream_policy)
+    if not await downloader.init_client():
+        print("初始化客户端失败，请先登录")
+        if not await downloader._qr_login_async() or not await downloader.init_client():
+            return
+    
+    if args.profile:
+        profiler.start()
+    try:
+        success = await downloader.download_video(
+            args.bvid, args.quality, args.output_dir,
+            audio_only=args.audio_only, audio_format=args.audio_format, fsync=args.fsync
+        )
+    finally:
+        profile_file = profiler.stop()
+        if profile_file:
+            print(f"性能分析结果: {profile_file}")
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())